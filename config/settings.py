@@ -72,10 +72,29 @@ DATABASES = {
 }
 
 if os.environ.get("BIAEDGE_DATABASE_URL"):
+    # psycopg's pool replaces persistent per-thread connections, so Django
+    # requires CONN_MAX_AGE=0 when it is enabled.
+    BIAEDGE_DB_POOL = os.environ.get("BIAEDGE_DB_POOL", "false").lower() in ("true", "1", "yes")
     DATABASES["biaedge"] = dj_database_url.config(
         env="BIAEDGE_DATABASE_URL",
-        conn_max_age=600,
+        conn_max_age=0 if BIAEDGE_DB_POOL else 600,
     )
+    biaedge_options = DATABASES["biaedge"].setdefault("OPTIONS", {})
+    if BIAEDGE_DB_POOL:
+        biaedge_options["pool"] = {
+            "min_size": int(os.environ.get("BIAEDGE_DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(os.environ.get("BIAEDGE_DB_POOL_MAX_SIZE", "10")),
+            "max_idle": float(os.environ.get("BIAEDGE_DB_POOL_MAX_IDLE_SECONDS", "300")),
+            "timeout": float(os.environ.get("BIAEDGE_DB_POOL_TIMEOUT_SECONDS", "10")),
+        }
+    if os.environ.get("BIAEDGE_PREPARE_THRESHOLD"):
+        # Server-side binding lets psycopg prepare the fixed research queries once
+        # per session. Through pgbouncer this needs transaction pooling with
+        # max_prepared_statements set (pgbouncer 1.21+).
+        biaedge_options["server_side_binding"] = True
+        biaedge_options["prepare_threshold"] = int(os.environ["BIAEDGE_PREPARE_THRESHOLD"])
+    if os.environ.get("BIAEDGE_PGBOUNCER", "false").lower() in ("true", "1", "yes"):
+        DATABASES["biaedge"]["DISABLE_SERVER_SIDE_CURSORS"] = True
 else:
     DATABASES["biaedge"] = {
         "ENGINE": "django.db.backends.sqlite3",
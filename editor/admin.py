@@ -5,6 +5,7 @@ from .models import (
     DocumentClientFile,
     DocumentVersion,
     Exemplar,
+    IngestionJob,
     DocumentResearchSession,
     DocumentResearchMessage,
     DocumentResearchRun,
@@ -13,6 +14,7 @@ from .models import (
     WorkspaceResearchMessage,
     WorkspaceResearchRun,
 )
+from .version_store import delete_versions
 
 
 @admin.register(DocumentType)
@@ -29,7 +31,13 @@ class DocumentAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentVersion)
 class DocumentVersionAdmin(admin.ModelAdmin):
-    list_display = ["document", "label", "created_at"]
+    list_display = ["document", "label", "storage", "created_at"]
+
+    def delete_model(self, request, obj):
+        delete_versions(DocumentVersion.objects.filter(id=obj.id))
+
+    def delete_queryset(self, request, queryset):
+        delete_versions(queryset)
 
 
 @admin.register(DocumentClientFile)
@@ -55,6 +63,12 @@ class ExemplarAdmin(admin.ModelAdmin):
     search_fields = ["title", "style_family", "case_type", "extracted_text"]
 
 
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "status", "stage", "attempts", "worker_id", "updated_at"]
+    list_filter = ["kind", "status", "stage"]
+
+
 @admin.register(DocumentResearchSession)
 class DocumentResearchSessionAdmin(admin.ModelAdmin):
     list_display = ["document", "user", "last_response_id", "updated_at"]
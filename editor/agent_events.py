@@ -0,0 +1,73 @@
+import json
+import logging
+import threading
+
+from .models import DocumentResearchRunEvent
+
+logger = logging.getLogger(__name__)
+
+_RESULT_STATUSES = {"completed", "failed", "cancelled"}
+
+# Wakes in-process stream readers as soon as an executor thread records an event;
+# readers in other processes fall back to their short polling interval.
+_EVENT_CONDITION = threading.Condition()
+
+
+def record_run_events(run, kind, payloads):
+    payloads = [payload for payload in payloads or [] if isinstance(payload, dict)]
+    if not run.pk or not payloads:
+        return []
+    try:
+        events = DocumentResearchRunEvent.objects.bulk_create(
+            [DocumentResearchRunEvent(run_id=run.pk, kind=kind, payload=payload) for payload in payloads]
+        )
+    except Exception:
+        logger.exception(
+            "Unable to record document agent run event",
+            extra={"run_id": str(run.public_id), "kind": kind},
+        )
+        return []
+    with _EVENT_CONDITION:
+        _EVENT_CONDITION.notify_all()
+    return events
+
+
+def record_run_event(run, kind, payload):
+    events = record_run_events(run, kind, [payload])
+    return events[0] if events else None
+
+
+def record_run_result(run):
+    if run.status not in _RESULT_STATUSES:
+        return None
+    payload = {
+        "status": run.status,
+        "stage": run.stage,
+        "error_message": run.error_message,
+    }
+    if run.status == "completed" and run.result_payload:
+        payload["result"] = run.result_payload
+    return record_run_event(run, "result", payload)
+
+
+def run_events_after(run_id, last_event_id, *, limit=200):
+    return list(
+        DocumentResearchRunEvent.objects.filter(run_id=run_id, id__gt=last_event_id)
+        .order_by("id")
+        .only("id", "kind", "payload")[:limit]
+    )
+
+
+def wait_for_run_events(timeout):
+    with _EVENT_CONDITION:
+        _EVENT_CONDITION.wait(timeout)
+
+
+def format_sse(kind, data, *, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {kind}")
+    for line in json.dumps(data, default=str).splitlines() or [""]:
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
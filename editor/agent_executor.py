@@ -0,0 +1,281 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .agent_events import record_run_result
+from .agent_service import AgentConfigurationError, DocumentResearchAgent
+from .ingestion_service import default_worker_id
+from .models import DocumentResearchMessage, DocumentResearchRun
+
+logger = logging.getLogger(__name__)
+
+# "thread" advances runs on an in-process scheduler, "worker" leaves them for the
+# run_agent_executor command, and "poll" keeps the legacy poll-driven advancement.
+AGENT_RUN_EXECUTOR = os.environ.get("AGENT_RUN_EXECUTOR", "thread").strip().lower() or "thread"
+AGENT_EXECUTOR_WORKERS = int(os.environ.get("AGENT_EXECUTOR_WORKERS", "4"))
+AGENT_EXECUTOR_INTERVAL_SECONDS = float(os.environ.get("AGENT_EXECUTOR_INTERVAL_SECONDS", "1.5"))
+AGENT_RUN_LEASE_SECONDS = int(os.environ.get("AGENT_RUN_LEASE_SECONDS", "120"))
+# A run still without a response id after this long lost the request that was
+# starting it (worker killed or restarted) and is failed instead of waited on.
+AGENT_RUN_START_TIMEOUT_SECONDS = int(os.environ.get("AGENT_RUN_START_TIMEOUT_SECONDS", "300"))
+
+_ACTIVE_RUN_STATUSES = {"queued", "in_progress"}
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def mark_run_start_failure(run, message):
+    run.status = "failed"
+    run.stage = "failed"
+    metadata = dict(run.metadata or {})
+    metadata["phase"] = "failed"
+    run.metadata = metadata
+    run.error_message = (message or "The agent run failed to start.").strip()
+    run.completed_at = timezone.now()
+    run.save(update_fields=["status", "stage", "metadata", "error_message", "completed_at", "updated_at"])
+    record_run_result(run)
+    return run
+
+
+def persist_chat_completion(run):
+    if run.mode != "chat" or run.status != "completed":
+        return None
+    if run.assistant_message_id:
+        return run.assistant_message
+
+    result = run.result_payload or {}
+    answer = str(result.get("answer") or "").strip()
+    if not answer:
+        return None
+
+    session = run.session
+    assistant_message = DocumentResearchMessage.objects.create(
+        session=session,
+        role="assistant",
+        content=answer,
+        selection_text=run.user_message.selection_text if run.user_message else "",
+        response_id=str(result.get("response_id") or "").strip(),
+        tool_calls=result.get("tool_calls") or [],
+        citations=result.get("citations") or [],
+        metadata=result.get("metadata") or {},
+    )
+    run.assistant_message = assistant_message
+    run.save(update_fields=["assistant_message", "updated_at"])
+    session.last_response_id = str(result.get("response_id") or "").strip()
+    session.save(update_fields=["last_response_id", "updated_at"])
+    return assistant_message
+
+
+def mark_assistant_persist_failure(run, exc):
+    metadata = dict(run.metadata or {})
+    metadata["assistant_persist_failed"] = True
+    metadata["assistant_persist_error"] = str(exc)[:500]
+    run.metadata = metadata
+    run.save(update_fields=["metadata", "updated_at"])
+    return run
+
+
+def finalize_chat_run(run):
+    """Persist the assistant message for a completed chat run exactly once."""
+    if run.mode != "chat" or run.status != "completed":
+        return run, None
+    if run.assistant_message_id:
+        return run, run.assistant_message
+    if (run.metadata or {}).get("assistant_persist_failed"):
+        return run, None
+
+    try:
+        with transaction.atomic():
+            locked_run = DocumentResearchRun.objects.select_for_update().select_related(
+                "session",
+                "assistant_message",
+                "user_message",
+            ).get(id=run.id)
+            assistant_message = persist_chat_completion(locked_run)
+            return locked_run, assistant_message
+    except Exception as exc:
+        logger.exception(
+            "Unable to persist completed document agent chat message",
+            extra={"document_id": str(run.session.document_id), "run_id": str(run.public_id)},
+        )
+        return mark_assistant_persist_failure(run, exc), None
+
+
+def advance_run_now(run, *, user=None):
+    try:
+        agent = DocumentResearchAgent(document=run.session.document, user=user or run.session.user)
+        run = agent.advance_run(run=run)
+    except AgentConfigurationError as exc:
+        run = mark_run_start_failure(run, str(exc))
+    except Exception:
+        logger.exception(
+            "Unexpected document agent advancement failure",
+            extra={"document_id": str(run.session.document_id), "run_id": str(run.public_id)},
+        )
+        run = mark_run_start_failure(run, "The agent failed unexpectedly while advancing.")
+    run, _ = finalize_chat_run(run)
+    return run
+
+
+def claim_active_runs(*, worker_id, limit=1):
+    # Runs without a response id are still being started by the request that created them.
+    now = timezone.now()
+    with transaction.atomic():
+        run_ids = list(
+            DocumentResearchRun.objects.select_for_update(skip_locked=True)
+            .filter(status__in=_ACTIVE_RUN_STATUSES)
+            .exclude(response_id="")
+            .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+            .order_by(F("lease_expires_at").asc(nulls_first=True), "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if run_ids:
+            DocumentResearchRun.objects.filter(id__in=run_ids).update(
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=AGENT_RUN_LEASE_SECONDS),
+            )
+    return list(
+        DocumentResearchRun.objects.select_related(
+            "session",
+            "session__document",
+            "session__user",
+            "assistant_message",
+            "user_message",
+        ).filter(id__in=run_ids)
+    )
+
+
+def release_run_lease(run, *, worker_id):
+    # Leaving an expired timestamp behind rotates claims across runs in round-robin order.
+    DocumentResearchRun.objects.filter(id=run.id, lease_owner=worker_id).update(
+        lease_owner="",
+        lease_expires_at=timezone.now(),
+    )
+
+
+def fail_stalled_starts():
+    cutoff = timezone.now() - timedelta(seconds=AGENT_RUN_START_TIMEOUT_SECONDS)
+    stalled_ids = list(
+        DocumentResearchRun.objects.filter(
+            status__in=_ACTIVE_RUN_STATUSES,
+            response_id="",
+            created_at__lte=cutoff,
+        ).values_list("id", flat=True)
+    )
+    failed = 0
+    for run_id in stalled_ids:
+        with transaction.atomic():
+            run = (
+                DocumentResearchRun.objects.select_for_update(skip_locked=True)
+                .filter(id=run_id, status__in=_ACTIVE_RUN_STATUSES, response_id="")
+                .first()
+            )
+            if run is None:
+                continue
+            mark_run_start_failure(run, "The agent run was interrupted before it started. Please try again.")
+            failed += 1
+    return failed
+
+
+def advance_active_runs(*, worker_id, limit=None, pool=None):
+    fail_stalled_starts()
+    runs = claim_active_runs(worker_id=worker_id, limit=limit or max(1, AGENT_EXECUTOR_WORKERS))
+    if not runs:
+        return 0
+
+    def _advance(run):
+        if pool is not None:
+            close_old_connections()
+        try:
+            advance_run_now(run)
+        finally:
+            release_run_lease(run, worker_id=worker_id)
+            if pool is not None:
+                close_old_connections()
+
+    if pool is None:
+        for run in runs:
+            _advance(run)
+    else:
+        list(pool.map(_advance, runs))
+    return len(runs)
+
+
+def has_pending_runs():
+    # Unstarted runs only count until the start timeout; fail_stalled_starts then fails them.
+    cutoff = timezone.now() - timedelta(seconds=AGENT_RUN_START_TIMEOUT_SECONDS)
+    return (
+        DocumentResearchRun.objects.filter(status__in=_ACTIVE_RUN_STATUSES)
+        .filter(~Q(response_id="") | Q(created_at__gt=cutoff))
+        .exists()
+    )
+
+
+class AgentRunScheduler(threading.Thread):
+    """Advances active runs in the web process until none are left."""
+
+    def __init__(self):
+        super().__init__(name="agent-run-scheduler", daemon=True)
+        self.worker_id = default_worker_id()
+        self.wakeup = threading.Event()
+
+    def run(self):
+        with ThreadPoolExecutor(
+            max_workers=max(1, AGENT_EXECUTOR_WORKERS),
+            thread_name_prefix="agent-run",
+        ) as pool:
+            while True:
+                close_old_connections()
+                try:
+                    advance_active_runs(worker_id=self.worker_id, pool=pool)
+                    if not has_pending_runs():
+                        break
+                except Exception:
+                    logger.exception("Agent run scheduler tick failed")
+                self.wakeup.wait(AGENT_EXECUTOR_INTERVAL_SECONDS)
+                self.wakeup.clear()
+        close_old_connections()
+        _scheduler_stopped(self)
+
+
+def ensure_agent_executor():
+    """Make sure something will advance active runs without waiting for a poll."""
+    if AGENT_RUN_EXECUTOR != "thread":
+        return
+    transaction.on_commit(_start_scheduler)
+
+
+def _start_scheduler():
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is not None and _SCHEDULER.is_alive():
+            _SCHEDULER.wakeup.set()
+            return
+        _SCHEDULER = AgentRunScheduler()
+        _SCHEDULER.start()
+
+
+def _scheduler_stopped(scheduler):
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is scheduler:
+            _SCHEDULER = None
+
+
+def run_executor_loop(*, workers, poll_interval, once=False):
+    worker_id = default_worker_id()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="agent-run") as pool:
+        while True:
+            close_old_connections()
+            advanced = advance_active_runs(worker_id=worker_id, limit=workers, pool=pool)
+            if once:
+                return advanced
+            time.sleep(poll_interval)
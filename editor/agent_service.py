@@ -8,9 +8,10 @@ from urllib.parse import urlparse, urlunparse
 
 from django.utils import timezone
 
+from .agent_events import record_run_event, record_run_events, record_run_result
 from .document_text import clip_document_text, extract_plain_text
 from .document_file_service import rank_client_files
-from .exemplar_service import rank_exemplars
+from .exemplar_service import search_exemplars
 from .models import DocumentClientFile, DocumentResearchRun, Exemplar
 from .openai_file_service import analyze_client_file_with_input_file, search_indexed_client_files
 
@@ -474,46 +475,29 @@ def _search_exemplars_for_agent(*, user, query: str, limit: int = 5, document_ty
     if document_type_slug:
         qs = qs.filter(document_type__slug=document_type_slug)
 
-    exemplars = []
-    for exemplar in qs[:200]:
-        text = exemplar.extracted_text or ""
-        exemplars.append(
-                {
-                    "id": exemplar.id,
-                    "title": exemplar.title,
-                    "document_type": exemplar.document_type.name if exemplar.document_type else "",
-                    "document_type_slug": exemplar.document_type.slug if exemplar.document_type else "",
-                    "kind": exemplar.kind,
-                    "style_family": exemplar.style_family,
-                    "case_type": exemplar.case_type,
-                    "outcome": exemplar.outcome,
-                    "tags": exemplar.tags or [],
-                    "updated_at": exemplar.updated_at.isoformat(),
-                    "snippet": text[:500],
-                "extracted_text": text[:4000],
-                "embedding": exemplar.embedding or [],
-            }
-        )
-
-    ranked = rank_exemplars(normalized_query, exemplars)
-    return {
-        "results": [
+    ranked = search_exemplars(user, normalized_query, queryset=qs, limit=normalized_limit)
+    by_id = {exemplar.id: exemplar for exemplar in qs.filter(id__in=[exemplar_id for exemplar_id, _ in ranked])}
+    results = []
+    for exemplar_id, score in ranked:
+        exemplar = by_id.get(exemplar_id)
+        if not exemplar:
+            continue
+        results.append(
             {
-                "id": item["id"],
-                "title": item["title"],
-                "document_type": item["document_type"],
-                "document_type_slug": item["document_type_slug"],
-                "kind": item["kind"],
-                "style_family": item["style_family"],
-                "case_type": item["case_type"],
-                "outcome": item["outcome"],
-                "tags": item["tags"],
-                "snippet": item["snippet"],
-                "score": round(float(item.get("score", 0.0) or 0.0), 4),
+                "id": exemplar.id,
+                "title": exemplar.title,
+                "document_type": exemplar.document_type.name if exemplar.document_type else "",
+                "document_type_slug": exemplar.document_type.slug if exemplar.document_type else "",
+                "kind": exemplar.kind,
+                "style_family": exemplar.style_family,
+                "case_type": exemplar.case_type,
+                "outcome": exemplar.outcome,
+                "tags": exemplar.tags or [],
+                "snippet": (exemplar.extracted_text or "")[:500],
+                "score": round(float(score or 0.0), 4),
             }
-            for item in ranked[:normalized_limit]
-        ]
-    }
+        )
+    return {"results": results}
 
 
 def _get_exemplar_for_agent(*, user, exemplar_id: int):
@@ -2078,13 +2062,13 @@ class DocumentResearchAgent:
             run.stage = stage
         current_stage = run.stage or stage or ""
         if not history or history[-1].get("phase") != phase or history[-1].get("stage") != current_stage:
-            history.append(
-                {
-                    "phase": phase,
-                    "stage": current_stage,
-                    "at": timezone.now().isoformat(),
-                }
-            )
+            entry = {
+                "phase": phase,
+                "stage": current_stage,
+                "at": timezone.now().isoformat(),
+            }
+            history.append(entry)
+            record_run_event(run, "phase", entry)
         metadata["phase_history"] = history[-12:]
         run.metadata = metadata
         self._refresh_run_evidence_pack(run=run)
@@ -2122,14 +2106,14 @@ class DocumentResearchAgent:
         if response_id and any(str(item.get("response_id") or "") == response_id for item in fragments):
             return
 
-        fragments.append(
-            {
-                "response_id": response_id,
-                "text": fragment,
-            }
-        )
+        entry = {
+            "response_id": response_id,
+            "text": fragment,
+        }
+        fragments.append(entry)
         metadata["answer_fragments"] = fragments[-6:]
         run.metadata = metadata
+        record_run_event(run, "answer_fragment", entry)
 
     def _assembled_answer(self, *, run: DocumentResearchRun, response: Any, answer: str) -> str:
         fragments = [
@@ -2311,10 +2295,15 @@ class DocumentResearchAgent:
         metadata["usage_by_response_id"] = usage_by_response_id
         run.metadata = metadata
         run.usage = _sum_usage_by_response(usage_by_response_id)
-        run.tool_calls = _merge_unique_records(run.tool_calls or [], _extract_hosted_tool_calls(response))
+        self._merge_run_tool_calls(run, _extract_hosted_tool_calls(response))
         run.citations = _merge_unique_records(run.citations or [], _extract_citations(response))
         self._refresh_run_evidence_pack(run=run)
 
+    def _merge_run_tool_calls(self, run: DocumentResearchRun, new_items: list[dict[str, Any]]) -> None:
+        existing = _merge_unique_records(run.tool_calls or [], [])
+        run.tool_calls = _merge_unique_records(existing, new_items)
+        record_run_events(run, "tool_call", run.tool_calls[len(existing):])
+
     def _update_run_state(self, run: DocumentResearchRun, *, status: str, stage: str) -> DocumentResearchRun:
         run.status = status
         self._set_run_phase(run=run, phase=_stage_phase(stage), stage=stage)
@@ -2339,6 +2328,7 @@ class DocumentResearchAgent:
                 "updated_at",
             ]
         )
+        record_run_result(run)
         return run
 
     def _mark_run_cancelled(self, run: DocumentResearchRun, message: str) -> DocumentResearchRun:
@@ -2359,6 +2349,7 @@ class DocumentResearchAgent:
                 "updated_at",
             ]
         )
+        record_run_result(run)
         return run
 
     def _mark_run_completed(self, run: DocumentResearchRun, *, result_payload: dict[str, Any], response: Any) -> DocumentResearchRun:
@@ -2383,6 +2374,7 @@ class DocumentResearchAgent:
                 "updated_at",
             ]
         )
+        record_run_result(run)
         return run
 
     def _failed_status_message(self, *, run: DocumentResearchRun, response: Any) -> str:
@@ -2610,7 +2602,7 @@ class DocumentResearchAgent:
             return self._mark_run_failed(run, f"Local tool execution failed: {exc}")
 
         run.local_function_rounds = int(run.local_function_rounds or 0) + 1
-        run.tool_calls = _merge_unique_records(run.tool_calls or [], local_tool_calls)
+        self._merge_run_tool_calls(run, local_tool_calls)
         self._refresh_run_evidence_pack(run=run)
         budget_error = self._budget_error(run)
         if budget_error:
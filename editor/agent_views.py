@@ -1,19 +1,36 @@
 import json
 import logging
+import os
+import time
+from datetime import timedelta
 
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 
-from .agent_service import AgentConfigurationError, AgentExecutionError, DocumentResearchAgent
-from .models import Document, DocumentResearchMessage, DocumentResearchRun, DocumentResearchSession, DocumentVersion
+from .agent_events import format_sse, record_run_result, run_events_after, wait_for_run_events
+from .agent_executor import AGENT_RUN_EXECUTOR, advance_run_now, ensure_agent_executor, finalize_chat_run
+from .agent_executor import mark_assistant_persist_failure as _mark_assistant_persist_failure
+from .agent_executor import mark_run_start_failure as _mark_run_start_failure
+from .agent_executor import persist_chat_completion as _persist_chat_completion
+from .agent_service import AGENT_MAX_RUN_SECONDS, AgentConfigurationError, AgentExecutionError, DocumentResearchAgent
+from .models import Document, DocumentResearchMessage, DocumentResearchRun, DocumentResearchSession
+from .version_store import create_version
 
 logger = logging.getLogger(__name__)
 
 _ACTIVE_RUN_STATUSES = {"queued", "in_progress"}
+# Streams hold a web worker for their whole life, so the editor only opens them when
+# gunicorn runs gthread/async workers; otherwise it polls the run status.
+AGENT_RUN_STREAMING = os.environ.get("AGENT_RUN_STREAMING", "false").strip().lower() in {"1", "true", "yes"}
+AGENT_STREAM_POLL_SECONDS = float(os.environ.get("AGENT_STREAM_POLL_SECONDS", "1.0"))
+AGENT_STREAM_HEARTBEAT_SECONDS = 15
+# Each connection ends well inside the gunicorn worker timeout; EventSource then
+# reconnects with Last-Event-ID and resumes where it left off.
+AGENT_STREAM_MAX_SECONDS = float(os.environ.get("AGENT_STREAM_MAX_SECONDS", "25"))
 
 
 def _serialize_message(message):
@@ -74,6 +91,19 @@ def _fallback_chat_message_from_run(run):
     }
 
 
+def _run_status_payload(run, *, assistant_message=None):
+    if assistant_message is None and run.assistant_message_id:
+        assistant_message = run.assistant_message
+    return {
+        "run": _serialize_run(run, include_result=run.mode in {"suggest", "edit"}),
+        "assistant_message": (
+            _serialize_message(assistant_message) if assistant_message else _fallback_chat_message_from_run(run)
+        ),
+        "suggest_result": run.result_payload if run.mode == "suggest" and run.status == "completed" else None,
+        "edit_result": run.result_payload if run.mode == "edit" and run.status == "completed" else None,
+    }
+
+
 def _get_session_for_document(*, user, document):
     session, _ = DocumentResearchSession.objects.get_or_create(
         document=document,
@@ -90,18 +120,6 @@ def _get_active_run(session):
     )
 
 
-def _mark_run_start_failure(run, message):
-    run.status = "failed"
-    run.stage = "failed"
-    metadata = dict(run.metadata or {})
-    metadata["phase"] = "failed"
-    run.metadata = metadata
-    run.error_message = (message or "The agent run failed to start.").strip()
-    run.completed_at = timezone.now()
-    run.save(update_fields=["status", "stage", "metadata", "error_message", "completed_at", "updated_at"])
-    return run
-
-
 def _cancel_run_without_agent(run, reason):
     run.status = "cancelled"
     run.stage = "cancelled"
@@ -111,44 +129,7 @@ def _cancel_run_without_agent(run, reason):
     run.error_message = (reason or "The agent run was cancelled.").strip()
     run.completed_at = timezone.now()
     run.save(update_fields=["status", "stage", "metadata", "error_message", "completed_at", "updated_at"])
-    return run
-
-
-def _persist_chat_completion(run):
-    if run.mode != "chat" or run.status != "completed":
-        return None
-    if run.assistant_message_id:
-        return run.assistant_message
-
-    result = run.result_payload or {}
-    answer = str(result.get("answer") or "").strip()
-    if not answer:
-        return None
-
-    session = run.session
-    assistant_message = DocumentResearchMessage.objects.create(
-        session=session,
-        role="assistant",
-        content=answer,
-        selection_text=run.user_message.selection_text if run.user_message else "",
-        response_id=str(result.get("response_id") or "").strip(),
-        tool_calls=result.get("tool_calls") or [],
-        citations=result.get("citations") or [],
-        metadata=result.get("metadata") or {},
-    )
-    run.assistant_message = assistant_message
-    run.save(update_fields=["assistant_message", "updated_at"])
-    session.last_response_id = str(result.get("response_id") or "").strip()
-    session.save(update_fields=["last_response_id", "updated_at"])
-    return assistant_message
-
-
-def _mark_assistant_persist_failure(run, exc):
-    metadata = dict(run.metadata or {})
-    metadata["assistant_persist_failed"] = True
-    metadata["assistant_persist_error"] = str(exc)[:500]
-    run.metadata = metadata
-    run.save(update_fields=["metadata", "updated_at"])
+    record_run_result(run)
     return run
 
 
@@ -253,6 +234,7 @@ def agent_chat(request, doc_id):
             status=500,
         )
 
+    ensure_agent_executor()
     return JsonResponse(
         {
             "run": _serialize_run(run),
@@ -346,6 +328,7 @@ def agent_suggest(request, doc_id):
             status=500,
         )
 
+    ensure_agent_executor()
     return JsonResponse({"run": _serialize_run(run)}, status=202)
 
 
@@ -411,6 +394,7 @@ def agent_edit(request, doc_id):
             status=500,
         )
 
+    ensure_agent_executor()
     return JsonResponse({"run": _serialize_run(run)}, status=202)
 
 
@@ -454,11 +438,7 @@ def agent_apply_edit(request, doc_id):
         result_payload = run.result_payload or {}
         summary = str(result_payload.get("edit_summary") or "Agent edit").strip()
         label = f"Before agent edit - {summary}"[:100]
-        version = DocumentVersion.objects.create(
-            document=document,
-            content=current_content,
-            label=label,
-        )
+        version = create_version(document, current_content, label=label)
 
         document.content = new_content
         document.save(update_fields=["content", "updated_at"])
@@ -475,6 +455,7 @@ def agent_apply_edit(request, doc_id):
         {
             "status": "ok",
             "updated_at": document.updated_at.isoformat(),
+            "revision": document.revision,
             "version": {
                 "id": version.id,
                 "label": version.label,
@@ -505,24 +486,13 @@ def agent_run_status(request, run_id):
 
     try:
         if run.status in _ACTIVE_RUN_STATUSES:
-            try:
-                agent = DocumentResearchAgent(document=run.session.document, user=request.user)
-                run = agent.advance_run(run=run)
-            except AgentConfigurationError as exc:
-                run = _mark_run_start_failure(run, str(exc))
-            except Exception:
-                logger.exception(
-                    "Unexpected document agent polling failure",
-                    extra={
-                        "document_id": str(run.session.document.id),
-                        "user_id": request.user.id,
-                        "run_id": str(run.public_id),
-                    },
-                )
-                run = _mark_run_start_failure(run, "The agent failed unexpectedly while polling.")
+            if AGENT_RUN_EXECUTOR == "poll":
+                run = advance_run_now(run, user=request.user)
+            else:
+                # The executor advances the run; polling only reads its latest state.
+                ensure_agent_executor()
 
         assistant_message = None
-        fallback_assistant_message = _fallback_chat_message_from_run(run)
         if run.mode == "chat" and run.status == "completed":
             if run.assistant_message_id:
                 assistant_message = run.assistant_message
@@ -547,18 +517,7 @@ def agent_run_status(request, run_id):
                     )
                     run = _mark_assistant_persist_failure(run, exc)
 
-        return JsonResponse(
-            {
-                "run": _serialize_run(run, include_result=run.mode in {"suggest", "edit"}),
-                "assistant_message": (
-                    _serialize_message(assistant_message)
-                    if assistant_message
-                    else (_serialize_message(run.assistant_message) if run.assistant_message_id else fallback_assistant_message)
-                ),
-                "suggest_result": run.result_payload if run.mode == "suggest" and run.status == "completed" else None,
-                "edit_result": run.result_payload if run.mode == "edit" and run.status == "completed" else None,
-            }
-        )
+        return JsonResponse(_run_status_payload(run, assistant_message=assistant_message))
     except Exception:
         logger.exception(
             "Unexpected document agent run status failure",
@@ -580,3 +539,74 @@ def agent_run_status(request, run_id):
             },
             status=status,
         )
+
+
+def _parse_last_event_id(request):
+    raw_value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id") or "0"
+    try:
+        return max(0, int(raw_value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _run_event_stream(run, *, user, last_event_id):
+    yield "retry: 3000\n\n"
+    yield format_sse("snapshot", {"run": _serialize_run(run)})
+
+    run_deadline = run.created_at + timedelta(seconds=AGENT_MAX_RUN_SECONDS + 60)
+    connection_deadline = time.monotonic() + AGENT_STREAM_MAX_SECONDS
+    last_write = time.monotonic()
+    while True:
+        for event in run_events_after(run.id, last_event_id):
+            last_event_id = event.id
+            last_write = time.monotonic()
+            yield format_sse(event.kind, event.payload, event_id=event.id)
+
+        status = DocumentResearchRun.objects.filter(id=run.id).values_list("status", flat=True).first()
+        if status not in _ACTIVE_RUN_STATUSES:
+            if run_events_after(run.id, last_event_id, limit=1):
+                continue
+            run = DocumentResearchRun.objects.select_related(
+                "session",
+                "session__document",
+                "assistant_message",
+                "user_message",
+            ).get(id=run.id)
+            run, assistant_message = finalize_chat_run(run)
+            yield format_sse("done", _run_status_payload(run, assistant_message=assistant_message))
+            return
+
+        if timezone.now() > run_deadline:
+            yield format_sse("timeout", {"run": _serialize_run(run)})
+            return
+        if time.monotonic() > connection_deadline:
+            return
+        if time.monotonic() - last_write >= AGENT_STREAM_HEARTBEAT_SECONDS:
+            last_write = time.monotonic()
+            yield ": keepalive\n\n"
+
+        if AGENT_RUN_EXECUTOR == "poll":
+            run = DocumentResearchRun.objects.select_related("session", "session__document").get(id=run.id)
+            advance_run_now(run, user=user)
+        wait_for_run_events(AGENT_STREAM_POLL_SECONDS)
+
+
+@login_required
+@require_GET
+def agent_run_stream(request, run_id):
+    run = get_object_or_404(
+        DocumentResearchRun.objects.select_related("session", "session__document"),
+        public_id=run_id,
+        session__user=request.user,
+        session__document__created_by=request.user,
+    )
+    if run.status in _ACTIVE_RUN_STATUSES:
+        ensure_agent_executor()
+
+    response = StreamingHttpResponse(
+        _run_event_stream(run, user=request.user, last_event_id=_parse_last_event_id(request)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
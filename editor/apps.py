@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class EditorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'editor'
+
+    def ready(self):
+        from .exemplar_service import _invalidate_exemplar_index_for_instance
+        from .models import Exemplar
+
+        post_save.connect(
+            _invalidate_exemplar_index_for_instance,
+            sender=Exemplar,
+            dispatch_uid="editor_exemplar_index_post_save",
+        )
+        post_delete.connect(
+            _invalidate_exemplar_index_for_instance,
+            sender=Exemplar,
+            dispatch_uid="editor_exemplar_index_post_delete",
+        )
@@ -1,4 +1,5 @@
 from .exemplar_service import cosine_similarity, generate_embedding
+from .ingestion_service import ingestion_state
 
 
 def serialize_client_file(client_file):
@@ -12,6 +13,7 @@ def serialize_client_file(client_file):
         "extension": metadata.get("extension") or "",
         "char_count": len(text),
         "snippet": text[:500],
+        "ingestion": ingestion_state(metadata),
         "updated_at": client_file.updated_at.isoformat(),
     }
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import json
 import uuid
 
@@ -33,6 +34,12 @@ def new_block_id() -> str:
     return uuid.uuid4().hex
 
 
+def content_fingerprint(content: dict | None) -> tuple[str, int]:
+    """SHA-256 digest and byte size of the canonical JSON encoding of ``content``."""
+    encoded = json.dumps(content or {}, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest(), len(encoded)
+
+
 def normalize_document_content(content: dict | None) -> dict:
     if not isinstance(content, dict):
         content = {}
@@ -114,6 +121,42 @@ def summarize_top_level_blocks(content: dict | None) -> list[dict]:
     return items
 
 
+def split_sections_by_heading(content: dict | None, *, min_chars: int = 200) -> list[dict]:
+    """Group top-level blocks into heading-led sections, folding short ones into their neighbour."""
+    sections: list[dict] = []
+    for block in summarize_top_level_blocks(content):
+        text = block["text"].strip()
+        if block["type"] == "heading" or not sections:
+            sections.append(
+                {
+                    "heading": text if block["type"] == "heading" else "",
+                    "block_id": block["block_id"],
+                    "block_ids": [],
+                    "texts": [],
+                }
+            )
+        section = sections[-1]
+        section["block_ids"].append(block["block_id"])
+        if text:
+            section["texts"].append(text)
+
+    merged: list[dict] = []
+    for section in sections:
+        section["text"] = "\n".join(section.pop("texts"))
+        if merged and len(merged[-1]["text"]) < min_chars:
+            previous = merged[-1]
+            previous["block_ids"].extend(section["block_ids"])
+            previous["text"] = "\n".join(part for part in (previous["text"], section["text"]) if part)
+            previous["heading"] = previous["heading"] or section["heading"]
+            continue
+        merged.append(section)
+    if len(merged) > 1 and len(merged[-1]["text"]) < min_chars:
+        last = merged.pop()
+        merged[-1]["block_ids"].extend(last["block_ids"])
+        merged[-1]["text"] = "\n".join(part for part in (merged[-1]["text"], last["text"]) if part)
+    return [section for section in merged if section["text"]]
+
+
 def node_plain_text(node: dict | None) -> str:
     if not isinstance(node, dict):
         return ""
@@ -155,6 +198,85 @@ def block_editor_text(node: dict | None) -> str:
     return node_plain_text(node)
 
 
+class DocumentPatchError(ValueError):
+    pass
+
+
+def normalize_top_level_block(node: dict) -> dict:
+    return _normalize_node(node, top_level=True)
+
+
+def apply_block_patch(content: dict | None, ops: list[dict]) -> dict:
+    """Apply block-level ops to normalized ``content``, normalizing only the blocks they carry.
+
+    Supported ops, all addressed by top-level ``block_id``:
+    ``{"op": "update", "block": {...}}``, ``{"op": "insert", "block": {...}, "after": id | None}``,
+    ``{"op": "move", "block_id": id, "after": id | None}`` and ``{"op": "delete", "block_id": id}``.
+    """
+    content = content if isinstance(content, dict) else {}
+    current = content.get("content") if isinstance(content.get("content"), list) else []
+
+    # Blocks without an id keep a private positional key so they survive untouched.
+    blocks: dict = {}
+    order: list = []
+    for index, node in enumerate(current):
+        key = _patch_block_id(node) or ("anonymous", index)
+        if key in blocks:
+            raise DocumentPatchError(f"Block id {key} appears more than once; send the full document.")
+        blocks[key] = node
+        order.append(key)
+
+    for op in ops or []:
+        if not isinstance(op, dict):
+            raise DocumentPatchError("Each patch operation must be an object.")
+        kind = op.get("op")
+        if kind in {"update", "insert"}:
+            block = op.get("block")
+            block_id = _patch_block_id(block)
+            if not block_id:
+                raise DocumentPatchError(f"{kind} operations need a block with attrs.block_id.")
+            if kind == "update":
+                if block_id not in blocks:
+                    raise DocumentPatchError(f"Unknown block id {block_id}.")
+            else:
+                if block_id in blocks:
+                    raise DocumentPatchError(f"Block id {block_id} already exists.")
+                order.insert(_patch_insert_index(order, op.get("after")), block_id)
+            blocks[block_id] = normalize_top_level_block(block)
+        elif kind == "move":
+            block_id = str(op.get("block_id") or "")
+            if block_id not in blocks:
+                raise DocumentPatchError(f"Unknown block id {block_id}.")
+            order.remove(block_id)
+            order.insert(_patch_insert_index(order, op.get("after")), block_id)
+        elif kind == "delete":
+            block_id = str(op.get("block_id") or "")
+            if block_id not in blocks:
+                raise DocumentPatchError(f"Unknown block id {block_id}.")
+            order.remove(block_id)
+            del blocks[block_id]
+        else:
+            raise DocumentPatchError(f"Unsupported patch operation {kind!r}.")
+
+    nodes = [blocks[key] for key in order] or [_normalize_node({"type": "paragraph"}, top_level=True)]
+    return {**content, "type": "doc", "content": nodes}
+
+
+def _patch_block_id(node) -> str:
+    if not isinstance(node, dict) or not isinstance(node.get("attrs"), dict):
+        return ""
+    return str(node["attrs"].get("block_id") or "")
+
+
+def _patch_insert_index(order: list, after) -> int:
+    if after in (None, ""):
+        return 0
+    try:
+        return order.index(str(after)) + 1
+    except ValueError:
+        raise DocumentPatchError(f"Unknown anchor block id {after}.") from None
+
+
 def replace_top_level_block_text(content: dict | None, block_id: str, text: str) -> dict:
     normalized = normalize_document_content(content)
     updated_nodes = []
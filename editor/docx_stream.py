@@ -0,0 +1,423 @@
+"""
+Stream generated DOCX exports without building a python-docx object tree.
+
+Documents exported without a source DOCX or style anchor only ever use the
+default python-docx package configured with a ``FORMAT_PRESETS`` entry. This
+module writes that package's ``word/document.xml`` straight into a streamed ZIP.
+Paragraph and run property XML is produced by the python-docx helpers in
+``editor.export`` once per distinct formatting and reused as a fragment, so the
+output matches ``tiptap_to_docx`` part for part.
+"""
+
+import copy
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from xml.sax.saxutils import escape as xml_escape
+
+from docx import Document as DocxDocument
+from docx.shared import Pt
+from lxml import etree
+
+from .export import (
+    FORMAT_PRESETS,
+    _apply_paragraph_attrs,
+    _apply_text_marks,
+    _coerce_footnote_number,
+    _configure_generated_docx,
+    _extract_inline_parts,
+    _list_fallback_style,
+    _process_node,
+    _register_footnote,
+)
+
+DOCX_STREAMING_EXPORT = os.environ.get("DOCX_STREAMING_EXPORT", "true").strip().lower() not in {"0", "false", "no"}
+DOCX_STREAM_CHUNK_BYTES = 64 * 1024
+
+_DOCUMENT_PART = "word/document.xml"
+_STYLES_PART = "word/styles.xml"
+_PARAGRAPH_ATTR_KEYS = ("word_style", "paragraph_metrics", "textAlign")
+_RUN_MARKS = ("bold", "italic", "underline", "strike", "superscript", "subscript")
+_XMLNS_RE = re.compile(rb' xmlns(?::\w+)?="[^"]*"')
+_RUN_SPECIAL_RE = re.compile(r"([\t\r\n])")
+# Characters lxml refuses to serialize; python-docx would fail on them instead.
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EMPTY_PARAGRAPH = b"<w:p/>"
+_PAGE_BREAK_PARAGRAPH = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_LINE_BREAK_RUN = b"<w:r><w:br/></w:r>"
+
+_SKELETON_CACHE_SIZE = 16
+_FRAGMENT_CACHE_SIZE = 4096
+_SKELETONS = OrderedDict()
+_FRAGMENTS = {}
+# python-docx trees are not thread-safe, so every use of the shared scratch and
+# skeleton documents happens under this lock.
+_LOCK = threading.RLock()
+_SCRATCH = None
+
+
+class _ChunkSink:
+    """Write-only file object that collects ZIP output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_tiptap_docx(tiptap_json, *, export_format="court_brief", document_metadata=None):
+    """Yield the bytes of the DOCX ``tiptap_to_docx`` would build, a chunk at a time."""
+    skeleton = _skeleton(export_format, document_metadata)
+    content = tiptap_json.get("content", []) if isinstance(tiptap_json, dict) else []
+    footnotes = []
+    list_styles = set()
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, blob in skeleton["parts"]:
+            if name == _DOCUMENT_PART:
+                with archive.open(name, "w") as part:
+                    part.write(skeleton["document_head"])
+                    pending = []
+                    pending_size = 0
+                    for fragment in _body_fragments(content, skeleton, footnotes, list_styles):
+                        pending.append(fragment)
+                        pending_size += len(fragment)
+                        if pending_size >= DOCX_STREAM_CHUNK_BYTES:
+                            part.write(b"".join(pending))
+                            pending.clear()
+                            pending_size = 0
+                            yield sink.drain()
+                    part.write(b"".join(pending))
+                    part.write(skeleton["document_tail"])
+            elif name == _STYLES_PART and list_styles:
+                archive.writestr(name, _styles_with_list_fonts(skeleton, list_styles))
+            else:
+                archive.writestr(name, blob)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def tiptap_to_docx_streamed(tiptap_json, *, export_format="court_brief", document_metadata=None):
+    """The streamed export collected into a buffer, mainly for tests and benchmarks."""
+    buffer = io.BytesIO()
+    for chunk in stream_tiptap_docx(tiptap_json, export_format=export_format, document_metadata=document_metadata):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def clear_docx_stream_cache():
+    global _SCRATCH
+    with _LOCK:
+        _SKELETONS.clear()
+        _FRAGMENTS.clear()
+        _SCRATCH = None
+
+
+def _body_fragments(content, skeleton, footnotes, list_styles):
+    preset = skeleton["preset"]
+    para_counter = 0
+    for node in content:
+        node_type = node.get("type", "")
+
+        if node_type == "heading":
+            level = node.get("attrs", {}).get("level", 1)
+            level = min(max(level, 1), 3)
+            properties, _ = _paragraph_properties("heading", node, f"Heading {level}")
+            yield _paragraph_xml(properties, _runs_xml(_extract_inline_parts(node), footnotes))
+
+        elif node_type == "paragraph":
+            inline_parts = _extract_inline_parts(node)
+            if not inline_parts or all(
+                part.get("type") == "text" and part.get("text", "").strip() == ""
+                for part in inline_parts
+            ):
+                yield _EMPTY_PARAGRAPH
+                continue
+            properties, _ = _paragraph_properties("paragraph", node, "Normal")
+            runs = []
+            if preset.get("numbered_paragraphs"):
+                para_counter += 1
+                runs.append(_run_xml(_numbered_run_properties(preset), f"{para_counter}. "))
+            runs.extend(_runs_xml(inline_parts, footnotes))
+            yield _paragraph_xml(properties, runs)
+
+        elif node_type in {"bulletList", "orderedList"}:
+            fallback_style = _list_style(node, node_type == "bulletList")
+            for item in node.get("content", []):
+                for child in item.get("content", []):
+                    if child.get("type") != "paragraph":
+                        continue
+                    runs = _runs_xml(_extract_inline_parts(child), footnotes)
+                    properties, style_name = _paragraph_properties("list", child, fallback_style)
+                    list_styles.add(style_name)
+                    yield _paragraph_xml(properties, runs)
+
+        elif node_type == "blockquote":
+            for child in node.get("content", []):
+                if child.get("type") == "paragraph":
+                    properties, _ = _paragraph_properties("paragraph", child, "Normal", default_indent=True)
+                    yield _paragraph_xml(properties, _runs_xml(_extract_inline_parts(child), footnotes))
+
+        elif node_type == "pageBreak":
+            yield _PAGE_BREAK_PARAGRAPH
+
+        elif node_type != "hardBreak":
+            # Tables, rules and anything else rare enough to leave to python-docx.
+            yield _render_with_python_docx(skeleton, node, footnotes)
+
+    if footnotes:
+        yield _PAGE_BREAK_PARAGRAPH
+        yield _paragraph_xml(_footnote_heading_properties(), [_run_xml(b"", "Footnotes")])
+        marker_properties = _superscript_run_properties()
+        for footnote in footnotes:
+            yield _paragraph_xml(
+                b"",
+                [
+                    _run_xml(marker_properties, f"[{footnote['number']}] "),
+                    _run_xml(b"", footnote["text"]),
+                ],
+            )
+
+
+def _runs_xml(inline_parts, footnotes):
+    runs = []
+    for part in inline_parts:
+        part_type = part.get("type")
+        if part_type == "text":
+            runs.append(_run_xml(_text_run_properties(part.get("marks", {})), part.get("text", "")))
+        elif part_type == "hardBreak":
+            runs.append(_LINE_BREAK_RUN)
+        elif part_type == "footnoteReference":
+            number = _coerce_footnote_number(part.get("number"), len(footnotes) + 1)
+            runs.append(_run_xml(_superscript_run_properties(), f"[{number}]"))
+            _register_footnote(footnotes, number, part.get("text") or "")
+    return runs
+
+
+def _paragraph_xml(properties, runs):
+    if not properties and not runs:
+        return _EMPTY_PARAGRAPH
+    return b"<w:p>" + properties + b"".join(runs) + b"</w:p>"
+
+
+def _run_xml(properties, text):
+    body = _run_content_xml(text) if text else b""
+    if not properties and not body:
+        return b"<w:r/>"
+    return b"<w:r>" + properties + body + b"</w:r>"
+
+
+def _run_content_xml(text):
+    # Mirrors python-docx's run text setter: tabs become <w:tab/>, line ends <w:br/>.
+    text = _INVALID_XML_RE.sub("", text)
+    if "\t" not in text and "\r" not in text and "\n" not in text:
+        return _text_xml(text)
+    pieces = []
+    for piece in _RUN_SPECIAL_RE.split(text):
+        if piece == "\t":
+            pieces.append(b"<w:tab/>")
+        elif piece in {"\r", "\n"}:
+            pieces.append(b"<w:br/>")
+        elif piece:
+            pieces.append(_text_xml(piece))
+    return b"".join(pieces)
+
+
+def _text_xml(text):
+    if not text:
+        return b""
+    escaped = xml_escape(text).encode("utf-8")
+    if len(text.strip()) < len(text):
+        return b'<w:t xml:space="preserve">' + escaped + b"</w:t>"
+    return b"<w:t>" + escaped + b"</w:t>"
+
+
+def _paragraph_properties(kind, node, fallback_style, default_indent=False):
+    attrs = node.get("attrs") or {}
+    relevant = {key: attrs.get(key) for key in _PARAGRAPH_ATTR_KEYS}
+    key = ("paragraph", kind, fallback_style, default_indent, json.dumps(relevant, sort_keys=True, default=str))
+
+    def build(doc):
+        if kind == "heading":
+            paragraph = doc.add_paragraph(style=fallback_style if fallback_style in doc.styles else None)
+        elif kind == "list":
+            paragraph = doc.add_paragraph(style=fallback_style)
+        else:
+            paragraph = doc.add_paragraph()
+        _apply_paragraph_attrs(
+            paragraph,
+            doc,
+            {"attrs": relevant},
+            fallback_style=fallback_style,
+            default_indent=default_indent,
+        )
+        return _detach(paragraph._p, paragraph._p.pPr), paragraph.style.name
+
+    return _fragment(key, build)
+
+
+def _footnote_heading_properties():
+    def build(doc):
+        paragraph = doc.add_heading(level=2)
+        return _detach(paragraph._p, paragraph._p.pPr)
+
+    return _fragment(("footnote_heading",), build)
+
+
+def _text_run_properties(marks):
+    metrics = (marks.get("wordRun") or {}).get("run_metrics") or {}
+    flags = tuple(mark for mark in _RUN_MARKS if mark in marks)
+    key = ("run", json.dumps(metrics, sort_keys=True, default=str), flags)
+
+    def build(doc):
+        paragraph = doc.add_paragraph()
+        run = paragraph.add_run()
+        _apply_text_marks(run, {"wordRun": {"run_metrics": metrics}, **{flag: {} for flag in flags}})
+        return _detach(paragraph._p, run._r.rPr)
+
+    return _fragment(key, build)
+
+
+def _numbered_run_properties(preset):
+    def build(doc):
+        paragraph = doc.add_paragraph()
+        run = paragraph.add_run()
+        run.font.name = preset["font_name"]
+        run.font.size = Pt(preset["font_size"])
+        return _detach(paragraph._p, run._r.rPr)
+
+    return _fragment(("numbered", preset["font_name"], preset["font_size"]), build)
+
+
+def _superscript_run_properties():
+    def build(doc):
+        paragraph = doc.add_paragraph()
+        run = paragraph.add_run()
+        run.font.superscript = True
+        return _detach(paragraph._p, run._r.rPr)
+
+    return _fragment(("superscript",), build)
+
+
+def _list_style(list_node, bullet):
+    list_attrs = list_node.get("attrs") or {}
+    requested = (list_attrs.get("list_identity") or {}).get("style_name") or ""
+    return _fragment(
+        ("list_style", requested, bullet),
+        lambda doc: _list_fallback_style(doc, list_node, bullet),
+    )
+
+
+def _fragment(key, build):
+    global _SCRATCH
+    value = _FRAGMENTS.get(key)
+    if value is not None:
+        return value
+    with _LOCK:
+        value = _FRAGMENTS.get(key)
+        if value is None:
+            if _SCRATCH is None:
+                _SCRATCH = DocxDocument()
+            value = build(_SCRATCH)
+            if len(_FRAGMENTS) >= _FRAGMENT_CACHE_SIZE:
+                _FRAGMENTS.clear()
+            _FRAGMENTS[key] = value
+    return value
+
+
+def _detach(block, element):
+    """Serialize ``element`` as it appears inside document.xml, then drop ``block`` from the scratch body."""
+    xml = _element_xml(element) if element is not None else b""
+    block.getparent().remove(block)
+    return xml
+
+
+def _element_xml(element):
+    # Namespaces are declared once on <w:document>; strip the copies lxml adds
+    # to a serialized subtree so the fragment matches in-document output.
+    xml = etree.tostring(element, encoding="UTF-8", with_tail=False)
+    if xml.startswith(b"<?xml"):
+        xml = xml[xml.index(b"?>") + 2 :].lstrip()
+    end = xml.index(b">")
+    return _XMLNS_RE.sub(b"", xml[:end]) + xml[end:]
+
+
+def _render_with_python_docx(skeleton, node, footnotes):
+    with _LOCK:
+        doc = skeleton["doc"]
+        body = doc.element.body
+        start = len(body) - 1
+        _process_node(doc, node, skeleton["preset"], [0], footnotes)
+        added = list(body)[start:-1]
+        xml = b"".join(_element_xml(element) for element in added)
+        for element in added:
+            body.remove(element)
+    return xml
+
+
+def _styles_with_list_fonts(skeleton, list_styles):
+    # python-docx applies the preset font to each list style it touches.
+    key = ("styles", skeleton["key"], tuple(sorted(list_styles)))
+
+    def build(_scratch):
+        doc = copy.deepcopy(skeleton["doc"])
+        preset = skeleton["preset"]
+        for style_name in sorted(list_styles):
+            style = doc.styles[style_name]
+            style.font.name = preset["font_name"]
+            style.font.size = Pt(preset["font_size"])
+        return _package_parts(doc)[_STYLES_PART]
+
+    return _fragment(key, build)
+
+
+def _skeleton(export_format, document_metadata):
+    preset = FORMAT_PRESETS.get(export_format, FORMAT_PRESETS["court_brief"])
+    page_setup = (document_metadata or {}).get("page_setup") or {}
+    key = (export_format if export_format in FORMAT_PRESETS else "court_brief", json.dumps(page_setup, sort_keys=True))
+    with _LOCK:
+        skeleton = _SKELETONS.get(key)
+        if skeleton is not None:
+            _SKELETONS.move_to_end(key)
+            return skeleton
+
+        doc = DocxDocument()
+        _configure_generated_docx(doc, preset, {"page_setup": page_setup})
+        parts = _package_parts(doc)
+        document_xml = parts[_DOCUMENT_PART]
+        split_at = document_xml.rindex(b"<w:sectPr")
+        skeleton = {
+            "key": key,
+            "preset": preset,
+            "doc": doc,
+            "parts": list(parts.items()),
+            "document_head": document_xml[:split_at],
+            "document_tail": document_xml[split_at:],
+        }
+        _SKELETONS[key] = skeleton
+        while len(_SKELETONS) > _SKELETON_CACHE_SIZE:
+            _SKELETONS.popitem(last=False)
+        return skeleton
+
+
+def _package_parts(doc):
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as archive:
+        return OrderedDict((name, archive.read(name)) for name in archive.namelist())
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .models import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_CACHE_SIZE = max(0, int(os.environ.get("EMBEDDING_CACHE_SIZE", "512")))
+# The database tier survives restarts and is shared by every web/worker process.
+EMBEDDING_CACHE_PERSIST = os.environ.get("EMBEDDING_CACHE_PERSIST", "true").strip().lower() not in {"0", "false", "no"}
+EMBEDDING_CACHE_MAX_ROWS = max(0, int(os.environ.get("EMBEDDING_CACHE_MAX_ROWS", "50000")))
+
+_PRUNE_EVERY_WRITES = 200
+_TOUCH_AFTER = timedelta(days=1)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_MEMORY_CACHE = OrderedDict()
+_MEMORY_LOCK = threading.Lock()
+_STATS = Counter()
+_CLIENT = None
+_CLIENT_KEY = ""
+_CLIENT_LOCK = threading.Lock()
+
+
+class EmbeddingUnavailableError(ValueError):
+    pass
+
+
+def normalize_embedding_text(text):
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def embedding_cache_key(text, model=None):
+    normalized = normalize_embedding_text(text)
+    return hashlib.sha256(f"{model or EMBEDDING_MODEL}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def embed_text(text, *, model=None, required=False, cache=True):
+    """Embedding for ``text``, served from the memory or database cache when possible.
+
+    Returns an empty list when the text is blank or, unless ``required``, when no
+    OpenAI key is configured. Pass ``cache=False`` for one-off document bodies so
+    they do not evict the repeat queries the cache exists for.
+    """
+    model = model or EMBEDDING_MODEL
+    normalized = normalize_embedding_text(text)
+    if not normalized:
+        return []
+
+    if not cache:
+        client = _embedding_client()
+        if client is None:
+            if required:
+                raise EmbeddingUnavailableError("OPENAI_API_KEY is not configured")
+            return []
+        _count("uncached")
+        return _create_embedding(client, model, normalized)
+
+    key = embedding_cache_key(normalized, model)
+    vector = _memory_get(key)
+    if vector is not None:
+        _count("memory_hits")
+        return list(vector)
+
+    vector = _database_get(key)
+    if vector is not None:
+        _count("database_hits")
+        _memory_put(key, vector)
+        return list(vector)
+
+    client = _embedding_client()
+    if client is None:
+        if required:
+            raise EmbeddingUnavailableError("OPENAI_API_KEY is not configured")
+        return []
+
+    _count("misses")
+    vector = _create_embedding(client, model, normalized)
+    _memory_put(key, vector)
+    _database_put(key, model, vector)
+    return list(vector)
+
+
+def embedding_cache_stats():
+    with _MEMORY_LOCK:
+        stats = dict(_STATS)
+        stats["memory_entries"] = len(_MEMORY_CACHE)
+    lookups = stats.get("memory_hits", 0) + stats.get("database_hits", 0) + stats.get("misses", 0)
+    stats["hit_rate"] = round((lookups - stats.get("misses", 0)) / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def clear_embedding_cache(*, persistent=False):
+    with _MEMORY_LOCK:
+        _MEMORY_CACHE.clear()
+        _STATS.clear()
+    if persistent:
+        EmbeddingCacheEntry.objects.all().delete()
+
+
+def prune_embedding_cache(max_rows=None):
+    max_rows = EMBEDDING_CACHE_MAX_ROWS if max_rows is None else max_rows
+    if not max_rows:
+        return 0
+    stale_ids = list(
+        EmbeddingCacheEntry.objects.order_by("-last_used_at", "-id").values_list("id", flat=True)[max_rows:]
+    )
+    if not stale_ids:
+        return 0
+    deleted, _ = EmbeddingCacheEntry.objects.filter(id__in=stale_ids).delete()
+    return deleted
+
+
+def _embedding_client():
+    # One client per process keeps the HTTP connection pool warm across requests.
+    global _CLIENT, _CLIENT_KEY
+    api_key = os.environ.get("OPENAI_API_KEY", "").strip()
+    if not api_key:
+        return None
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT_KEY != api_key:
+            from openai import OpenAI
+
+            _CLIENT = OpenAI(api_key=api_key)
+            _CLIENT_KEY = api_key
+        return _CLIENT
+
+
+def _create_embedding(client, model, text):
+    try:
+        resp = client.embeddings.create(model=model, input=text)
+    except Exception:
+        _count("errors")
+        raise
+    return list(resp.data[0].embedding)
+
+
+def _count(name):
+    with _MEMORY_LOCK:
+        _STATS[name] += 1
+
+
+def _memory_get(key):
+    with _MEMORY_LOCK:
+        vector = _MEMORY_CACHE.get(key)
+        if vector is not None:
+            _MEMORY_CACHE.move_to_end(key)
+        return vector
+
+
+def _memory_put(key, vector):
+    if not EMBEDDING_CACHE_SIZE:
+        return
+    with _MEMORY_LOCK:
+        _MEMORY_CACHE[key] = tuple(vector)
+        _MEMORY_CACHE.move_to_end(key)
+        while len(_MEMORY_CACHE) > EMBEDDING_CACHE_SIZE:
+            _MEMORY_CACHE.popitem(last=False)
+
+
+def _database_get(key):
+    if not EMBEDDING_CACHE_PERSIST:
+        return None
+    try:
+        entry = EmbeddingCacheEntry.objects.filter(key=key).only("id", "vector", "last_used_at").first()
+        if entry is None:
+            return None
+        now = timezone.now()
+        if now - entry.last_used_at > _TOUCH_AFTER:
+            EmbeddingCacheEntry.objects.filter(id=entry.id).update(last_used_at=now)
+    except DatabaseError:
+        logger.exception("Unable to read the embedding cache")
+        return None
+    return entry.vector if isinstance(entry.vector, list) and entry.vector else None
+
+
+def _database_put(key, model, vector):
+    if not EMBEDDING_CACHE_PERSIST:
+        return
+    try:
+        with transaction.atomic():
+            EmbeddingCacheEntry.objects.create(key=key, model=model, dimensions=len(vector), vector=vector)
+    except IntegrityError:
+        # Another process embedded the same text first.
+        return
+    except DatabaseError:
+        logger.exception("Unable to write the embedding cache")
+        return
+    with _MEMORY_LOCK:
+        _STATS["database_writes"] += 1
+        due = _STATS["database_writes"] % _PRUNE_EVERY_WRITES == 0
+    if due:
+        prune_embedding_cache()
@@ -1,8 +1,14 @@
-import os
 import math
+import threading
+from bisect import bisect_right
+from collections import Counter
 from pathlib import Path
 
-EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+import numpy as np
+from django.db.models import Count, Max
+from django.db.models.functions import Substr
+
+from .embedding_service import embed_text
 
 
 def extract_text_from_file(file_path):
@@ -36,19 +42,12 @@ def _extract_docx_text(file_path):
 
 
 def generate_embedding(text):
-    text = (text or "").strip()
-    if not text:
-        return []
+    return embed_text((text or "").strip()[:12000])
 
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return []
 
-    from openai import OpenAI
-
-    client = OpenAI(api_key=api_key)
-    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=text[:12000])
-    return list(resp.data[0].embedding)
+def generate_document_embedding(text):
+    """Embedding for an ingested file; skips the cache meant for repeat search queries."""
+    return embed_text((text or "").strip()[:12000], cache=False)
 
 
 def cosine_similarity(a, b):
@@ -96,3 +95,176 @@ def rank_exemplars(query, exemplars):
 
     exemplars.sort(key=lambda x: (x["score"], x.get("updated_at") or ""), reverse=True)
     return exemplars
+
+
+_EXEMPLAR_TEXT_PREFIX_CHARS = 1000
+_EXEMPLAR_INDEXES = {}
+_EXEMPLAR_INDEX_LOCK = threading.Lock()
+
+
+class ExemplarVectorIndex:
+    """L2-normalized exemplar embeddings for one user, held as a float32 matrix.
+
+    Rows follow the default ``-updated_at`` ordering, so a stable sort on score
+    reproduces the ``(score, updated_at)`` ordering of ``rank_exemplars``.
+    """
+
+    def __init__(self, *, stamp, ids, titles, texts, embeddings):
+        self.stamp = stamp
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.positions = {exemplar_id: position for position, exemplar_id in enumerate(ids)}
+        self.dimensions = _dominant_dimensions(embeddings)
+        self.matrix = np.zeros((len(ids), self.dimensions), dtype=np.float32)
+        for position, embedding in enumerate(embeddings):
+            if embedding and len(embedding) == self.dimensions:
+                self.matrix[position] = embedding
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        np.divide(self.matrix, norms, out=self.matrix, where=norms > 0)
+        self._titles, self._title_offsets = _joined_haystack(titles)
+        self._texts, self._text_offsets = _joined_haystack(texts)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query, *, query_embedding=None, candidate_ids=None, limit=30):
+        if candidate_ids is None:
+            candidates = np.arange(len(self.ids))
+        else:
+            candidates = np.fromiter(
+                (self.positions[exemplar_id] for exemplar_id in candidate_ids if exemplar_id in self.positions),
+                dtype=np.int64,
+            )
+            candidates.sort()
+        if not candidates.size or limit <= 0:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float64)
+        lowered = (query or "").strip().lower().replace("\x00", " ")
+        if lowered:
+            vector = _normalized_vector(query_embedding, self.dimensions)
+            if vector is not None:
+                scores = (self.matrix @ vector).astype(np.float64)
+            scores[_substring_hits(self._titles, self._title_offsets, lowered)] += 0.25
+            scores[_substring_hits(self._texts, self._text_offsets, lowered)] += 0.15
+
+        candidate_scores = scores[candidates]
+        if limit < candidates.size:
+            kth = np.partition(candidate_scores, candidates.size - limit)[candidates.size - limit]
+            above = np.flatnonzero(candidate_scores > kth)
+            ties = np.flatnonzero(candidate_scores == kth)[: limit - above.size]
+            selected = np.concatenate([above, ties])
+        else:
+            selected = np.arange(candidates.size)
+        selected = selected[np.lexsort((selected, -candidate_scores[selected]))]
+        return [
+            (int(self.ids[candidates[index]]), float(candidate_scores[index]))
+            for index in selected
+        ]
+
+
+def _dominant_dimensions(embeddings):
+    counts = Counter(len(embedding) for embedding in embeddings if embedding)
+    if not counts:
+        return 0
+    return counts.most_common(1)[0][0]
+
+
+def _normalized_vector(embedding, dimensions):
+    if not embedding or not dimensions or len(embedding) != dimensions:
+        return None
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+def _joined_haystack(values):
+    offsets = []
+    parts = []
+    position = 0
+    for value in values:
+        offsets.append(position)
+        lowered = (value or "").lower().replace("\x00", " ")
+        parts.append(lowered)
+        position += len(lowered) + 1
+    return "\x00".join(parts), offsets
+
+
+def _substring_hits(haystack, offsets, needle):
+    hits = []
+    start = haystack.find(needle)
+    while start != -1:
+        row = bisect_right(offsets, start) - 1
+        hits.append(row)
+        if row + 1 >= len(offsets):
+            break
+        start = haystack.find(needle, offsets[row + 1])
+    return np.asarray(hits, dtype=np.int64)
+
+
+def _exemplar_index_stamp(user_id):
+    from .models import Exemplar
+
+    stamp = Exemplar.objects.filter(created_by_id=user_id).aggregate(
+        count=Count("id"),
+        latest=Max("updated_at"),
+    )
+    return (stamp["count"], stamp["latest"])
+
+
+def get_exemplar_index(user):
+    user_id = getattr(user, "id", user)
+    stamp = _exemplar_index_stamp(user_id)
+    with _EXEMPLAR_INDEX_LOCK:
+        index = _EXEMPLAR_INDEXES.get(user_id)
+    if index is not None and index.stamp == stamp:
+        return index
+
+    from .models import Exemplar
+
+    rows = Exemplar.objects.filter(created_by_id=user_id).order_by("-updated_at", "-id").values_list(
+        "id",
+        "title",
+        "embedding",
+        Substr("extracted_text", 1, _EXEMPLAR_TEXT_PREFIX_CHARS),
+    )
+    ids, titles, embeddings, texts = [], [], [], []
+    for exemplar_id, title, embedding, text in rows:
+        ids.append(exemplar_id)
+        titles.append(title)
+        embeddings.append(embedding if isinstance(embedding, list) else [])
+        texts.append(text)
+    index = ExemplarVectorIndex(stamp=stamp, ids=ids, titles=titles, texts=texts, embeddings=embeddings)
+    with _EXEMPLAR_INDEX_LOCK:
+        _EXEMPLAR_INDEXES[user_id] = index
+    return index
+
+
+def invalidate_exemplar_index(user_id=None):
+    with _EXEMPLAR_INDEX_LOCK:
+        if user_id is None:
+            _EXEMPLAR_INDEXES.clear()
+        else:
+            _EXEMPLAR_INDEXES.pop(user_id, None)
+
+
+def search_exemplars(user, query, *, queryset=None, limit=30):
+    """Return ``(exemplar_id, score)`` pairs for the user's best-matching exemplars.
+
+    ``queryset`` narrows the candidates (filters are applied in the database and
+    only ids are read); ranking itself runs against the cached index.
+    """
+    index = get_exemplar_index(user)
+    if not len(index):
+        return []
+    candidate_ids = None
+    if queryset is not None:
+        candidate_ids = list(queryset.values_list("id", flat=True))
+    query = (query or "").strip()
+    query_embedding = generate_embedding(query) if query and index.dimensions else []
+    return index.search(query, query_embedding=query_embedding, candidate_ids=candidate_ids, limit=limit)
+
+
+def _invalidate_exemplar_index_for_instance(sender, instance, **kwargs):
+    invalidate_exemplar_index(instance.created_by_id)
@@ -2,18 +2,18 @@ import json
 from pathlib import Path
 
 from django.contrib.auth.decorators import login_required
-from django.core.files import File
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views.decorators.http import require_GET, require_POST
 
 from .document_schema import normalize_document_content, normalize_document_metadata
-from .exemplar_service import extract_text_from_file, generate_embedding, rank_exemplars
-from .import_service import import_docx_package
-from .models import Document, DocumentType, DocumentVersion, Exemplar
+from .exemplar_service import search_exemplars
+from .import_service import import_docx_package_cached
+from .ingestion_service import enqueue_exemplar_ingestion, ingestion_state
+from .models import Document, DocumentType, Exemplar
 from .proof_service import ProofRenderError, render_exemplar_preview
-from .style_anchor_service import extract_style_anchor_structure
+from .version_store import create_version
 
 
 def _serialize_exemplar(exemplar):
@@ -35,6 +35,7 @@ def _serialize_exemplar(exemplar):
         "file_url": exemplar.original_file.url if exemplar.original_file else "",
         "filename": Path(exemplar.original_file.name).name if exemplar.original_file else "",
         "snippet": text[:500],
+        "ingestion": ingestion_state(exemplar.metadata),
         "updated_at": exemplar.updated_at.isoformat(),
         "preview_url": reverse("exemplar_preview", kwargs={"exemplar_id": exemplar.id}),
         "open_as_draft_url": reverse("exemplar_open_as_draft", kwargs={"exemplar_id": exemplar.id}),
@@ -90,19 +91,8 @@ def exemplar_upload(request):
             style_family=style_family,
         ).exclude(id=exemplar.id).update(is_default=False)
 
-    extracted_text = extract_text_from_file(exemplar.original_file.path)
-    embedding = generate_embedding(extracted_text[:12000]) if extracted_text else []
-    if kind == "style_anchor" and exemplar.original_file.name.lower().endswith(".docx"):
-        exemplar.metadata = {
-            **(exemplar.metadata or {}),
-            "style_anchor_structure": extract_style_anchor_structure(exemplar.original_file.path),
-        }
-
-    exemplar.extracted_text = extracted_text
-    exemplar.embedding = embedding
-    exemplar.save(update_fields=["extracted_text", "embedding", "metadata", "updated_at"])
-
-    return JsonResponse({"exemplar": _serialize_exemplar(exemplar)})
+    enqueue_exemplar_ingestion(exemplar)
+    return JsonResponse({"exemplar": _serialize_exemplar(exemplar)}, status=202)
 
 
 @login_required
@@ -124,9 +114,8 @@ def exemplar_search(request):
     if style_family:
         qs = qs.filter(style_family=style_family)
 
-    exemplars = [_serialize_exemplar(ex) for ex in qs[:200]]
-    ranked = rank_exemplars(query, exemplars)
-    return JsonResponse({"results": ranked[:30]})
+    ranked = search_exemplars(request.user, query, queryset=qs, limit=30)
+    return JsonResponse({"results": _serialize_ranked_exemplars(ranked)})
 
 
 @login_required
@@ -159,7 +148,7 @@ def exemplar_open_as_draft(request, exemplar_id):
 
     if suffix == ".docx":
         with exemplar.original_file.open("rb") as handle:
-            package = import_docx_package(handle)
+            package, docx_import = import_docx_package_cached(handle)
         content = package["content"]
         metadata = normalize_document_metadata(
             package.get("metadata"),
@@ -193,14 +182,9 @@ def exemplar_open_as_draft(request, exemplar_id):
         created_by=request.user,
     )
     if suffix == ".docx":
-        with exemplar.original_file.open("rb") as handle:
-            document.source_docx.save(Path(exemplar.original_file.name).name, File(handle), save=False)
+        document.source_docx.name = docx_import.source_docx.name
     document.save()
-    DocumentVersion.objects.create(
-        document=document,
-        content=document.content,
-        label="Opened from exemplar",
-    )
+    create_version(document, document.content, label="Opened from exemplar")
     return JsonResponse(
         {
             "status": "ok",
@@ -215,16 +199,26 @@ def exemplar_open_as_draft(request, exemplar_id):
 def exemplar_suggest_for_document(request, doc_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
     qs = Exemplar.objects.filter(created_by=request.user)
-    if doc.document_type_id:
+    if doc.document_type_id and qs.filter(document_type_id=doc.document_type_id).exists():
         qs = qs.filter(document_type_id=doc.document_type_id)
-    exemplars = [_serialize_exemplar(ex) for ex in qs[:200]]
-    if not exemplars and doc.document_type_id:
-        qs = Exemplar.objects.filter(created_by=request.user)[:200]
-        exemplars = [_serialize_exemplar(ex) for ex in qs]
 
     query_text = f"{doc.title}\n{json.dumps(doc.content)[:2000]}"
-    ranked = rank_exemplars(query_text, exemplars)
-    return JsonResponse({"results": ranked[:10]})
+    ranked = search_exemplars(request.user, query_text, queryset=qs, limit=10)
+    return JsonResponse({"results": _serialize_ranked_exemplars(ranked)})
+
+
+def _serialize_ranked_exemplars(ranked):
+    exemplars = Exemplar.objects.filter(id__in=[exemplar_id for exemplar_id, _ in ranked]).select_related("document_type")
+    by_id = {exemplar.id: exemplar for exemplar in exemplars}
+    results = []
+    for exemplar_id, score in ranked:
+        exemplar = by_id.get(exemplar_id)
+        if not exemplar:
+            continue
+        payload = _serialize_exemplar(exemplar)
+        payload["score"] = score
+        results.append(payload)
+    return results
 
 
 def _text_to_document(text):
@@ -5,8 +5,12 @@ Walks the Tiptap JSON document tree and maps nodes to python-docx elements.
 Supports format presets for legal documents (court briefs, cover letters, declarations).
 """
 
+from collections import OrderedDict
 import io
+import json
+import os
 import re
+import threading
 from html import escape
 
 from docx import Document as DocxDocument
@@ -16,6 +20,10 @@ from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 
+from .document_schema import content_fingerprint
+from .render_pool import PDF_RENDER_TIMEOUT_SECONDS, get_render_pool, render_html_to_pdf
+from .style_anchor_service import load_parsed_style_anchor
+
 
 FORMAT_PRESETS = {
     "court_brief": {
@@ -42,6 +50,11 @@ FORMAT_PRESETS = {
     },
 }
 
+PDF_EXPORT_CACHE_SIZE = max(0, int(os.environ.get("PDF_EXPORT_CACHE_SIZE", "16")))
+
+_PDF_EXPORT_CACHE = OrderedDict()
+_PDF_EXPORT_LOCK = threading.Lock()
+
 DATE_PATTERN = re.compile(r"^\s*(\[[Dd]ate\]|[A-Z][a-z]+ \d{1,2}, \d{4}|\d{1,2}/\d{1,2}/\d{2,4})")
 
 
@@ -107,39 +120,7 @@ def _tiptap_to_docx_generic(
     if template_path:
         _clear_document_body(doc)
     else:
-        # Set margins
-        for section in doc.sections:
-            section.top_margin = Inches(preset["margin_inches"])
-            section.bottom_margin = Inches(preset["margin_inches"])
-            section.left_margin = Inches(preset["margin_inches"])
-            section.right_margin = Inches(preset["margin_inches"])
-        _apply_document_page_setup(doc, document_metadata or {})
-
-        # Configure default style
-        style = doc.styles["Normal"]
-        font = style.font
-        font.name = preset["font_name"]
-        font.size = Pt(preset["font_size"])
-        pf = style.paragraph_format
-        pf.line_spacing_rule = preset["line_spacing"]
-        pf.space_after = Pt(0)
-        pf.space_before = Pt(0)
-
-        # Configure heading styles
-        for level in range(1, 4):
-            style_name = f"Heading {level}"
-            if style_name in doc.styles:
-                hs = doc.styles[style_name]
-                hs.font.name = preset["font_name"]
-                hs.font.bold = True
-                if level == 1:
-                    hs.font.size = Pt(14)
-                elif level == 2:
-                    hs.font.size = Pt(13)
-                else:
-                    hs.font.size = Pt(12)
-                hs.paragraph_format.space_before = Pt(12)
-                hs.paragraph_format.space_after = Pt(6)
+        _configure_generated_docx(doc, preset, document_metadata)
 
     content = tiptap_json.get("content", []) if isinstance(tiptap_json, dict) else []
     para_counter = [0]  # mutable counter for numbered paragraphs
@@ -171,12 +152,51 @@ def _tiptap_to_docx_generic(
     return buffer
 
 
-def _tiptap_to_cover_letter_docx(*, tiptap_json, title, style_anchor):
-    template_doc = DocxDocument(style_anchor.path)
-    sample_doc = DocxDocument(style_anchor.path)
-    _clear_document_body(template_doc)
+def _configure_generated_docx(doc, preset, document_metadata=None):
+    """Page setup and Normal/Heading styles for a document generated without a template."""
+    # Set margins
+    for section in doc.sections:
+        section.top_margin = Inches(preset["margin_inches"])
+        section.bottom_margin = Inches(preset["margin_inches"])
+        section.left_margin = Inches(preset["margin_inches"])
+        section.right_margin = Inches(preset["margin_inches"])
+    _apply_document_page_setup(doc, document_metadata or {})
+
+    # Configure default style
+    style = doc.styles["Normal"]
+    font = style.font
+    font.name = preset["font_name"]
+    font.size = Pt(preset["font_size"])
+    pf = style.paragraph_format
+    pf.line_spacing_rule = preset["line_spacing"]
+    pf.space_after = Pt(0)
+    pf.space_before = Pt(0)
+
+    # Configure heading styles
+    for level in range(1, 4):
+        style_name = f"Heading {level}"
+        if style_name in doc.styles:
+            hs = doc.styles[style_name]
+            hs.font.name = preset["font_name"]
+            hs.font.bold = True
+            if level == 1:
+                hs.font.size = Pt(14)
+            elif level == 2:
+                hs.font.size = Pt(13)
+            else:
+                hs.font.size = Pt(12)
+            hs.paragraph_format.space_before = Pt(12)
+            hs.paragraph_format.space_after = Pt(6)
 
-    samples = _cover_letter_samples(sample_doc, style_anchor.metadata.get("style_anchor_structure") or {})
+
+def _tiptap_to_cover_letter_docx(*, tiptap_json, title, style_anchor):
+    parsed = load_parsed_style_anchor(style_anchor.path, version=getattr(style_anchor, "version", ""))
+    template_doc = parsed.new_document()
+    structure = style_anchor.metadata.get("style_anchor_structure") or {}
+    samples = parsed.memoize(
+        ("cover_letter_samples", json.dumps(structure, sort_keys=True)),
+        lambda: _cover_letter_samples(parsed.sample_doc, structure),
+    )
     content = tiptap_json.get("content", []) if isinstance(tiptap_json, dict) else []
 
     for paragraph in samples["letterhead"]:
@@ -539,20 +559,7 @@ def _apply_inline_parts_with_sample(paragraph, inline_parts, sample_run):
         if part_type == "text":
             run = paragraph.add_run(part.get("text", ""))
             _copy_run_style(run, sample_run)
-            marks = part.get("marks", {})
-            _apply_run_metrics(run, (marks.get("wordRun") or {}).get("run_metrics") or {})
-            if "bold" in marks:
-                run.bold = True
-            if "italic" in marks:
-                run.italic = True
-            if "underline" in marks:
-                run.underline = True
-            if "strike" in marks:
-                run.font.strike = True
-            if "superscript" in marks:
-                run.font.superscript = True
-            if "subscript" in marks:
-                run.font.subscript = True
+            _apply_text_marks(run, part.get("marks", {}))
         elif part_type == "hardBreak":
             paragraph.add_run().add_break(WD_BREAK.LINE)
 
@@ -902,15 +909,7 @@ def _process_node(doc, node, preset, para_counter, footnotes, *, preserve_templa
 
 def _process_list_item(doc, item, list_node, preset, footnotes, bullet=True, number=None, preserve_template_styles=False):
     """Process a list item node."""
-    list_attrs = (list_node.get("attrs") or {}) if isinstance(list_node, dict) else {}
-    fallback_style = (
-        ((list_attrs.get("list_identity") or {}).get("style_name") or "")
-        or ("List Bullet" if bullet else "List Number")
-    )
-    try:
-        doc.styles[fallback_style]
-    except KeyError:
-        fallback_style = "List Bullet" if bullet else "List Number"
+    fallback_style = _list_fallback_style(doc, list_node, bullet)
     for child in item.get("content", []):
         if child.get("type") == "paragraph":
             inline_parts = _extract_inline_parts(child)
@@ -927,6 +926,19 @@ def _process_list_item(doc, item, list_node, preset, footnotes, bullet=True, num
                 p.style.font.size = Pt(preset["font_size"])
 
 
+def _list_fallback_style(doc, list_node, bullet):
+    list_attrs = (list_node.get("attrs") or {}) if isinstance(list_node, dict) else {}
+    fallback_style = (
+        ((list_attrs.get("list_identity") or {}).get("style_name") or "")
+        or ("List Bullet" if bullet else "List Number")
+    )
+    try:
+        doc.styles[fallback_style]
+    except KeyError:
+        fallback_style = "List Bullet" if bullet else "List Number"
+    return fallback_style
+
+
 def _process_table(doc, node, preset, footnotes, preserve_template_styles=False):
     """Process a table node."""
     rows_data = node.get("content", [])
@@ -1006,20 +1018,7 @@ def _apply_text_parts(paragraph, inline_parts, footnotes):
         part_type = part.get("type")
         if part_type == "text":
             run = paragraph.add_run(part.get("text", ""))
-            marks = part.get("marks", {})
-            _apply_run_metrics(run, (marks.get("wordRun") or {}).get("run_metrics") or {})
-            if "bold" in marks:
-                run.bold = True
-            if "italic" in marks:
-                run.italic = True
-            if "underline" in marks:
-                run.underline = True
-            if "strike" in marks:
-                run.font.strike = True
-            if "superscript" in marks:
-                run.font.superscript = True
-            if "subscript" in marks:
-                run.font.subscript = True
+            _apply_text_marks(run, part.get("marks", {}))
         elif part_type == "hardBreak":
             paragraph.add_run().add_break(WD_BREAK.LINE)
         elif part_type == "footnoteReference":
@@ -1029,6 +1028,22 @@ def _apply_text_parts(paragraph, inline_parts, footnotes):
             _register_footnote(footnotes, number, part.get("text") or "")
 
 
+def _apply_text_marks(run, marks):
+    _apply_run_metrics(run, (marks.get("wordRun") or {}).get("run_metrics") or {})
+    if "bold" in marks:
+        run.bold = True
+    if "italic" in marks:
+        run.italic = True
+    if "underline" in marks:
+        run.underline = True
+    if "strike" in marks:
+        run.font.strike = True
+    if "superscript" in marks:
+        run.font.superscript = True
+    if "subscript" in marks:
+        run.font.subscript = True
+
+
 def _register_footnote(footnotes, number, text):
     number = _coerce_footnote_number(number, len(footnotes) + 1)
     for item in footnotes:
@@ -1088,20 +1103,33 @@ def _render_footnotes_html(footnotes):
     )
 
 
-def tiptap_to_pdf(tiptap_json, title="Document", export_format="court_brief"):
-    """Convert Tiptap JSON content to PDF using WeasyPrint."""
-    try:
-        from weasyprint import HTML
-    except ImportError as exc:
-        raise RuntimeError(
-            "PDF export requires WeasyPrint. Install with: pip install weasyprint"
-        ) from exc
+def tiptap_to_pdf(tiptap_json, title="Document", export_format="court_brief", *, content_digest=""):
+    """Convert Tiptap JSON content to PDF using WeasyPrint on the render worker pool.
+
+    PDFs are reused per (export format, title, content digest). Pass the saved
+    ``Document.content_digest`` to skip fingerprinting the content again.
+    """
+    cache_key = (export_format, title, content_digest or content_fingerprint(tiptap_json)[0])
+    with _PDF_EXPORT_LOCK:
+        pdf_bytes = _PDF_EXPORT_CACHE.get(cache_key)
+        if pdf_bytes is not None:
+            _PDF_EXPORT_CACHE.move_to_end(cache_key)
+            return io.BytesIO(pdf_bytes)
 
     html = tiptap_to_html(tiptap_json, title=title, export_format=export_format)
-    buffer = io.BytesIO()
-    HTML(string=html).write_pdf(target=buffer)
-    buffer.seek(0)
-    return buffer
+    pdf_bytes = get_render_pool().run(render_html_to_pdf, html, timeout=PDF_RENDER_TIMEOUT_SECONDS)
+    if PDF_EXPORT_CACHE_SIZE:
+        with _PDF_EXPORT_LOCK:
+            _PDF_EXPORT_CACHE[cache_key] = pdf_bytes
+            _PDF_EXPORT_CACHE.move_to_end(cache_key)
+            while len(_PDF_EXPORT_CACHE) > PDF_EXPORT_CACHE_SIZE:
+                _PDF_EXPORT_CACHE.popitem(last=False)
+    return io.BytesIO(pdf_bytes)
+
+
+def clear_pdf_export_cache():
+    with _PDF_EXPORT_LOCK:
+        _PDF_EXPORT_CACHE.clear()
 
 
 def tiptap_to_html(tiptap_json, title="Document", export_format="court_brief"):
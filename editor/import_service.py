@@ -1,5 +1,9 @@
+import copy
+import hashlib
+import io
 import re
 from collections.abc import Iterable
+from pathlib import Path
 
 from docx import Document as DocxDocument
 from docx.document import Document as DocxDocumentType
@@ -11,8 +15,14 @@ from docx.oxml.table import CT_Tbl
 from docx.oxml.text.paragraph import CT_P
 from docx.table import Table
 from docx.text.paragraph import Paragraph
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
 
-from .document_schema import normalize_document_content, normalize_document_metadata
+from .document_schema import new_block_id, normalize_document_content, normalize_document_metadata
+from .models import DocxImport
+
+# Bump when import_docx_package output changes so cached packages are re-parsed.
+DOCX_IMPORT_VERSION = 1
 
 
 _HEADING_STYLE_RE = re.compile(r"heading\s+(\d+)", re.IGNORECASE)
@@ -25,6 +35,68 @@ def import_docx_to_tiptap(source) -> dict:
     return package["content"]
 
 
+def import_docx_package_cached(source) -> tuple[dict, DocxImport]:
+    """Import package for ``source``, parsed once per distinct DOCX bytes.
+
+    Returns the package (with fresh block ids) and the ``DocxImport`` whose
+    ``source_docx`` is the one stored copy of those bytes, for documents to share.
+    """
+    data = source.read() if hasattr(source, "read") else Path(source).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    entry = DocxImport.objects.filter(sha256=digest).first()
+    if entry is None or entry.import_version != DOCX_IMPORT_VERSION:
+        package = import_docx_package(io.BytesIO(data))
+        if entry is None:
+            entry = _create_docx_import(digest, package, len(data))
+        else:
+            entry.package = package
+            entry.import_version = DOCX_IMPORT_VERSION
+            entry.save(update_fields=["package", "import_version", "last_used_at"])
+    else:
+        entry.save(update_fields=["last_used_at"])
+
+    if not entry.source_docx or not entry.source_docx.storage.exists(entry.source_docx.name):
+        entry.source_docx.name = _store_source_docx(entry, data)
+        entry.save(update_fields=["source_docx", "last_used_at"])
+    return _with_fresh_block_ids(entry.package), entry
+
+
+def _store_source_docx(entry: DocxImport, data: bytes) -> str:
+    storage = entry.source_docx.storage
+    name = entry.source_docx.field.generate_filename(entry, f"{entry.sha256}.docx")
+    # The name is the content hash, so a file already stored there holds these bytes.
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            # A concurrent first import stored the same bytes in between; keep one copy.
+            storage.delete(saved)
+    return name
+
+
+def _create_docx_import(digest: str, package: dict, size: int) -> DocxImport:
+    try:
+        with transaction.atomic():
+            return DocxImport.objects.create(
+                sha256=digest,
+                import_version=DOCX_IMPORT_VERSION,
+                package=package,
+                size=size,
+            )
+    except IntegrityError:
+        # Another request imported the same bytes first.
+        return DocxImport.objects.get(sha256=digest)
+
+
+def _with_fresh_block_ids(package: dict) -> dict:
+    package = copy.deepcopy(package)
+    for node in (package.get("content") or {}).get("content", []):
+        attrs = node.get("attrs") if isinstance(node, dict) else None
+        if isinstance(attrs, dict) and "block_id" in attrs:
+            attrs["block_id"] = new_block_id()
+    return package
+
+
 def import_docx_package(source) -> dict:
     doc = DocxDocument(source)
     content: list[dict] = []
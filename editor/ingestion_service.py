@@ -0,0 +1,218 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .exemplar_service import extract_text_from_file, generate_document_embedding
+from .models import IngestionJob
+from .openai_file_service import build_client_file_warning, sync_client_file_openai_index
+from .style_anchor_service import extract_style_anchor_structure
+
+logger = logging.getLogger(__name__)
+
+# "thread" hands new jobs to an in-process pool, "worker" leaves them for the
+# run_ingestion_worker command, and "inline" processes them before the request returns.
+INGESTION_EXECUTOR = os.environ.get("INGESTION_EXECUTOR", "thread").strip().lower() or "thread"
+INGESTION_THREAD_WORKERS = int(os.environ.get("INGESTION_THREAD_WORKERS", "2"))
+INGESTION_LEASE_SECONDS = int(os.environ.get("INGESTION_LEASE_SECONDS", "900"))
+INGESTION_MAX_ATTEMPTS = int(os.environ.get("INGESTION_MAX_ATTEMPTS", "3"))
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def ingestion_state(metadata):
+    metadata = metadata or {}
+    return {
+        "status": metadata.get("ingestion_status") or "ready",
+        "job_id": metadata.get("ingestion_job_id"),
+        "error": metadata.get("ingestion_error") or "",
+    }
+
+
+def enqueue_exemplar_ingestion(exemplar):
+    job = IngestionJob.objects.create(kind="exemplar", exemplar=exemplar)
+    exemplar.metadata = _with_ingestion_state(exemplar.metadata, job)
+    exemplar.save(update_fields=["metadata", "updated_at"])
+    _dispatch(job)
+    return job
+
+
+def enqueue_client_file_ingestion(client_file):
+    job = IngestionJob.objects.create(kind="client_file", client_file=client_file)
+    client_file.metadata = _with_ingestion_state(client_file.metadata, job)
+    client_file.save(update_fields=["metadata", "updated_at"])
+    _dispatch(job)
+    return job
+
+
+def claim_ingestion_jobs(*, worker_id, limit=1, job_id=None):
+    now = timezone.now()
+    with transaction.atomic():
+        qs = IngestionJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status="queued") | Q(status="running", lease_expires_at__lt=now)
+        )
+        if job_id is not None:
+            qs = qs.filter(id=job_id)
+        jobs = list(qs.order_by("created_at")[:limit])
+        for job in jobs:
+            job.status = "running"
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.lease_expires_at = now + timedelta(seconds=INGESTION_LEASE_SECONDS)
+            job.started_at = job.started_at or now
+            job.save(update_fields=["status", "worker_id", "attempts", "lease_expires_at", "started_at", "updated_at"])
+    return jobs
+
+
+def process_ingestion_job(job):
+    try:
+        if job.kind == "exemplar":
+            _ingest_exemplar(job)
+        else:
+            _ingest_client_file(job)
+    except Exception as exc:
+        logger.exception(
+            "Ingestion job failed",
+            extra={"ingestion_job_id": job.id, "kind": job.kind, "attempt": job.attempts},
+        )
+        _fail_or_requeue(job, exc)
+        return job
+
+    _set_stage(job, "ready", status="completed")
+    return job
+
+
+def run_ingestion_job(job_id, *, worker_id=None):
+    close_old_connections()
+    worker_id = worker_id or default_worker_id()
+    try:
+        while True:
+            jobs = claim_ingestion_jobs(worker_id=worker_id, job_id=job_id)
+            if not jobs:
+                break
+            job = process_ingestion_job(jobs[0])
+            if job.status != "queued":
+                break
+    finally:
+        close_old_connections()
+
+
+def _dispatch(job):
+    if INGESTION_EXECUTOR == "worker":
+        return
+    if INGESTION_EXECUTOR == "inline":
+        transaction.on_commit(lambda: run_ingestion_job(job.id))
+        return
+    transaction.on_commit(lambda: _thread_executor().submit(run_ingestion_job, job.id))
+
+
+def _thread_executor():
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, INGESTION_THREAD_WORKERS),
+                thread_name_prefix="ingestion",
+            )
+        return _EXECUTOR
+
+
+def _with_ingestion_state(metadata, job):
+    updated = dict(metadata or {})
+    updated["ingestion_status"] = job.stage
+    updated["ingestion_job_id"] = job.id
+    if job.error_message:
+        updated["ingestion_error"] = job.error_message
+    else:
+        updated.pop("ingestion_error", None)
+    return updated
+
+
+def _job_target(job):
+    return job.exemplar if job.kind == "exemplar" else job.client_file
+
+
+def _set_stage(job, stage, *, status=None):
+    job.stage = stage
+    update_fields = ["stage", "updated_at"]
+    if status:
+        job.status = status
+        update_fields.append("status")
+    if status in {"completed", "failed"}:
+        job.completed_at = timezone.now()
+        job.lease_expires_at = None
+        update_fields.extend(["completed_at", "lease_expires_at"])
+    job.save(update_fields=update_fields)
+
+    target = _job_target(job)
+    target.refresh_from_db(fields=["metadata"])
+    target.metadata = _with_ingestion_state(target.metadata, job)
+    target.save(update_fields=["metadata", "updated_at"])
+
+
+def _fail_or_requeue(job, exc):
+    job.error_message = str(exc)[:500]
+    job.save(update_fields=["error_message", "updated_at"])
+    if job.attempts < INGESTION_MAX_ATTEMPTS:
+        _set_stage(job, "queued", status="queued")
+    else:
+        _set_stage(job, "failed", status="failed")
+
+
+def _ingest_exemplar(job):
+    exemplar = job.exemplar
+    _set_stage(job, "extracting")
+    extracted_text = extract_text_from_file(exemplar.original_file.path)
+    exemplar.extracted_text = extracted_text
+    exemplar.save(update_fields=["extracted_text", "updated_at"])
+
+    _set_stage(job, "embedding")
+    exemplar.embedding = generate_document_embedding(extracted_text[:12000]) if extracted_text else []
+    exemplar.save(update_fields=["embedding", "updated_at"])
+
+    _set_stage(job, "indexing")
+    if exemplar.kind == "style_anchor" and exemplar.original_file.name.lower().endswith(".docx"):
+        exemplar.metadata = {
+            **(exemplar.metadata or {}),
+            "style_anchor_structure": extract_style_anchor_structure(exemplar.original_file.path),
+        }
+        exemplar.save(update_fields=["metadata", "updated_at"])
+
+
+def _ingest_client_file(job):
+    client_file = job.client_file
+    _set_stage(job, "extracting")
+    extracted_text = extract_text_from_file(client_file.original_file.path)
+    metadata = dict(client_file.metadata or {})
+    metadata["char_count"] = len(extracted_text)
+    metadata["text_extracted"] = bool(extracted_text.strip())
+    client_file.extracted_text = extracted_text
+    client_file.metadata = metadata
+    client_file.save(update_fields=["extracted_text", "metadata", "updated_at"])
+
+    _set_stage(job, "embedding")
+    client_file.embedding = generate_document_embedding(extracted_text[:12000]) if extracted_text else []
+    client_file.save(update_fields=["embedding", "updated_at"])
+
+    _set_stage(job, "indexing")
+    metadata = sync_client_file_openai_index(client_file)
+    warning = build_client_file_warning(metadata)
+    if warning:
+        metadata["warning"] = warning
+    else:
+        metadata.pop("warning", None)
+    if metadata != (client_file.metadata or {}):
+        client_file.metadata = metadata
+        client_file.save(update_fields=["metadata", "updated_at"])
@@ -4,7 +4,7 @@ from django.contrib.auth.models import User
 from django.core.files import File
 from django.core.management.base import BaseCommand, CommandError
 
-from editor.exemplar_service import extract_text_from_file, generate_embedding
+from editor.exemplar_service import extract_text_from_file, generate_document_embedding
 from editor.models import Exemplar
 from editor.style_anchor_service import (
     USCIS_COVER_LETTER_STYLE_FAMILY,
@@ -92,7 +92,7 @@ class Command(BaseCommand):
 
             extracted_text = extract_text_from_file(exemplar.original_file.path)
             exemplar.extracted_text = extracted_text
-            exemplar.embedding = generate_embedding(extracted_text[:12000]) if extracted_text else []
+            exemplar.embedding = generate_document_embedding(extracted_text[:12000]) if extracted_text else []
             exemplar.save(update_fields=["extracted_text", "embedding", "metadata", "updated_at"])
             imported += 1
 
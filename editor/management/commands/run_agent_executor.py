@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from editor.agent_executor import run_executor_loop
+
+
+class Command(BaseCommand):
+    help = "Advance active document research agent runs without waiting for browser polls"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of runs to advance in parallel (default: 4)")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.5,
+            help="Seconds to wait between executor ticks (default: 1.5)",
+        )
+        parser.add_argument("--once", action="store_true", help="Advance each claimable run once and exit")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        self.stdout.write(f"Agent run executor started with {workers} threads.")
+        advanced = run_executor_loop(
+            workers=workers,
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Advanced {advanced} agent run(s)."))
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from editor.ingestion_service import claim_ingestion_jobs, default_worker_id, process_ingestion_job
+
+
+def _process_in_thread(job):
+    close_old_connections()
+    try:
+        return process_ingestion_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Process queued exemplar and client-file ingestion jobs with a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of files to process in parallel (default: 4)")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before polling again when the queue is empty (default: 2.0)",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit instead of polling")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        worker_id = default_worker_id()
+        processed = 0
+        self.stdout.write(f"Ingestion worker {worker_id} started with {workers} threads.")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingestion") as pool:
+            while True:
+                jobs = claim_ingestion_jobs(worker_id=worker_id, limit=workers)
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for job in pool.map(_process_in_thread, jobs):
+                    processed += 1
+                    self.stdout.write(f"Job {job.id} ({job.kind}) -> {job.stage}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} ingestion job(s)."))
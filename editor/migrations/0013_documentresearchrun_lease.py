@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0012_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentresearchrun',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentresearchrun',
+            name='lease_owner',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='documentresearchrun',
+            index=models.Index(fields=['status', 'updated_at'], name='editor_run_status_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0013_documentresearchrun_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentResearchRunEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phase', 'Phase'), ('answer_fragment', 'Answer Fragment'), ('tool_call', 'Tool Call'), ('result', 'Result')], max_length=30)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='editor.documentresearchrun')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['run', 'id'], name='editor_run_event_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0014_documentresearchrunevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentversion',
+            name='base_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='dependent_versions', to='editor.documentversion'),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='chain_depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='delta',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='storage',
+            field=models.CharField(choices=[('keyframe', 'Keyframe'), ('delta', 'Delta')], default='keyframe', max_length=20),
+        ),
+    ]
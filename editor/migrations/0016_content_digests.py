@@ -0,0 +1,96 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:22
+
+from collections import Counter
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+# Frozen copies of the helpers as they were when this migration was written, so
+# later changes to the delta format or digest encoding cannot alter the backfill.
+def _block_id(node):
+    if not isinstance(node, dict):
+        return ""
+    attrs = node.get("attrs")
+    return str(attrs.get("block_id") or "") if isinstance(attrs, dict) else ""
+
+
+def _unique_blocks(content):
+    nodes = content.get("content") if isinstance(content, dict) and isinstance(content.get("content"), list) else []
+    counts = Counter(_block_id(node) for node in nodes)
+    return {
+        _block_id(node): node
+        for node in nodes
+        if _block_id(node) and counts[_block_id(node)] == 1
+    }
+
+
+def _apply_block_delta(base_content, delta):
+    base_blocks = _unique_blocks(base_content or {})
+    nodes = []
+    for item in delta.get("order") or []:
+        if isinstance(item, str):
+            nodes.append(base_blocks[item])
+        else:
+            nodes.append(item)
+    return {**(delta.get("doc") or {}), "content": nodes}
+
+
+def _content_fingerprint(content):
+    encoded = json.dumps(content or {}, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest(), len(encoded)
+
+
+def backfill_content_digests(apps, schema_editor):
+    Document = apps.get_model("editor", "Document")
+    DocumentVersion = apps.get_model("editor", "DocumentVersion")
+
+    for document in Document.objects.only("id", "content").iterator():
+        digest, size = _content_fingerprint(document.content)
+        Document.objects.filter(id=document.id).update(content_digest=digest, content_size=size)
+
+    materialized = {}
+    for version in DocumentVersion.objects.order_by("document_id", "id").iterator():
+        if version.storage == "delta":
+            content = _apply_block_delta(materialized.get(version.base_version_id), version.delta)
+        else:
+            content = version.content
+        materialized = {version.id: content}
+        digest, size = _content_fingerprint(content)
+        DocumentVersion.objects.filter(id=version.id).update(content_digest=digest, content_size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0015_documentversion_delta_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='content_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='content_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='content_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='documentversion',
+            index=models.Index(fields=['document', '-created_at'], name='editor_version_recent_idx'),
+        ),
+        migrations.RunPython(backfill_content_digests, migrations.RunPython.noop),
+    ]
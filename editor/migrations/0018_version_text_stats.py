@@ -0,0 +1,117 @@
+# Generated by Django 5.2.11 on 2026-10-16 23:27
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+# Frozen copies of the helpers as they were when this migration was written, so
+# later changes to the delta format or text extraction cannot alter the backfill.
+def _block_id(node):
+    if not isinstance(node, dict):
+        return ""
+    attrs = node.get("attrs")
+    return str(attrs.get("block_id") or "") if isinstance(attrs, dict) else ""
+
+
+def _unique_blocks(content):
+    nodes = content.get("content") if isinstance(content, dict) and isinstance(content.get("content"), list) else []
+    counts = Counter(_block_id(node) for node in nodes)
+    return {
+        _block_id(node): node
+        for node in nodes
+        if _block_id(node) and counts[_block_id(node)] == 1
+    }
+
+
+def _apply_block_delta(base_content, delta):
+    base_blocks = _unique_blocks(base_content or {})
+    nodes = []
+    for item in delta.get("order") or []:
+        if isinstance(item, str):
+            nodes.append(base_blocks[item])
+        else:
+            nodes.append(item)
+    return {**(delta.get("doc") or {}), "content": nodes}
+
+
+def _extract_plain_text(content, max_chars):
+    parts = []
+
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+            return
+        if not isinstance(node, dict):
+            return
+
+        node_type = node.get("type")
+        if node_type == "text":
+            parts.append(node.get("text", ""))
+        elif node_type == "hardBreak":
+            parts.append("\n")
+        elif node_type == "paragraph":
+            walk(node.get("content", []))
+            parts.append("\n")
+        elif node_type == "heading":
+            walk(node.get("content", []))
+            parts.append("\n")
+        elif node_type == "pageBreak":
+            parts.append("\n--- page break ---\n")
+        elif node_type == "footnoteReference":
+            number = node.get("attrs", {}).get("number") or "?"
+            parts.append(f"[{number}]")
+        else:
+            walk(node.get("content", []))
+
+    walk(content if isinstance(content, dict) else {})
+    return "".join(parts).strip()[:max_chars]
+
+
+def _version_text_stats(content):
+    text = _extract_plain_text(content, max_chars=20000)
+    return {
+        "word_count": len([word for word in text.split() if word.strip()]),
+        "char_count": len(text),
+        "preview": text[:400],
+    }
+
+
+def backfill_version_text_stats(apps, schema_editor):
+    DocumentVersion = apps.get_model("editor", "DocumentVersion")
+
+    materialized = {}
+    for version in DocumentVersion.objects.order_by("document_id", "id").iterator():
+        if version.storage == "delta":
+            content = _apply_block_delta(materialized.get(version.base_version_id), version.delta)
+        else:
+            content = version.content
+        materialized = {version.id: content}
+        DocumentVersion.objects.filter(id=version.id).update(**_version_text_stats(content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0017_document_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentversion',
+            name='char_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='preview',
+            field=models.CharField(blank=True, default='', max_length=400),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_version_text_stats, migrations.RunPython.noop),
+    ]
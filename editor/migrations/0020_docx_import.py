@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-17 00:11
+
+import editor.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0019_embedding_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocxImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('import_version', models.PositiveIntegerField(default=0)),
+                ('package', models.JSONField(default=dict)),
+                ('source_docx', models.FileField(blank=True, upload_to=editor.models._docx_import_upload_to)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
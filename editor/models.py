@@ -3,6 +3,11 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import User
 
+from .document_schema import content_fingerprint
+
+# Register the unmanaged BIA Edge models with the app so migrations keep tracking them.
+from . import biaedge_models  # noqa: F401
+
 
 class DocumentType(models.Model):
     CATEGORY_CHOICES = [
@@ -49,6 +54,10 @@ class Document(models.Model):
         DocumentType, on_delete=models.SET_NULL, null=True, blank=True
     )
     content = models.JSONField(default=dict, blank=True)
+    content_digest = models.CharField(max_length=64, blank=True, default="")
+    content_size = models.PositiveIntegerField(default=0)
+    # Bumped on every content write so block-level patches can detect stale editors.
+    revision = models.PositiveIntegerField(default=0)
     metadata = models.JSONField(default=dict, blank=True)
     source_docx = models.FileField(upload_to="document_imports/", blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -62,17 +71,52 @@ class Document(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.content_digest, self.content_size = content_fingerprint(self.content)
+            if not self._state.adding:
+                self.revision += 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "content_digest", "content_size", "revision"}
+        super().save(*args, **kwargs)
+
 
 class DocumentVersion(models.Model):
+    STORAGE_CHOICES = [
+        ("keyframe", "Keyframe"),
+        ("delta", "Delta"),
+    ]
+
     document = models.ForeignKey(
         Document, on_delete=models.CASCADE, related_name="versions"
     )
+    # Keyframes hold the full Tiptap JSON in ``content``; deltas leave it empty and
+    # store block references against ``base_version`` in ``delta``.
     content = models.JSONField(default=dict)
+    storage = models.CharField(max_length=20, choices=STORAGE_CHOICES, default="keyframe")
+    base_version = models.ForeignKey(
+        "self",
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="dependent_versions",
+    )
+    delta = models.JSONField(default=dict, blank=True)
+    chain_depth = models.PositiveSmallIntegerField(default=0)
+    content_digest = models.CharField(max_length=64, blank=True, default="")
+    content_size = models.PositiveIntegerField(default=0)
+    word_count = models.PositiveIntegerField(default=0)
+    char_count = models.PositiveIntegerField(default=0)
+    preview = models.CharField(max_length=400, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     label = models.CharField(max_length=100, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["document", "-created_at"], name="editor_version_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.document.title} - {self.label or self.created_at}"
@@ -146,6 +190,101 @@ class DocumentClientFile(models.Model):
         return self.title
 
 
+class IngestionJob(models.Model):
+    KIND_CHOICES = [
+        ("exemplar", "Exemplar"),
+        ("client_file", "Client File"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+    STAGE_CHOICES = [
+        ("queued", "Queued"),
+        ("extracting", "Extracting"),
+        ("embedding", "Embedding"),
+        ("indexing", "Indexing"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    exemplar = models.ForeignKey(
+        Exemplar,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="ingestion_jobs",
+    )
+    client_file = models.ForeignKey(
+        DocumentClientFile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="ingestion_jobs",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    worker_id = models.CharField(max_length=100, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="editor_ingest_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ingestion {self.id} ({self.stage})"
+
+
+class EmbeddingCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    dimensions = models.PositiveIntegerField(default=0)
+    vector = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_used_at"], name="editor_embed_used_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} embedding {self.key[:12]}"
+
+
+def _docx_import_upload_to(instance, filename):
+    # Shared by every importer of the same bytes, so the name must not carry the
+    # first uploader's filename; each document keeps its own in source_docx_info.
+    return f"document_imports/{instance.sha256}.docx"
+
+
+class DocxImport(models.Model):
+    """Parsed package and the single stored copy for one set of uploaded DOCX bytes."""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    # import_service.DOCX_IMPORT_VERSION that produced ``package``.
+    import_version = models.PositiveIntegerField(default=0)
+    package = models.JSONField(default=dict)
+    source_docx = models.FileField(upload_to=_docx_import_upload_to, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"DOCX import {self.sha256[:12]}"
+
+
 class DocumentResearchSession(models.Model):
     document = models.ForeignKey(
         Document, on_delete=models.CASCADE, related_name="research_sessions"
@@ -228,6 +367,8 @@ class DocumentResearchRun(models.Model):
     citations = models.JSONField(default=list, blank=True)
     usage = models.JSONField(default=dict, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
+    lease_owner = models.CharField(max_length=100, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
     user_message = models.ForeignKey(
         DocumentResearchMessage,
         on_delete=models.SET_NULL,
@@ -248,6 +389,9 @@ class DocumentResearchRun(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="editor_run_status_idx"),
+        ]
 
     def __str__(self):
         return (
@@ -256,6 +400,33 @@ class DocumentResearchRun(models.Model):
         )
 
 
+class DocumentResearchRunEvent(models.Model):
+    KIND_CHOICES = [
+        ("phase", "Phase"),
+        ("answer_fragment", "Answer Fragment"),
+        ("tool_call", "Tool Call"),
+        ("result", "Result"),
+    ]
+
+    run = models.ForeignKey(
+        DocumentResearchRun,
+        on_delete=models.CASCADE,
+        related_name="events",
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["run", "id"], name="editor_run_event_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.run.public_id} {self.kind} event #{self.id}"
+
+
 class WritingWorkspace(models.Model):
     KIND_CHOICES = [
         ("word_addin", "Word Add-in"),
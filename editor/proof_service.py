@@ -5,16 +5,23 @@ import os
 from pathlib import Path
 import hashlib
 import json
+import logging
 import shutil
 import subprocess
 import sys
+import threading
+import time
 
 from django.conf import settings
 from django.utils import timezone
 from pypdf import PdfReader
 
+from .docx_stream import DOCX_STREAMING_EXPORT, stream_tiptap_docx
+from .document_schema import content_fingerprint
 from .export import tiptap_to_docx_with_style_anchor, tiptap_to_docx_with_template, tiptap_to_pdf
-from .style_anchor_service import resolve_style_anchor_for_document
+from .render_pool import RenderPoolError, THUMBNAIL_RENDER_TIMEOUT_SECONDS, get_render_pool, render_pdf_page
+from .soffice_pool import SofficeRenderError, get_soffice_pool, uno_available
+from .style_anchor_service import resolve_style_anchor_for_document, style_anchor_identity
 
 try:
     from docx2pdf import convert as docx2pdf_convert
@@ -22,7 +29,22 @@ except Exception:  # pragma: no cover - dependency and platform dependent
     docx2pdf_convert = None
 
 
+logger = logging.getLogger(__name__)
+
 PROOF_ROOT = "proof_previews"
+# Bump when the DOCX export or preview pipeline changes so stale proofs are not served.
+PROOF_RENDER_VERSION = 2
+# Rendered proofs are evicted oldest-first once the cache exceeds the size cap or a
+# proof has not been served for the maximum age. Zero disables either limit.
+PROOF_CACHE_MAX_BYTES = int(os.environ.get("PROOF_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+PROOF_CACHE_MAX_AGE_DAYS = float(os.environ.get("PROOF_CACHE_MAX_AGE_DAYS", "30"))
+PROOF_CACHE_EVICT_INTERVAL_SECONDS = 300
+# Page 1 is rasterized with the proof; later pages are queued on the render pool
+# and also rendered on demand by the proof page endpoint.
+PROOF_THUMBNAIL_DPI = max(24, int(os.environ.get("PROOF_THUMBNAIL_DPI", "72")))
+
+_LAST_EVICTION = 0.0
+_EVICTION_LOCK = threading.Lock()
 
 
 @dataclass
@@ -135,7 +157,7 @@ class SofficeRenderBackend:
                 "name": self.name,
                 "available": True,
                 "path": self.binary,
-                "detail": f"Using {self.binary}.",
+                "detail": f"Using {self.binary} ({'warm UNO worker pool' if uno_available() else 'pooled profiles'}).",
             }
         checked = ", ".join(self.checked_locations) if self.checked_locations else "no locations"
         return {
@@ -148,30 +170,10 @@ class SofficeRenderBackend:
     def render_docx_to_pdf(self, input_path: Path, output_path: Path) -> None:
         if not self.binary:
             raise ProofRenderError("LibreOffice rendering is unavailable.")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        command = [
-            self.binary,
-            f"-env:UserInstallation=file:///tmp/lo_profile_{timezone.now().timestamp()}",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(output_path.parent),
-            str(input_path),
-        ]
-        result = subprocess.run(
-            command,
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-        expected_path = output_path.parent / f"{input_path.stem}.pdf"
-        if result.returncode != 0 or not expected_path.exists():
-            raise ProofRenderError(
-                (result.stderr or result.stdout or "LibreOffice failed to render the DOCX.").strip()
-            )
-        if expected_path != output_path:
-            shutil.move(str(expected_path), str(output_path))
+        try:
+            get_soffice_pool(self.binary).render(input_path, output_path)
+        except SofficeRenderError as exc:
+            raise ProofRenderError(str(exc)) from exc
 
 
 class WordRenderService:
@@ -210,7 +212,9 @@ def build_document_docx_artifact(document, *, user) -> DocumentDocxArtifact:
             document_metadata=document.metadata,
         )
         source_kind = "source_docx"
-        source_label = Path(document.source_docx.name).name
+        source_label = ((document.metadata or {}).get("source_docx_info") or {}).get("filename") or Path(
+            document.source_docx.name
+        ).name
         return DocumentDocxArtifact(
             filename=_safe_docx_filename(document.title),
             export_format=export_format,
@@ -241,29 +245,81 @@ def build_document_docx_artifact(document, *, user) -> DocumentDocxArtifact:
     )
 
 
-def render_document_proof(document, *, user, force: bool = False) -> dict:
-    artifact = build_document_docx_artifact(document, user=user)
+def stream_document_docx(document, *, user):
+    """``(filename, chunks)`` for a DOCX that can be streamed, or None when it needs python-docx.
+
+    Only generated exports stream; a source DOCX or a cover-letter style anchor
+    supplies its own styles and goes through ``build_document_docx_artifact``.
+    """
+    if not DOCX_STREAMING_EXPORT:
+        return None
+    if document.source_docx and document.source_docx.name.lower().endswith(".docx"):
+        return None
+    export_format = document.document_type.export_format if document.document_type else "court_brief"
+    if export_format == "cover_letter" and style_anchor_identity(
+        user=user,
+        document=document,
+        export_format=export_format,
+    ):
+        return None
+    chunks = stream_tiptap_docx(
+        document.content,
+        export_format=export_format,
+        document_metadata=document.metadata,
+    )
+    return _safe_docx_filename(document.title), chunks
+
+
+def document_proof_key(document, *, user) -> str:
+    """Cache key for a document proof, computed from its inputs rather than the built DOCX."""
+    export_format = document.document_type.export_format if document.document_type else "court_brief"
     metadata = dict(document.metadata or {})
     metadata.pop("preview_state", None)
-    content_hash = hashlib.sha256(
+    source_docx = {}
+    style_anchor = None
+    if document.source_docx and document.source_docx.name.lower().endswith(".docx"):
+        source_path = Path(document.source_docx.path)
+        stat = source_path.stat() if source_path.exists() else None
+        source_docx = {
+            "name": document.source_docx.name,
+            "mtime_ns": stat.st_mtime_ns if stat else 0,
+            "size": stat.st_size if stat else 0,
+        }
+    else:
+        style_anchor = style_anchor_identity(user=user, document=document, export_format=export_format)
+    content_digest = document.content_digest
+    if not content_digest:
+        content_digest, _ = content_fingerprint(document.content)
+    return hashlib.sha256(
         json.dumps(
             {
+                "version": PROOF_RENDER_VERSION,
                 "title": document.title,
-                "content": document.content,
+                "content": content_digest,
                 "metadata": metadata,
-                "source_docx": document.source_docx.name or "",
-                "artifact_source": artifact.source_label,
+                "export_format": export_format,
+                "source_docx": source_docx,
+                "style_anchor": style_anchor,
             },
             sort_keys=True,
             default=str,
         ).encode("utf-8")
     ).hexdigest()[:16]
 
-    output_dir = Path(settings.MEDIA_ROOT) / PROOF_ROOT / "documents" / str(document.id) / content_hash
-    manifest_path = output_dir / "manifest.json"
-    if manifest_path.exists() and not force:
-        return json.loads(manifest_path.read_text())
 
+def render_document_proof(document, *, user, force: bool = False) -> dict:
+    content_hash = document_proof_key(document, user=user)
+    if not force:
+        cached = _read_cached_manifest(_document_proof_dir(document, content_hash))
+        if cached is not None:
+            return cached
+
+    artifact = build_document_docx_artifact(document, user=user)
+    # Resolving a style anchor can backfill its parsed structure and bump updated_at;
+    # key the render by the post-build identity so the next request hits it.
+    content_hash = document_proof_key(document, user=user)
+    output_dir = _document_proof_dir(document, content_hash)
+    manifest_path = output_dir / "manifest.json"
     output_dir.mkdir(parents=True, exist_ok=True)
     docx_path = output_dir / artifact.filename
     pdf_path = output_dir / f"{Path(artifact.filename).stem}.pdf"
@@ -281,6 +337,7 @@ def render_document_proof(document, *, user, force: bool = False) -> dict:
                 document.content,
                 title=document.title,
                 export_format=artifact.export_format,
+                content_digest=document.content_digest,
             )
         except Exception as fallback_exc:
             raise ProofRenderError(f"{exc}; internal_pdf: {fallback_exc}") from fallback_exc
@@ -292,14 +349,14 @@ def render_document_proof(document, *, user, force: bool = False) -> dict:
                 "notice": "Exact Word rendering was unavailable, so this preview is showing the internal PDF export instead.",
             }
         )
-    page_count, page_images = _build_pdf_preview_assets(pdf_path, output_dir / "page")
+    page_count, thumbnail_count = _build_pdf_preview_assets(pdf_path, output_dir / "page")
     manifest = _build_manifest(
         kind="document",
         identifier=str(document.id),
         output_dir=output_dir,
         pdf_path=pdf_path,
         page_count=page_count,
-        page_images=page_images,
+        thumbnail_count=thumbnail_count,
         backend_name=backend_name,
         source_kind=artifact.source_kind,
         source_label=artifact.source_label,
@@ -308,7 +365,8 @@ def render_document_proof(document, *, user, force: bool = False) -> dict:
         style_anchor_id=artifact.style_anchor_id,
         extra=manifest_extra,
     )
-    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    _write_manifest(manifest_path, manifest)
+    maybe_evict_proof_cache()
     return manifest
 
 
@@ -327,8 +385,10 @@ def render_exemplar_preview(exemplar, *, force: bool = False) -> dict:
 
     output_dir = Path(settings.MEDIA_ROOT) / PROOF_ROOT / "exemplars" / str(exemplar.id) / content_hash
     manifest_path = output_dir / "manifest.json"
-    if manifest_path.exists() and not force:
-        return json.loads(manifest_path.read_text())
+    if not force:
+        cached = _read_cached_manifest(output_dir)
+        if cached is not None:
+            return cached
 
     output_dir.mkdir(parents=True, exist_ok=True)
     suffix = source_path.suffix.lower()
@@ -354,17 +414,18 @@ def render_exemplar_preview(exemplar, *, force: bool = False) -> dict:
             "style_family": exemplar.style_family,
             "updated_at": exemplar.updated_at.isoformat(),
         }
-        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        _write_manifest(manifest_path, manifest)
         return manifest
 
-    page_count, page_images = _build_pdf_preview_assets(pdf_path, output_dir / "page")
+    # Exemplar previews have no on-demand page endpoint, so every page is rendered now.
+    page_count, thumbnail_count = _build_pdf_preview_assets(pdf_path, output_dir / "page", background=False)
     manifest = _build_manifest(
         kind="exemplar",
         identifier=str(exemplar.id),
         output_dir=output_dir,
         pdf_path=pdf_path,
         page_count=page_count,
-        page_images=page_images,
+        thumbnail_count=thumbnail_count,
         backend_name=backend_name,
         source_kind=exemplar.kind,
         source_label=source_path.name,
@@ -377,10 +438,88 @@ def render_exemplar_preview(exemplar, *, force: bool = False) -> dict:
             "file_url": exemplar.original_file.url if exemplar.original_file else "",
         },
     )
-    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    _write_manifest(manifest_path, manifest)
+    maybe_evict_proof_cache()
+    return manifest
+
+
+def maybe_evict_proof_cache() -> None:
+    global _LAST_EVICTION
+    with _EVICTION_LOCK:
+        now = time.monotonic()
+        if _LAST_EVICTION and now - _LAST_EVICTION < PROOF_CACHE_EVICT_INTERVAL_SECONDS:
+            return
+        _LAST_EVICTION = now
+    try:
+        evict_proof_cache()
+    except OSError:
+        logger.exception("Unable to evict proof preview cache")
+
+
+def evict_proof_cache(*, max_bytes: int | None = None, max_age_days: float | None = None) -> int:
+    """Remove rendered proofs past the age limit, then least recently served ones over the size cap."""
+    max_bytes = PROOF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    max_age_days = PROOF_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    root = Path(settings.MEDIA_ROOT) / PROOF_ROOT
+    if not root.exists():
+        return 0
+
+    entries = []
+    for manifest_path in root.glob("*/*/*/manifest.json"):
+        entry_dir = manifest_path.parent
+        try:
+            last_used = manifest_path.stat().st_mtime
+            size = sum(path.stat().st_size for path in entry_dir.rglob("*") if path.is_file())
+        except OSError:
+            continue
+        entries.append((last_used, size, entry_dir))
+    entries.sort(key=lambda item: item[0])
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days > 0 else None
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for last_used, size, entry_dir in entries:
+        expired = cutoff is not None and last_used < cutoff
+        oversized = max_bytes > 0 and total > max_bytes
+        if not expired and not oversized:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def _document_proof_dir(document, content_hash: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / PROOF_ROOT / "documents" / str(document.id) / content_hash
+
+
+def _read_cached_manifest(output_dir: Path) -> dict | None:
+    manifest_path = output_dir / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("thumbnails_pending"):
+        for page in manifest.get("pages", []):
+            page["ready"] = page.get("ready") or _page_image_path(output_dir, page["index"]).exists()
+        manifest["thumbnails_pending"] = not all(page["ready"] for page in manifest.get("pages", []))
+        if not manifest["thumbnails_pending"]:
+            _write_manifest(manifest_path, manifest)
+    try:
+        # The manifest mtime doubles as the last-served time for eviction.
+        os.utime(manifest_path)
+    except OSError:
+        pass
     return manifest
 
 
+def _write_manifest(manifest_path: Path, manifest: dict) -> None:
+    # Clients poll manifests while thumbnails land, so readers must never see a partial file.
+    partial_path = manifest_path.with_name(f".{manifest_path.name}-{os.getpid()}-{threading.get_ident()}")
+    partial_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(partial_path, manifest_path)
+
+
 def _build_manifest(
     *,
     kind: str,
@@ -388,7 +527,7 @@ def _build_manifest(
     output_dir: Path,
     pdf_path: Path,
     page_count: int,
-    page_images: list[Path],
+    thumbnail_count: int,
     backend_name: str,
     source_kind: str,
     source_label: str,
@@ -406,10 +545,11 @@ def _build_manifest(
         "page_count": page_count,
         "pages": [
             {
-                "index": index + 1,
-                "image_url": _media_url_for(path),
+                "index": index,
+                "image_url": _media_url_for(_page_image_path(output_dir, index)),
+                "ready": _page_image_path(output_dir, index).exists(),
             }
-            for index, path in enumerate(page_images)
+            for index in range(1, thumbnail_count + 1)
         ],
         "backend": backend_name,
         "generated_at": timezone.now().isoformat(),
@@ -418,42 +558,77 @@ def _build_manifest(
         "filename": filename,
         "style_anchor_id": style_anchor_id,
     }
+    manifest["thumbnails_pending"] = not all(page["ready"] for page in manifest["pages"])
     if extra:
         manifest.update(extra)
     return manifest
 
 
-def _build_pdf_preview_assets(pdf_path: Path, output_prefix: Path) -> tuple[int, list[Path]]:
+def ensure_proof_page_image(manifest: dict, page: int) -> Path:
+    """Thumbnail for ``page`` of a rendered proof, rasterizing it now if the queue has not."""
+    if not manifest.get("preview_available") or not 1 <= page <= int(manifest.get("page_count") or 0):
+        raise ProofRenderError(f"Page {page} is not part of this proof.")
+    pdf_path = _media_path_for(manifest["pdf_url"])
+    image_path = _page_image_path(pdf_path.parent, page)
+    if not image_path.exists():
+        # Waiting for a slot beats a broken image; the browser asks for every visible page at once.
+        _render_pdf_page(pdf_path, page, wait=THUMBNAIL_RENDER_TIMEOUT_SECONDS)
+    return image_path
+
+
+def _build_pdf_preview_assets(pdf_path: Path, output_prefix: Path, *, background: bool = True) -> tuple[int, int]:
+    """Page count and how many page thumbnails the manifest should list.
+
+    Page 1 is rendered before returning. With ``background`` the rest are queued and
+    any the queue cannot take are rendered by the proof page endpoint; otherwise
+    every page is rendered now.
+    """
     page_count = _pdf_page_count(pdf_path)
     try:
-        page_images = _render_pdf_pages(pdf_path, output_prefix)
+        _render_pdf_page(pdf_path, 1)
     except ProofRenderError:
-        page_images = []
-    if not page_count:
-        page_count = len(page_images)
-    return page_count, page_images
-
-
-def _render_pdf_pages(pdf_path: Path, output_prefix: Path) -> list[Path]:
-    pdftoppm = shutil.which("pdftoppm")
-    if not pdftoppm:
-        raise ProofRenderError("pdftoppm is required to build proof preview thumbnails.")
-    output_prefix.parent.mkdir(parents=True, exist_ok=True)
-    command = [
-        pdftoppm,
-        "-png",
-        str(pdf_path),
-        str(output_prefix),
-    ]
-    result = subprocess.run(
-        command,
-        check=False,
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise ProofRenderError((result.stderr or result.stdout or "Unable to render preview images.").strip())
-    return sorted(output_prefix.parent.glob(f"{output_prefix.name}-*.png"))
+        return page_count, 0
+    page_count = page_count or 1
+    if not background:
+        for page in range(2, page_count + 1):
+            try:
+                _render_pdf_page(pdf_path, page, wait=THUMBNAIL_RENDER_TIMEOUT_SECONDS)
+            except ProofRenderError:
+                return page_count, page - 1
+        return page_count, page_count
+
+    pool = get_render_pool()
+    for page in range(2, page_count + 1):
+        output_path = _page_image_path(output_prefix.parent, page)
+        if not pool.submit(render_pdf_page, str(pdf_path), page, str(output_path), PROOF_THUMBNAIL_DPI):
+            # The rest are rendered lazily when the proof page endpoint asks for them.
+            break
+    return page_count, page_count
+
+
+def _render_pdf_page(pdf_path: Path, page: int, *, wait: float = 0) -> Path:
+    output_path = _page_image_path(pdf_path.parent, page)
+    try:
+        get_render_pool().run(
+            render_pdf_page,
+            str(pdf_path),
+            page,
+            str(output_path),
+            PROOF_THUMBNAIL_DPI,
+            timeout=THUMBNAIL_RENDER_TIMEOUT_SECONDS,
+            wait=wait,
+        )
+    except RenderPoolError as exc:
+        raise ProofRenderError(str(exc)) from exc
+    return output_path
+
+
+def _page_image_path(output_dir: Path, page: int) -> Path:
+    return output_dir / f"page-{page}.png"
+
+
+def _media_path_for(url: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / url[len(settings.MEDIA_URL):]
 
 
 def _media_url_for(path: Path) -> str:
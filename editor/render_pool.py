@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import threading
+
+logger = logging.getLogger(__name__)
+
+# WeasyPrint layout and on-demand pdftoppm rasterizing run in worker processes so
+# a large export cannot pin a gunicorn thread or hold the GIL. Zero renders in-process.
+RENDER_POOL_SIZE = max(0, int(os.environ.get("RENDER_POOL_SIZE", "2")))
+# Jobs allowed to wait for a free worker; anything beyond is refused as busy.
+RENDER_POOL_QUEUE_LIMIT = max(0, int(os.environ.get("RENDER_POOL_QUEUE_LIMIT", "8")))
+# Queued proof thumbnails have their own budget so a long proof cannot take the
+# slots that PDF exports and on-demand pages need.
+RENDER_BACKGROUND_THREADS = max(1, int(os.environ.get("RENDER_BACKGROUND_THREADS", "2")))
+RENDER_BACKGROUND_QUEUE_LIMIT = max(0, int(os.environ.get("RENDER_BACKGROUND_QUEUE_LIMIT", "64")))
+# Workers are recycled after this many jobs to shed WeasyPrint/fontconfig memory.
+RENDER_POOL_MAX_JOBS = max(1, int(os.environ.get("RENDER_POOL_MAX_JOBS", "50")))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.environ.get("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+THUMBNAIL_RENDER_TIMEOUT_SECONDS = float(os.environ.get("THUMBNAIL_RENDER_TIMEOUT_SECONDS", "30"))
+
+_POOL: "RenderPool | None" = None
+_POOL_LOCK = threading.Lock()
+_FONT_CONFIG = None
+
+
+class RenderPoolError(Exception):
+    pass
+
+
+class RenderPoolBusyError(RenderPoolError):
+    pass
+
+
+class RenderPool:
+    """Bounded process pool for PDF layout and page thumbnails.
+
+    Workers are spawned (not forked from a threaded web worker), import WeasyPrint
+    and load fonts once, and are replaced wholesale when a job overruns its timeout.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = RENDER_POOL_SIZE,
+        queue_limit: int = RENDER_POOL_QUEUE_LIMIT,
+        max_jobs: int = RENDER_POOL_MAX_JOBS,
+        background_threads: int = RENDER_BACKGROUND_THREADS,
+        background_queue_limit: int = RENDER_BACKGROUND_QUEUE_LIMIT,
+    ) -> None:
+        self.size = max(0, size)
+        self.max_jobs = max(1, max_jobs)
+        self.background_threads = max(1, background_threads)
+        self._slots = threading.BoundedSemaphore(max(1, self.size) + max(0, queue_limit))
+        self._background_slots = threading.BoundedSemaphore(self.background_threads + max(0, background_queue_limit))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._executor = None
+
+    def run(self, func, *args, timeout: float, wait: float = 0):
+        """Run ``func(*args)`` on a worker and wait up to ``timeout`` seconds for the result.
+
+        When every slot is taken the call waits up to ``wait`` seconds for one
+        before it is refused as busy.
+        """
+        acquired = self._slots.acquire(timeout=wait) if wait > 0 else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise RenderPoolBusyError("All PDF render workers are busy.")
+        try:
+            if not self.size:
+                return func(*args)
+            pool = self._worker_pool()
+            result = pool.apply_async(func, args)
+            try:
+                return result.get(timeout=timeout)
+            except multiprocessing.TimeoutError as exc:
+                logger.warning("Render job timed out; restarting workers", extra={"job": func.__name__})
+                self._restart(pool)
+                raise RenderPoolError(f"Rendering timed out after {timeout:g} seconds.") from exc
+        finally:
+            self._slots.release()
+
+    def submit(self, func, *args) -> bool:
+        """Queue ``func(*args)`` on the background budget without waiting.
+
+        Background jobs run on threads of their own rather than the worker
+        processes, so ``func`` should hand the heavy lifting to a subprocess the
+        way ``render_pdf_page`` does. Returns False when the background queue is full.
+        """
+        if not self._background_slots.acquire(blocking=False):
+            return False
+
+        def done(future):
+            self._background_slots.release()
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning("Background render job failed: %s", future.exception(), extra={"job": func.__name__})
+
+        try:
+            future = self._background_executor().submit(func, *args)
+        except Exception:
+            self._background_slots.release()
+            raise
+        future.add_done_callback(done)
+        return True
+
+    def shutdown(self, *, wait: bool = False) -> None:
+        """Stop the workers, dropping queued background jobs; ``wait`` lets running ones finish."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    def _worker_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.get_context("spawn").Pool(
+                    self.size,
+                    initializer=_warm_worker,
+                    maxtasksperchild=self.max_jobs,
+                )
+            return self._pool
+
+    def _background_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.background_threads,
+                    thread_name_prefix="render-background",
+                )
+            return self._executor
+
+    def _restart(self, pool) -> None:
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.terminate()
+
+
+def get_render_pool() -> RenderPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = RenderPool()
+        return _POOL
+
+
+def shutdown_render_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def render_html_to_pdf(html: str) -> bytes:
+    try:
+        from weasyprint import HTML
+    except ImportError as exc:
+        raise RuntimeError(
+            "PDF export requires WeasyPrint. Install with: pip install weasyprint"
+        ) from exc
+    return HTML(string=html).write_pdf(font_config=_font_config())
+
+
+def render_pdf_page(pdf_path: str, page: int, output_path: str, dpi: int) -> str:
+    """Rasterize one PDF page to ``output_path`` (a .png) at ``dpi``."""
+    pdftoppm = shutil.which("pdftoppm")
+    if not pdftoppm:
+        raise RenderPoolError("pdftoppm is required to build proof preview thumbnails.")
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Render beside the target and rename so readers never see a partial PNG.
+    partial_stem = output.with_name(f".{output.stem}-{os.getpid()}-{threading.get_ident()}")
+    command = [
+        pdftoppm,
+        "-png",
+        "-r",
+        str(dpi),
+        "-f",
+        str(page),
+        "-l",
+        str(page),
+        "-singlefile",
+        str(pdf_path),
+        str(partial_stem),
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=THUMBNAIL_RENDER_TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise RenderPoolError("Preview thumbnail rendering timed out.") from exc
+    partial_path = partial_stem.with_suffix(".png")
+    if result.returncode != 0 or not partial_path.exists():
+        raise RenderPoolError((result.stderr or result.stdout or "Unable to render preview images.").strip())
+    os.replace(partial_path, output)
+    return str(output)
+
+
+def _font_config():
+    global _FONT_CONFIG
+    if _FONT_CONFIG is None:
+        from weasyprint.text.fonts import FontConfiguration
+
+        _FONT_CONFIG = FontConfiguration()
+    return _FONT_CONFIG
+
+
+def _warm_worker() -> None:
+    # A tiny layout loads WeasyPrint, Pango and the fontconfig cache before the
+    # first real job. Failures are left for the job itself to report.
+    try:
+        render_html_to_pdf('<p style="font-family: \'Times New Roman\', serif">warm</p>')
+    except Exception:
+        logger.debug("Render worker warm-up failed", exc_info=True)
+
+
+atexit.register(shutdown_render_pool)
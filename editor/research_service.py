@@ -1,12 +1,67 @@
+import json
+import logging
 import os
 import re
+import threading
+import time
 from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-from django.db import connections
+from django.db import close_old_connections, connections
 
+from .document_schema import split_sections_by_heading
+from .embedding_service import embed_text
+from .research_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
-EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 RESEARCH_ANSWER_MODEL = os.environ.get("OPENAI_RESEARCH_MODEL", "gpt-4.1-mini")
+# Independent biaedge queries for one suggestion run concurrently on this pool.
+RESEARCH_QUERY_WORKERS = max(1, int(os.environ.get("RESEARCH_QUERY_WORKERS", "8")))
+RESEARCH_SPECULATIVE_FALLBACK = os.environ.get("RESEARCH_SPECULATIVE_FALLBACK", "true").strip().lower() not in {
+    "0",
+    "false",
+    "no",
+}
+_QUERY_POOL = None
+_QUERY_POOL_LOCK = threading.Lock()
+
+BIAEDGE_SLOW_QUERY_MS = float(os.environ.get("BIAEDGE_SLOW_QUERY_MS", "1000"))
+_QUERY_METRICS = {}
+_QUERY_METRICS_LOCK = threading.Lock()
+
+SUGGEST_SECTION_WORKERS = max(1, int(os.environ.get("SUGGEST_SECTION_WORKERS", "4")))
+SUGGEST_MAX_SECTIONS = 40
+SUGGEST_SECTION_MIN_CHARS = 200
+SUGGEST_SECTION_MAX_CHARS = 8000
+_SECTION_POOL = None
+
+SIMILAR_CASES_PROBE_SIZE = 40
+SIMILAR_CASES_MIN_SIMILARITY = 0.6
+SIMILAR_CASES_CACHE_SECONDS = int(os.environ.get("SIMILAR_CASES_CACHE_SECONDS", "3600"))
+_SIMILAR_CASES_CACHE = TTLCache(max_entries=512, ttl_seconds=SIMILAR_CASES_CACHE_SECONDS)
+
+CASE_DETAIL_CACHE_SECONDS = int(os.environ.get("CASE_DETAIL_CACHE_SECONDS", "3600"))
+CASE_TEXT_PAGE_CHARS = 20000
+CASE_TEXT_MAX_PAGE_CHARS = 200000
+_CASE_DETAIL_CACHE = TTLCache(max_entries=256, ttl_seconds=CASE_DETAIL_CACHE_SECONDS)
+
+# Validity is recomputed by BIA Edge refresh jobs, so it is cached for a shorter time.
+IMMCITE_CACHE_SECONDS = int(os.environ.get("IMMCITE_CACHE_SECONDS", "300"))
+IMMCITE_BATCH_LIMIT = 200
+_IMMCITE_CACHE = TTLCache(max_entries=5000, ttl_seconds=IMMCITE_CACHE_SECONDS)
+
+CATEGORY_CACHE_SECONDS = int(os.environ.get("CATEGORY_CACHE_SECONDS", "3600"))
+CATEGORY_PAGE_SIZE = 20
+_CATEGORY_CACHE = TTLCache(max_entries=1, ttl_seconds=CATEGORY_CACHE_SECONDS)
+
+# Retrieval runs on every question so new decisions and validity changes are
+# ranked in; answers are keyed on the retrieved authorities and their validity,
+# so any change in that set produces a fresh answer.
+ASK_ANSWER_CACHE_SECONDS = int(os.environ.get("ASK_ANSWER_CACHE_SECONDS", "3600"))
+_ASK_ANSWER_CACHE = TTLCache(max_entries=512, ttl_seconds=ASK_ANSWER_CACHE_SECONDS)
+_QUESTION_TRAILING_PUNCTUATION = "?!.,;: "
 _SEARCH_STOPWORDS = {
     "a",
     "an",
@@ -162,48 +217,117 @@ def _normalize_ws(value):
     return " ".join((value or "").split()).strip()
 
 
-def _extract_search_phrases(text, limit=6):
+def _compile_query_feature_pattern():
+    # Anchored at a token start; the optional lookaheads capture every statute,
+    # circuit and legal phrase beginning there without consuming any text.
+    statute_groups = "".join(
+        f"(?:(?=(?P<statute_{index}>{pattern})))?" for index, pattern in enumerate(_STATUTE_PATTERNS)
+    )
+    circuit_alternatives = "|".join(
+        f"(?P<circuit_{index}>{'|'.join(patterns)})"
+        for index, patterns in enumerate(_CIRCUIT_HINT_PATTERNS.values())
+    )
+    phrase_alternatives = "|".join(
+        re.escape(phrase) for phrase in sorted(_LEGAL_PHRASES, key=len, reverse=True)
+    )
+    return re.compile(
+        f"{statute_groups}"
+        f"(?:(?=(?:{circuit_alternatives})))?"
+        f"(?:(?=(?P<phrase>{phrase_alternatives})))?"
+    )
+
+
+_STATUTE_PATTERNS = (
+    r"\bina\s*§?\s*\d+[a-z0-9()\-]*\b",
+    r"\b8\s*u\.?\s*s\.?\s*c\.?\s*§?\s*\d+[a-z0-9()\-]*\b",
+    r"\b8\s*c\.?\s*f\.?\s*r\.?\s*§?\s*\d+(?:\.\d+)+(?:\([a-z0-9]+\))*\b",
+)
+_CIRCUIT_LABELS = tuple(_CIRCUIT_HINT_PATTERNS)
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_-]*")
+_QUOTED_PHRASE_RE = re.compile(r'"([^"]{4,120})"')
+_QUERY_FEATURE_RE = _compile_query_feature_pattern()
+_STATUTE_GROUPS = tuple(f"statute_{index}" for index in range(len(_STATUTE_PATTERNS)))
+_CIRCUIT_GROUPS = tuple(f"circuit_{index}" for index in range(len(_CIRCUIT_LABELS)))
+# Only tokens with one of these prefixes can start a statute, circuit or legal phrase.
+_QUERY_FEATURE_PREFIXES = tuple(
+    sorted(
+        {"ina", "8", "d"}
+        | {pattern[2:].split("\\")[0] for patterns in _CIRCUIT_HINT_PATTERNS.values() for pattern in patterns}
+        | {phrase.split()[0] for phrase in _LEGAL_PHRASES}
+    )
+)
+
+
+def _extract_query_features(text, *, phrase_limit=6, term_limit=14):
+    """Keyword terms, search phrases and circuit hint for a research query.
+
+    Tokens, statutes, circuits and legal phrases come out of a single scan over
+    the tokens; the precompiled feature pattern only runs where a token could
+    start one of them.
+    """
     lowered = (text or "").lower()
+    tokens = []
+    statutes = [[] for _ in _STATUTE_PATTERNS]
+    legal_phrases = set()
+    circuit_indexes = set()
+    feature_match = _QUERY_FEATURE_RE.match
+
+    for match in _TOKEN_RE.finditer(lowered):
+        token = match.group()
+        tokens.append(token)
+        if not token.startswith(_QUERY_FEATURE_PREFIXES):
+            continue
+        features = feature_match(lowered, match.start())
+        if features.lastindex is None:
+            continue
+        for bucket, group in zip(statutes, _STATUTE_GROUPS):
+            statute = features.group(group)
+            if statute is not None:
+                bucket.append(statute)
+        phrase = features.group("phrase")
+        if phrase is not None:
+            legal_phrases.add(phrase)
+        for index, group in enumerate(_CIRCUIT_GROUPS):
+            if features.group(group) is not None:
+                circuit_indexes.add(index)
+                break
+
+    return {
+        "phrases": _assemble_search_phrases(
+            _QUOTED_PHRASE_RE.findall(lowered),
+            statutes,
+            legal_phrases,
+            phrase_limit,
+        ),
+        "keyword_terms": _score_keyword_terms(tokens, term_limit),
+        "tokens": tokens,
+        "circuit_hint": _CIRCUIT_LABELS[min(circuit_indexes)] if circuit_indexes else None,
+    }
+
+
+def _assemble_search_phrases(quoted, statutes, legal_phrases, limit):
+    # Quoted phrases first, then statutes, then known legal phrases.
     phrases = []
     seen = set()
-
-    for match in re.finditer(r'"([^"]{4,120})"', text or ""):
-        phrase = _normalize_ws(match.group(1)).lower()
-        if len(phrase.split()) < 2:
-            continue
+    candidates = [
+        phrase
+        for phrase in (_normalize_ws(value) for value in quoted)
+        if len(phrase.split()) >= 2
+    ]
+    for bucket in statutes:
+        candidates.extend(_normalize_ws(value) for value in bucket)
+    candidates.extend(phrase for phrase in _LEGAL_PHRASES if phrase in legal_phrases)
+    for phrase in candidates:
         if phrase in seen:
             continue
         seen.add(phrase)
         phrases.append(phrase)
         if len(phrases) >= limit:
-            return phrases
-
-    for regex in (
-        r"\bina\s*§?\s*\d+[a-z0-9()\-]*\b",
-        r"\b8\s*u\.?\s*s\.?\s*c\.?\s*§?\s*\d+[a-z0-9()\-]*\b",
-        r"\b8\s*c\.?\s*f\.?\s*r\.?\s*§?\s*\d+(?:\.\d+)+(?:\([a-z0-9]+\))*\b",
-    ):
-        for match in re.finditer(regex, lowered):
-            phrase = _normalize_ws(match.group(0))
-            if phrase in seen:
-                continue
-            seen.add(phrase)
-            phrases.append(phrase)
-            if len(phrases) >= limit:
-                return phrases
-
-    for phrase in _LEGAL_PHRASES:
-        if phrase in lowered and phrase not in seen:
-            seen.add(phrase)
-            phrases.append(phrase)
-            if len(phrases) >= limit:
-                break
-
+            break
     return phrases
 
 
-def _extract_keyword_terms(text, limit=14):
-    tokens = re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower())
+def _score_keyword_terms(tokens, limit):
     if not tokens:
         return []
 
@@ -237,15 +361,14 @@ def _extract_keyword_terms(text, limit=14):
     return [token for _, _, token in scored[:limit]]
 
 
-def _build_search_queries(text):
-    terms = _extract_keyword_terms(text, limit=14)
+def _build_search_queries(features):
+    terms = features["keyword_terms"]
     if not terms:
-        fallback_tokens = re.findall(r"[a-z0-9][a-z0-9_-]*", (text or "").lower())[:8]
-        terms = [t for t in fallback_tokens if len(t) >= 2]
+        terms = [t for t in features["tokens"][:8] if len(t) >= 2]
     keyword_terms = terms[:12]
     keyword_query = " OR ".join(keyword_terms)
 
-    phrases = _extract_search_phrases(text, limit=6)
+    phrases = features["phrases"]
     quoted_phrases = [
         '"' + phrase.replace('"', "") + '"'
         for phrase in phrases
@@ -256,14 +379,6 @@ def _build_search_queries(text):
     return keyword_query, (phrase_query or keyword_query), keyword_terms, phrases
 
 
-def _infer_circuit_hint(text):
-    lowered = (text or "").lower()
-    for label, patterns in _CIRCUIT_HINT_PATTERNS.items():
-        if any(re.search(pattern, lowered) for pattern in patterns):
-            return label
-    return None
-
-
 def _circuit_filter_clause(circuit_hint):
     if not circuit_hint:
         return "", []
@@ -273,8 +388,8 @@ def _circuit_filter_clause(circuit_hint):
         return "", []
 
     allowed_patterns = circuit_patterns + ["%bia%", "%attorney general%", "%ag%"]
-    where_parts = ["d.court ILIKE %s" for _ in allowed_patterns]
-    return " AND (" + " OR ".join(where_parts) + ")", allowed_patterns
+    # One array parameter keeps the SQL text identical for every circuit.
+    return " AND d.court ILIKE ANY(%s)", [allowed_patterns]
 
 
 def _infer_category_ids(cursor, keyword_terms, phrases, limit=5):
@@ -300,23 +415,18 @@ def _infer_category_ids(cursor, keyword_terms, phrases, limit=5):
     if not deduped:
         return []
 
-    or_parts = []
-    params = []
-    for value in deduped:
-        like_pattern = f"%{value}%"
-        or_parts.extend(["lower(c.name) LIKE %s", "lower(c.slug) LIKE %s"])
-        params.extend([like_pattern, like_pattern])
-
-    sql = f"""
+    like_patterns = [f"%{value}%" for value in deduped]
+    cursor.execute(
+        """
         SELECT c.id
         FROM categories c
         WHERE c.enabled = true
-          AND ({' OR '.join(or_parts)})
+          AND (lower(c.name) LIKE ANY(%s) OR lower(c.slug) LIKE ANY(%s))
         ORDER BY c.display_order ASC
         LIMIT %s;
-    """
-    params.append(limit)
-    cursor.execute(sql, params)
+        """,
+        [like_patterns, like_patterns, limit],
+    )
     return [int(row[0]) for row in cursor.fetchall()]
 
 
@@ -324,15 +434,15 @@ def _fetch_category_matched_docs(cursor, doc_ids, category_ids):
     if not doc_ids or not category_ids:
         return set()
 
-    doc_placeholders = ",".join(["%s"] * len(doc_ids))
-    category_placeholders = ",".join(["%s"] * len(category_ids))
-    sql = f"""
+    cursor.execute(
+        """
         SELECT DISTINCT dc.document_id
         FROM document_categories dc
-        WHERE dc.document_id IN ({doc_placeholders})
-          AND dc.category_id IN ({category_placeholders});
-    """
-    cursor.execute(sql, [*doc_ids, *category_ids])
+        WHERE dc.document_id = ANY(%s)
+          AND dc.category_id = ANY(%s);
+        """,
+        [list(doc_ids), list(category_ids)],
+    )
     return {int(row[0]) for row in cursor.fetchall()}
 
 
@@ -354,22 +464,251 @@ def _court_matches_hint(court_value, circuit_hint):
 
 
 def generate_query_embedding(text):
-    client = _openai_client(required=True)
-    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
-    return resp.data[0].embedding
+    return embed_text(text, required=True)
+
+
+def _semantic_candidates(cursor, vector, filter_sql, filter_params):
+    cursor.execute(
+        f"""
+        SELECT h.document_id, h.legal_issue, h.rule, h.is_primary,
+               d.case_name, d.citation, d.decision_date, d.court, d.precedential_status,
+               d.cited_by_count,
+               cv.status as validity_status,
+               1 - (he.embedding <=> %s::vector) as similarity
+        FROM holding_embeddings he
+        JOIN holdings h ON h.id = he.holding_id
+        JOIN documents d ON d.id = h.document_id
+        LEFT JOIN citation_validity cv ON cv.document_id = d.id
+        WHERE 1 - (he.embedding <=> %s::vector) > 0.55
+        {filter_sql}
+        ORDER BY similarity DESC
+        LIMIT 20;
+        """,
+        [vector, vector, *filter_params],
+    )
+    return cursor.fetchall()
+
+
+def _keyword_candidates(cursor, keyword_query, phrase_query, filter_sql, filter_params):
+    cursor.execute(
+        f"""
+        SELECT d.id as document_id, d.case_name, d.citation, d.decision_date, d.court,
+               d.precedential_status, d.cited_by_count,
+               cv.status as validity_status,
+               dt.tsv_rank, dt.keyword_rank, dt.phrase_rank
+        FROM (
+            SELECT dt.document_id,
+                   ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) as keyword_rank,
+                   ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) as phrase_rank,
+                   (
+                       ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) * 0.55 +
+                       ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) * 0.45
+                   ) as tsv_rank
+            FROM document_texts dt
+            JOIN documents d ON d.id = dt.document_id
+            WHERE (
+                dt.search_vector @@ websearch_to_tsquery('english', %s)
+                OR dt.search_vector @@ websearch_to_tsquery('english', %s)
+            )
+            {filter_sql}
+            ORDER BY tsv_rank DESC
+            LIMIT 30
+        ) dt
+        JOIN documents d ON d.id = dt.document_id
+        LEFT JOIN citation_validity cv ON cv.document_id = d.id
+        ORDER BY dt.tsv_rank DESC
+        LIMIT 25;
+        """,
+        [
+            keyword_query,
+            phrase_query,
+            keyword_query,
+            phrase_query,
+            keyword_query,
+            phrase_query,
+            *filter_params,
+        ],
+    )
+    return cursor.fetchall()
+
+
+def _merge_retrieval(semantic_rows, keyword_rows, use_circuit_filter):
+    merged = OrderedDict()
+    for row in semantic_rows:
+        doc_id = row[0]
+        merged[doc_id] = {
+            "document_id": doc_id,
+            "legal_issue": row[1],
+            "holding": row[2],
+            "is_primary": row[3],
+            "case_name": row[4],
+            "citation": row[5],
+            "decision_date": row[6].isoformat() if row[6] else None,
+            "court": row[7],
+            "precedential_status": row[8],
+            "cited_by_count": row[9] or 0,
+            "validity_status": row[10],
+            "similarity": float(row[11] or 0),
+            "semantic_score": float(row[11] or 0),
+            "keyword_score": 0.0,
+            "phrase_score": 0.0,
+            "circuit_filtered": use_circuit_filter,
+        }
+
+    for row in keyword_rows:
+        doc_id = row[0]
+        keyword_score = float(row[8] or 0)
+        phrase_score = float(row[10] or 0)
+        if doc_id not in merged:
+            merged[doc_id] = {
+                "document_id": doc_id,
+                "legal_issue": "",
+                "holding": "",
+                "is_primary": False,
+                "case_name": row[1],
+                "citation": row[2],
+                "decision_date": row[3].isoformat() if row[3] else None,
+                "court": row[4],
+                "precedential_status": row[5],
+                "cited_by_count": row[6] or 0,
+                "validity_status": row[7],
+                "similarity": 0.0,
+                "semantic_score": 0.0,
+                "keyword_score": keyword_score,
+                "phrase_score": phrase_score,
+                "circuit_filtered": use_circuit_filter,
+            }
+        else:
+            merged[doc_id]["keyword_score"] = max(
+                merged[doc_id]["keyword_score"], keyword_score
+            )
+            merged[doc_id]["phrase_score"] = max(
+                merged[doc_id]["phrase_score"], phrase_score
+            )
+
+    return merged
+
+
+def _research_query_pool():
+    global _QUERY_POOL
+    with _QUERY_POOL_LOCK:
+        if _QUERY_POOL is None:
+            _QUERY_POOL = ThreadPoolExecutor(
+                max_workers=RESEARCH_QUERY_WORKERS,
+                thread_name_prefix="biaedge-query",
+            )
+        return _QUERY_POOL
+
+
+@contextmanager
+def _biaedge_cursor(label):
+    """Cursor on the BIA Edge database whose queries are timed under ``label``.
+
+    Without a connection pool each thread keeps a persistent connection
+    (CONN_MAX_AGE). With ``BIAEDGE_DB_POOL`` the connection goes back to the
+    process pool as soon as the cursor is done, so idle request and query-pool
+    threads do not hold sessions open.
+    """
+    connection = connections["biaedge"]
+    connection.close_if_unusable_or_obsolete()
+    try:
+        with connection.execute_wrapper(_QueryTimer(label)), connection.cursor() as cursor:
+            yield cursor
+    finally:
+        if getattr(connection, "pool", None) is not None and not connection.in_atomic_block:
+            connection.close()
+
+
+class _QueryTimer:
+    def __init__(self, label):
+        self.label = label
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = execute(sql, params, many, context)
+            failed = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            rowcount = getattr(context.get("cursor"), "rowcount", -1)
+            _record_query(self.label, elapsed_ms, rowcount if not failed else -1, failed)
+
+
+def _record_query(label, elapsed_ms, rowcount, failed):
+    with _QUERY_METRICS_LOCK:
+        metrics = _QUERY_METRICS.setdefault(
+            label,
+            {"calls": 0, "errors": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0},
+        )
+        metrics["calls"] += 1
+        metrics["errors"] += int(failed)
+        metrics["rows"] += max(0, rowcount)
+        metrics["total_ms"] += elapsed_ms
+        metrics["max_ms"] = max(metrics["max_ms"], elapsed_ms)
+    if BIAEDGE_SLOW_QUERY_MS and elapsed_ms >= BIAEDGE_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow BIA Edge query",
+            extra={"query_label": label, "elapsed_ms": round(elapsed_ms, 1), "rowcount": rowcount},
+        )
+
+
+def biaedge_query_stats():
+    """Per-query call counts, errors, rows returned and latency for this process."""
+    with _QUERY_METRICS_LOCK:
+        snapshot = {label: dict(metrics) for label, metrics in _QUERY_METRICS.items()}
+    for metrics in snapshot.values():
+        metrics["avg_ms"] = round(metrics["total_ms"] / metrics["calls"], 2) if metrics["calls"] else 0.0
+        metrics["total_ms"] = round(metrics["total_ms"], 2)
+        metrics["max_ms"] = round(metrics["max_ms"], 2)
+    return snapshot
+
+
+def reset_biaedge_query_stats():
+    with _QUERY_METRICS_LOCK:
+        _QUERY_METRICS.clear()
+
+
+def _with_biaedge_cursor(query, *args):
+    # Query-pool threads run independent queries on separate sessions at once.
+    with _biaedge_cursor(query.__name__.strip("_")) as cursor:
+        return query(cursor, *args)
+
+
+def _submit_biaedge_query(query, *args):
+    return _research_query_pool().submit(_with_biaedge_cursor, query, *args)
 
 
 def suggest_case_law(text):
     text = (text or "").strip()
     if not text:
         return []
-    keyword_query, phrase_query, keyword_terms, phrases = _build_search_queries(text)
+    features = _extract_query_features(text)
+    keyword_query, phrase_query, keyword_terms, phrases = _build_search_queries(features)
     if not keyword_query:
         return []
 
-    circuit_hint = _infer_circuit_hint(text)
+    circuit_hint = features["circuit_hint"]
     circuit_filter_sql, circuit_filter_params = _circuit_filter_clause(circuit_hint)
+    use_circuit_filter = bool(circuit_hint)
+    # The unfiltered pass only matters when the circuit-filtered one comes back empty,
+    # but starting it up front keeps that fallback off the critical path.
+    speculate = use_circuit_filter and RESEARCH_SPECULATIVE_FALLBACK
+
+    category_future = _submit_biaedge_query(_infer_category_ids, keyword_terms, phrases, 5)
+    keyword_future = _submit_biaedge_query(
+        _keyword_candidates,
+        keyword_query,
+        phrase_query,
+        circuit_filter_sql if use_circuit_filter else "",
+        circuit_filter_params if use_circuit_filter else [],
+    )
+    fallback_keyword_future = None
+    if speculate:
+        fallback_keyword_future = _submit_biaedge_query(_keyword_candidates, keyword_query, phrase_query, "", [])
 
+    # The embedding round-trip overlaps with the keyword and category queries.
     vector = None
     try:
         embedding = generate_query_embedding(text)
@@ -378,134 +717,44 @@ def suggest_case_law(text):
         # Fallback to keyword-only search when embeddings are unavailable.
         vector = None
 
-    def _run_retrieval(cursor, use_circuit_filter):
-        active_filter_sql = circuit_filter_sql if use_circuit_filter else ""
-        active_filter_params = circuit_filter_params if use_circuit_filter else []
-        semantic_sql = f"""
-            SELECT h.document_id, h.legal_issue, h.rule, h.is_primary,
-                   d.case_name, d.citation, d.decision_date, d.court, d.precedential_status,
-                   d.cited_by_count,
-                   cv.status as validity_status,
-                   1 - (he.embedding <=> %s::vector) as similarity
-            FROM holding_embeddings he
-            JOIN holdings h ON h.id = he.holding_id
-            JOIN documents d ON d.id = h.document_id
-            LEFT JOIN citation_validity cv ON cv.document_id = d.id
-            WHERE 1 - (he.embedding <=> %s::vector) > 0.55
-            {active_filter_sql}
-            ORDER BY similarity DESC
-            LIMIT 20;
-        """
-
-        keyword_sql = f"""
-            SELECT d.id as document_id, d.case_name, d.citation, d.decision_date, d.court,
-                   d.precedential_status, d.cited_by_count,
-                   cv.status as validity_status,
-                   dt.tsv_rank, dt.keyword_rank, dt.phrase_rank
-            FROM (
-                SELECT dt.document_id,
-                       ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) as keyword_rank,
-                       ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) as phrase_rank,
-                       (
-                           ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) * 0.55 +
-                           ts_rank(dt.search_vector, websearch_to_tsquery('english', %s)) * 0.45
-                       ) as tsv_rank
-                FROM document_texts dt
-                JOIN documents d ON d.id = dt.document_id
-                WHERE (
-                    dt.search_vector @@ websearch_to_tsquery('english', %s)
-                    OR dt.search_vector @@ websearch_to_tsquery('english', %s)
-                )
-                {active_filter_sql}
-                ORDER BY tsv_rank DESC
-                LIMIT 30
-            ) dt
-            JOIN documents d ON d.id = dt.document_id
-            LEFT JOIN citation_validity cv ON cv.document_id = d.id
-            ORDER BY dt.tsv_rank DESC
-            LIMIT 25;
-        """
+    semantic_future = fallback_semantic_future = None
+    if vector:
+        semantic_future = _submit_biaedge_query(
+            _semantic_candidates,
+            vector,
+            circuit_filter_sql if use_circuit_filter else "",
+            circuit_filter_params if use_circuit_filter else [],
+        )
+        if speculate:
+            fallback_semantic_future = _submit_biaedge_query(_semantic_candidates, vector, "", [])
 
-        merged = OrderedDict()
-        if vector:
-            cursor.execute(semantic_sql, [vector, vector, *active_filter_params])
-            semantic_rows = cursor.fetchall()
-
-            for row in semantic_rows:
-                doc_id = row[0]
-                merged[doc_id] = {
-                    "document_id": doc_id,
-                    "legal_issue": row[1],
-                    "holding": row[2],
-                    "is_primary": row[3],
-                    "case_name": row[4],
-                    "citation": row[5],
-                    "decision_date": row[6].isoformat() if row[6] else None,
-                    "court": row[7],
-                    "precedential_status": row[8],
-                    "cited_by_count": row[9] or 0,
-                    "validity_status": row[10],
-                    "similarity": float(row[11] or 0),
-                    "semantic_score": float(row[11] or 0),
-                    "keyword_score": 0.0,
-                    "phrase_score": 0.0,
-                    "circuit_filtered": use_circuit_filter,
-                }
-
-        keyword_params = [
-            keyword_query,
-            phrase_query,
-            keyword_query,
-            phrase_query,
-            keyword_query,
-            phrase_query,
-            *active_filter_params,
-        ]
-        cursor.execute(keyword_sql, keyword_params)
-        keyword_rows = cursor.fetchall()
-
-        for row in keyword_rows:
-            doc_id = row[0]
-            keyword_score = float(row[8] or 0)
-            phrase_score = float(row[10] or 0)
-            if doc_id not in merged:
-                merged[doc_id] = {
-                    "document_id": doc_id,
-                    "legal_issue": "",
-                    "holding": "",
-                    "is_primary": False,
-                    "case_name": row[1],
-                    "citation": row[2],
-                    "decision_date": row[3].isoformat() if row[3] else None,
-                    "court": row[4],
-                    "precedential_status": row[5],
-                    "cited_by_count": row[6] or 0,
-                    "validity_status": row[7],
-                    "similarity": 0.0,
-                    "semantic_score": 0.0,
-                    "keyword_score": keyword_score,
-                    "phrase_score": phrase_score,
-                    "circuit_filtered": use_circuit_filter,
-                }
-            else:
-                merged[doc_id]["keyword_score"] = max(
-                    merged[doc_id]["keyword_score"], keyword_score
-                )
-                merged[doc_id]["phrase_score"] = max(
-                    merged[doc_id]["phrase_score"], phrase_score
-                )
-
-        return merged
-
-    with connections["biaedge"].cursor() as cursor:
-        inferred_category_ids = _infer_category_ids(cursor, keyword_terms, phrases, limit=5)
-        merged = _run_retrieval(cursor, use_circuit_filter=bool(circuit_hint))
-        if circuit_hint and not merged:
+    fallback_futures = [future for future in (fallback_keyword_future, fallback_semantic_future) if future]
+    try:
+        merged = _merge_retrieval(
+            semantic_future.result() if semantic_future else [],
+            keyword_future.result(),
+            use_circuit_filter,
+        )
+        if use_circuit_filter and not merged:
             # Fallback to unconstrained retrieval if strict circuit filtering yields nothing.
-            merged = _run_retrieval(cursor, use_circuit_filter=False)
-
-        category_matched_docs = _fetch_category_matched_docs(
-            cursor,
+            if fallback_keyword_future is None:
+                fallback_keyword_future = _submit_biaedge_query(_keyword_candidates, keyword_query, phrase_query, "", [])
+                if vector:
+                    fallback_semantic_future = _submit_biaedge_query(_semantic_candidates, vector, "", [])
+            merged = _merge_retrieval(
+                fallback_semantic_future.result() if fallback_semantic_future else [],
+                fallback_keyword_future.result(),
+                False,
+            )
+        inferred_category_ids = category_future.result()
+    finally:
+        for future in fallback_futures:
+            future.cancel()
+
+    category_matched_docs = set()
+    if merged and inferred_category_ids:
+        category_matched_docs = _with_biaedge_cursor(
+            _fetch_category_matched_docs,
             list(merged.keys()),
             inferred_category_ids,
         )
@@ -548,12 +797,85 @@ def suggest_case_law(text):
     return results[:20]
 
 
-def ask_question(question, limit=8):
+def suggest_case_law_for_document(content, *, limit=40):
+    """Suggest authorities section by section and merge them with per-section attribution.
+
+    A whole brief run through ``suggest_case_law`` as one blob blends every issue
+    into one diluted query, so each heading-led section is retrieved on its own.
+    """
+    sections = split_sections_by_heading(content, min_chars=SUGGEST_SECTION_MIN_CHARS)[:SUGGEST_MAX_SECTIONS]
+    if not sections:
+        return {"sections": [], "results": []}
+
+    def _suggest_section(section):
+        try:
+            return suggest_case_law(section["text"][:SUGGEST_SECTION_MAX_CHARS])
+        finally:
+            close_old_connections()
+
+    # Sections run on their own pool; each one fans its queries out to the query pool.
+    section_results = list(_suggest_section_pool().map(_suggest_section, sections))
+
+    merged = {}
+    section_summaries = []
+    for index, (section, results) in enumerate(zip(sections, section_results)):
+        section_summaries.append(
+            {
+                "index": index,
+                "heading": section["heading"],
+                "block_id": section["block_id"],
+                "block_ids": section["block_ids"],
+                "result_count": len(results),
+            }
+        )
+        for rank, item in enumerate(results, 1):
+            attribution = {
+                "section_index": index,
+                "heading": section["heading"],
+                "block_id": section["block_id"],
+                "rank": rank,
+                "combined_score": item["combined_score"],
+            }
+            existing = merged.get(item["document_id"])
+            if existing is None:
+                merged[item["document_id"]] = {**item, "sections": [attribution]}
+                continue
+            existing["sections"].append(attribution)
+            if item["combined_score"] > existing["combined_score"]:
+                merged[item["document_id"]] = {**item, "sections": existing["sections"]}
+
+    results = sorted(
+        merged.values(),
+        key=lambda item: (item["combined_score"], len(item["sections"]), item.get("cited_by_count", 0)),
+        reverse=True,
+    )
+    return {"sections": section_summaries, "results": results[:limit]}
+
+
+def _suggest_section_pool():
+    global _SECTION_POOL
+    with _QUERY_POOL_LOCK:
+        if _SECTION_POOL is None:
+            _SECTION_POOL = ThreadPoolExecutor(
+                max_workers=SUGGEST_SECTION_WORKERS,
+                thread_name_prefix="suggest-section",
+            )
+        return _SECTION_POOL
+
+
+def normalize_question(question):
+    """Case-folded, whitespace-collapsed question without trailing punctuation."""
+    return _normalize_ws(question).casefold().rstrip(_QUESTION_TRAILING_PUNCTUATION)
+
+
+def ask_question(question, limit=8, *, refresh=False):
     question = (question or "").strip()
     if not question:
         raise ValueError("question is required")
 
+    normalized = normalize_question(question)
     suggested = suggest_case_law(question)[:limit]
+
     citations = [
         {
             "document_id": item["document_id"],
@@ -577,6 +899,11 @@ def ask_question(question, limit=8):
             "citations": [],
         }
 
+    answer_key = (normalized, tuple((item["document_id"], item["validity_status"]) for item in citations))
+    cached_answer = None if refresh else _ASK_ANSWER_CACHE.get(answer_key)
+    if cached_answer is not None:
+        return {"answer": cached_answer, "citations": citations, "cached": True}
+
     context_lines = []
     for idx, item in enumerate(citations, 1):
         year = ""
@@ -632,12 +959,19 @@ def ask_question(question, limit=8):
     except Exception:
         answer = ""
 
-    if not answer:
+    if answer:
+        _ASK_ANSWER_CACHE.set(answer_key, answer)
+    else:
         answer = _fallback_answer_without_llm(citations)
 
     return {"answer": answer, "citations": citations}
 
 
+def invalidate_answer_cache():
+    """Drop cached answers, e.g. after new decisions are ingested."""
+    _ASK_ANSWER_CACHE.invalidate()
+
+
 def _fallback_answer_without_llm(citations):
     top = citations[:5]
     lines = [
@@ -656,9 +990,74 @@ def _fallback_answer_without_llm(citations):
     return "\n".join(lines)
 
 
-def category_cases(category_id, page=1, page_size=20):
-    offset = (page - 1) * page_size
-    sql = """
+def research_categories():
+    """Enabled categories in display order, each with its precomputed case count."""
+    return _CATEGORY_CACHE.get_or_set("categories", _load_categories)
+
+
+def category_by_slug(slug):
+    return next((category for category in research_categories() if category["slug"] == slug), None)
+
+
+def invalidate_category_cache():
+    _CATEGORY_CACHE.invalidate()
+
+
+def _load_categories():
+    with _biaedge_cursor("research_categories") as cursor:
+        cursor.execute(
+            """
+            SELECT c.id, c.name, c.slug, c.description, COALESCE(counts.case_count, 0)
+            FROM categories c
+            LEFT JOIN (
+                SELECT category_id, COUNT(*) as case_count
+                FROM document_categories
+                GROUP BY category_id
+            ) counts ON counts.category_id = c.id
+            WHERE c.enabled = true
+            ORDER BY c.display_order ASC
+            """
+        )
+        rows = cursor.fetchall()
+    return [
+        {
+            "id": row[0],
+            "name": row[1],
+            "slug": row[2],
+            "description": row[3] or "",
+            "case_count": row[4] or 0,
+        }
+        for row in rows
+    ]
+
+
+def encode_category_cursor(cited_by_count, document_id):
+    return f"{int(cited_by_count or 0)}:{int(document_id)}"
+
+
+def decode_category_cursor(value):
+    try:
+        cited_by_count, document_id = str(value).split(":", 1)
+        return int(cited_by_count), int(document_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid category cursor") from None
+
+
+def category_cases_page(category_id, *, cursor=None, page=1, page_size=20):
+    """One page of a category, most cited first.
+
+    Pages continue from ``cursor`` (the last row's cited_by_count and id) so deep
+    pages cost the same as the first; ``page`` is kept for older clients.
+    """
+    params = [category_id]
+    keyset_sql = ""
+    offset = 0
+    if cursor:
+        keyset_sql = "AND (COALESCE(d.cited_by_count, 0), d.id) < (%s, %s)"
+        params.extend(decode_category_cursor(cursor))
+    else:
+        offset = max(0, (page - 1) * page_size)
+    sql = f"""
         SELECT d.id, d.case_name, d.citation, d.decision_date, d.court,
                d.precedential_status, d.cited_by_count, d.summary,
                cv.status as validity_status
@@ -666,13 +1065,17 @@ def category_cases(category_id, page=1, page_size=20):
         JOIN documents d ON d.id = dc.document_id
         LEFT JOIN citation_validity cv ON cv.document_id = d.id
         WHERE dc.category_id = %s
-        ORDER BY d.cited_by_count DESC NULLS LAST
+        {keyset_sql}
+        ORDER BY COALESCE(d.cited_by_count, 0) DESC, d.id DESC
         LIMIT %s OFFSET %s;
     """
-    with connections["biaedge"].cursor() as cursor:
-        cursor.execute(sql, [category_id, page_size, offset])
-        rows = cursor.fetchall()
+    params.extend([page_size + 1, offset])
+    with _biaedge_cursor("category_cases") as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
 
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
     results = []
     for row in rows:
         results.append(
@@ -688,22 +1091,52 @@ def category_cases(category_id, page=1, page_size=20):
                 "validity_status": row[8],
             }
         )
-    return results
+    next_cursor = encode_category_cursor(rows[-1][6], rows[-1][0]) if has_more else None
+    return {"results": results, "next_cursor": next_cursor}
 
 
 def immcite_status(doc_id):
-    with connections["biaedge"].cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT status, positive_citations, negative_citations,
-                   overruling_citations, status_reason
-            FROM citation_validity
-            WHERE document_id = %s
-            """,
-            [doc_id],
-        )
-        row = cursor.fetchone()
+    return immcite_statuses([doc_id])[int(doc_id)]
+
+
+def immcite_statuses(doc_ids):
+    """ImmCite validity for many documents, keyed by document id, in one query for the cache misses."""
+    doc_ids = list(dict.fromkeys(int(doc_id) for doc_id in doc_ids))
+    statuses = {}
+    missing = []
+    for doc_id in doc_ids:
+        cached = _IMMCITE_CACHE.get(doc_id)
+        if cached is None:
+            missing.append(doc_id)
+        else:
+            statuses[doc_id] = cached
+
+    if missing:
+        with _biaedge_cursor("immcite_statuses") as cursor:
+            cursor.execute(
+                """
+                SELECT document_id, status, positive_citations, negative_citations,
+                       overruling_citations, status_reason
+                FROM citation_validity
+                WHERE document_id = ANY(%s)
+                """,
+                [missing],
+            )
+            rows = {int(row[0]): row for row in cursor.fetchall()}
+        for doc_id in missing:
+            status = _immcite_payload(doc_id, rows.get(doc_id))
+            _IMMCITE_CACHE.set(doc_id, status)
+            statuses[doc_id] = status
+
+    return {doc_id: statuses[doc_id] for doc_id in doc_ids}
+
 
+def invalidate_immcite_cache(doc_ids=None):
+    """Drop cached validity, e.g. after the BIA Edge citation_validity table is refreshed."""
+    _IMMCITE_CACHE.invalidate(None if doc_ids is None else [int(doc_id) for doc_id in doc_ids])
+
+
+def _immcite_payload(doc_id, row):
     if not row:
         return {
             "document_id": doc_id,
@@ -716,129 +1149,194 @@ def immcite_status(doc_id):
 
     return {
         "document_id": doc_id,
-        "status": row[0],
-        "positive_citations": row[1] or 0,
-        "negative_citations": row[2] or 0,
-        "overruling_citations": row[3] or 0,
-        "status_reason": row[4] or "",
+        "status": row[1],
+        "positive_citations": row[2] or 0,
+        "negative_citations": row[3] or 0,
+        "overruling_citations": row[4] or 0,
+        "status_reason": row[5] or "",
     }
 
 
 def case_detail(doc_id):
-    with connections["biaedge"].cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT d.id, d.case_name, d.citation, d.decision_date, d.court,
-                   d.precedential_status, d.summary, d.cited_by_count
-            FROM documents d
-            WHERE d.id = %s
-            """,
-            [doc_id],
-        )
-        doc = cursor.fetchone()
-        if not doc:
-            return None
+    """Case metadata, ImmCite validity, holdings and headnotes without the decision text.
 
-        cursor.execute(
-            """
-            SELECT status, positive_citations, negative_citations, overruling_citations, status_reason
-            FROM citation_validity
-            WHERE document_id = %s
-            """,
-            [doc_id],
-        )
-        validity = cursor.fetchone()
+    The case itself never changes once ingested, so it is cached per document and
+    only the validity row is re-read on a cache hit.
+    """
+    doc_id = int(doc_id)
+    cached = _CASE_DETAIL_CACHE.get(doc_id)
+    if cached is not None:
+        validity = immcite_status(doc_id)
+        validity.pop("document_id", None)
+        cached["validity"] = validity
+        return cached
 
-        cursor.execute(
-            """
-            SELECT legal_issue, rule, is_primary
-            FROM holdings
-            WHERE document_id = %s
-            ORDER BY is_primary DESC, sequence ASC
-            """,
-            [doc_id],
-        )
-        holdings = cursor.fetchall()
+    sql = """
+        SELECT d.id, d.case_name, d.citation, d.decision_date, d.court,
+               d.precedential_status, d.summary, d.cited_by_count,
+               cv.status, cv.positive_citations, cv.negative_citations,
+               cv.overruling_citations, cv.status_reason,
+               COALESCE((
+                   SELECT json_agg(
+                       json_build_object('legal_issue', h.legal_issue, 'rule', h.rule, 'is_primary', h.is_primary)
+                       ORDER BY h.is_primary DESC, h.sequence ASC
+                   )
+                   FROM holdings h
+                   WHERE h.document_id = d.id
+               ), '[]'::json) as holdings,
+               COALESCE((
+                   SELECT json_agg(
+                       json_build_object(
+                           'title', hn.title,
+                           'text', hn.text,
+                           'topic_code', hn.topic_code,
+                           'is_primary', hn.is_primary
+                       )
+                       ORDER BY hn.sequence ASC
+                   )
+                   FROM headnotes hn
+                   WHERE hn.document_id = d.id
+               ), '[]'::json) as headnotes,
+               (SELECT char_length(dt.full_text) FROM document_texts dt WHERE dt.document_id = d.id) as full_text_chars
+        FROM documents d
+        LEFT JOIN citation_validity cv ON cv.document_id = d.id
+        WHERE d.id = %s
+    """
+    with _biaedge_cursor("case_detail") as cursor:
+        cursor.execute(sql, [doc_id])
+        row = cursor.fetchone()
+    if not row:
+        return None
 
-        cursor.execute(
-            """
-            SELECT title, text, topic_code, is_primary
-            FROM headnotes
-            WHERE document_id = %s
-            ORDER BY sequence ASC
-            """,
-            [doc_id],
-        )
-        headnotes = cursor.fetchall()
+    detail = {
+        "id": row[0],
+        "case_name": row[1],
+        "citation": row[2],
+        "decision_date": row[3].isoformat() if row[3] else None,
+        "court": row[4],
+        "precedential_status": row[5],
+        "summary": row[6],
+        "cited_by_count": row[7] or 0,
+        "validity": {
+            "status": row[8],
+            "positive_citations": row[9] or 0,
+            "negative_citations": row[10] or 0,
+            "overruling_citations": row[11] or 0,
+            "status_reason": row[12] or "",
+        },
+        "holdings": [
+            {"legal_issue": h.get("legal_issue"), "rule": h.get("rule"), "is_primary": h.get("is_primary")}
+            for h in _json_rows(row[13])
+        ],
+        "headnotes": [
+            {
+                "title": h.get("title"),
+                "text": h.get("text"),
+                "topic_code": h.get("topic_code"),
+                "is_primary": h.get("is_primary"),
+            }
+            for h in _json_rows(row[14])
+        ],
+        "full_text_chars": row[15] or 0,
+    }
+    _CASE_DETAIL_CACHE.set(doc_id, detail)
+    _IMMCITE_CACHE.set(doc_id, _immcite_payload(doc_id, (doc_id, *row[8:13])))
+    return detail
 
+
+def case_full_text(doc_id, *, offset=0, limit=CASE_TEXT_PAGE_CHARS):
+    """One page of a decision's full text, sliced in the database."""
+    offset = max(0, int(offset))
+    limit = max(1, min(int(limit), CASE_TEXT_MAX_PAGE_CHARS))
+    with _biaedge_cursor("case_full_text") as cursor:
         cursor.execute(
             """
-            SELECT full_text
+            SELECT substr(full_text, %s, %s), char_length(full_text)
             FROM document_texts
             WHERE document_id = %s
             """,
-            [doc_id],
+            [offset + 1, limit, doc_id],
         )
-        full_text = cursor.fetchone()
+        row = cursor.fetchone()
+    if not row:
+        return None
 
+    text = row[0] or ""
+    total = row[1] or 0
+    next_offset = offset + len(text)
     return {
-        "id": doc[0],
-        "case_name": doc[1],
-        "citation": doc[2],
-        "decision_date": doc[3].isoformat() if doc[3] else None,
-        "court": doc[4],
-        "precedential_status": doc[5],
-        "summary": doc[6],
-        "cited_by_count": doc[7] or 0,
-        "validity": {
-            "status": validity[0] if validity else None,
-            "positive_citations": validity[1] if validity else 0,
-            "negative_citations": validity[2] if validity else 0,
-            "overruling_citations": validity[3] if validity else 0,
-            "status_reason": validity[4] if validity else "",
-        },
-        "holdings": [
-            {"legal_issue": h[0], "rule": h[1], "is_primary": h[2]} for h in holdings
-        ],
-        "headnotes": [
-            {"title": h[0], "text": h[1], "topic_code": h[2], "is_primary": h[3]}
-            for h in headnotes
-        ],
-        "full_text": full_text[0] if full_text else "",
+        "document_id": int(doc_id),
+        "offset": offset,
+        "limit": limit,
+        "total_chars": total,
+        "text": text,
+        "next_offset": next_offset if next_offset < total else None,
     }
 
 
+def invalidate_case_detail_cache(doc_ids=None):
+    _CASE_DETAIL_CACHE.invalidate(None if doc_ids is None else [int(doc_id) for doc_id in doc_ids])
+
+
+def _json_rows(value):
+    if isinstance(value, str):
+        value = json.loads(value or "[]")
+    return [item for item in value or [] if isinstance(item, dict)]
+
+
 def similar_cases(doc_id):
+    return _SIMILAR_CASES_CACHE.get_or_set(int(doc_id), lambda: _similar_cases_uncached(doc_id))
+
+
+def invalidate_similar_cases_cache(doc_ids=None):
+    _SIMILAR_CASES_CACHE.invalidate(None if doc_ids is None else [int(doc_id) for doc_id in doc_ids])
+
+
+def _similar_cases_uncached(doc_id, limit=10):
+    # Each primary holding gets its own ORDER BY distance LIMIT k probe so pgvector can
+    # answer it from an HNSW/IVFFlat index; the source case and repeat documents are
+    # dropped afterwards, which is why the probe over-fetches.
     sql = """
-        SELECT DISTINCT ON (h2.document_id)
-               h2.document_id, d.case_name, d.citation, d.decision_date,
-               h2.legal_issue, h2.rule,
-               1 - (he2.embedding <=> he1.embedding) as similarity
+        SELECT h2.document_id, d.case_name, d.citation, d.decision_date,
+               h2.legal_issue, h2.rule, nn.similarity
         FROM holding_embeddings he1
         JOIN holdings h1 ON h1.id = he1.holding_id
-        JOIN holding_embeddings he2 ON he2.id != he1.id
-        JOIN holdings h2 ON h2.id = he2.holding_id
+        CROSS JOIN LATERAL (
+            SELECT he2.holding_id,
+                   1 - (he2.embedding <=> he1.embedding) as similarity
+            FROM holding_embeddings he2
+            ORDER BY he2.embedding <=> he1.embedding
+            LIMIT %s
+        ) nn
+        JOIN holdings h2 ON h2.id = nn.holding_id
         JOIN documents d ON d.id = h2.document_id
         WHERE h1.document_id = %s
           AND h1.is_primary = true
           AND h2.document_id != %s
-          AND 1 - (he2.embedding <=> he1.embedding) > 0.6
-        ORDER BY h2.document_id, similarity DESC
-        LIMIT 10;
+          AND nn.similarity > %s
+        ORDER BY nn.similarity DESC;
     """
-    with connections["biaedge"].cursor() as cursor:
-        cursor.execute(sql, [doc_id, doc_id])
+    with _biaedge_cursor("similar_cases") as cursor:
+        cursor.execute(sql, [SIMILAR_CASES_PROBE_SIZE, doc_id, doc_id, SIMILAR_CASES_MIN_SIMILARITY])
         rows = cursor.fetchall()
 
-    return [
-        {
-            "document_id": row[0],
-            "case_name": row[1],
-            "citation": row[2],
-            "decision_date": row[3].isoformat() if row[3] else None,
-            "legal_issue": row[4],
-            "holding": row[5],
-            "similarity": float(row[6] or 0),
-        }
-        for row in rows
-    ]
+    results = []
+    seen = set()
+    for row in rows:
+        if row[0] in seen:
+            continue
+        seen.add(row[0])
+        results.append(
+            {
+                "document_id": row[0],
+                "case_name": row[1],
+                "citation": row[2],
+                "decision_date": row[3].isoformat() if row[3] else None,
+                "legal_issue": row[4],
+                "holding": row[5],
+                "similarity": float(row[6] or 0),
+            }
+        )
+        if len(results) >= limit:
+            break
+    return results
@@ -2,10 +2,14 @@ import json
 
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_GET, require_POST
 
-from .biaedge_models import BiaCategory
 from . import research_service
+from .embedding_service import embedding_cache_stats
+from .models import Document
 
 
 @login_required
@@ -22,21 +26,49 @@ def suggest_case_law(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@login_required
+@require_POST
+def suggest_case_law_for_document(request, doc_id):
+    document = get_object_or_404(Document, id=doc_id, created_by=request.user)
+    try:
+        suggestions = research_service.suggest_case_law_for_document(document.content)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+    return JsonResponse(suggestions)
+
+
 @login_required
 @require_GET
 def list_categories(request):
-    categories = BiaCategory.objects.using("biaedge").filter(enabled=True).order_by("display_order")
+    return JsonResponse({"categories": research_service.research_categories()})
+
+
+def _category_page_response(request, category):
+    page_size = research_service.CATEGORY_PAGE_SIZE
+    try:
+        page = int(request.GET.get("page", 1))
+        listing = research_service.category_cases_page(
+            category["id"],
+            cursor=request.GET.get("cursor") or None,
+            page=page,
+            page_size=page_size,
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    total = category.get("case_count")
     return JsonResponse(
         {
-            "categories": [
-                {
-                    "id": c.id,
-                    "name": c.name,
-                    "slug": c.slug,
-                    "description": c.description,
-                }
-                for c in categories
-            ]
+            "category": {
+                "id": category["id"],
+                "name": category["name"],
+                "slug": category["slug"],
+                "description": category["description"],
+            },
+            "results": listing["results"],
+            "page": page,
+            "next_cursor": listing["next_cursor"],
+            "total_count": total,
+            "page_count": -(-total // page_size) if total is not None else None,
         }
     )
 
@@ -44,31 +76,22 @@ def list_categories(request):
 @login_required
 @require_GET
 def category_cases(request, category_id):
-    page = int(request.GET.get("page", 1))
-    results = research_service.category_cases(category_id, page=page)
-    return JsonResponse({"results": results, "page": page})
+    category = next(
+        (item for item in research_service.research_categories() if item["id"] == category_id),
+        None,
+    )
+    if not category:
+        category = {"id": category_id, "name": "", "slug": "", "description": "", "case_count": None}
+    return _category_page_response(request, category)
 
 
 @login_required
 @require_GET
 def category_cases_by_slug(request, slug):
-    category = BiaCategory.objects.using("biaedge").filter(slug=slug, enabled=True).first()
+    category = research_service.category_by_slug(slug)
     if not category:
         return JsonResponse({"error": "Category not found"}, status=404)
-    page = int(request.GET.get("page", 1))
-    results = research_service.category_cases(category.id, page=page)
-    return JsonResponse(
-        {
-            "category": {
-                "id": category.id,
-                "name": category.name,
-                "slug": category.slug,
-                "description": category.description,
-            },
-            "results": results,
-            "page": page,
-        }
-    )
+    return _category_page_response(request, category)
 
 
 @login_required
@@ -77,9 +100,25 @@ def case_detail(request, doc_id):
     detail = research_service.case_detail(doc_id)
     if not detail:
         return JsonResponse({"error": "Case not found"}, status=404)
+    detail["full_text_url"] = reverse("research_case_text", kwargs={"doc_id": doc_id})
     return JsonResponse(detail)
 
 
+@login_required
+@require_GET
+@gzip_page
+def case_full_text(request, doc_id):
+    try:
+        offset = int(request.GET.get("offset") or 0)
+        limit = int(request.GET.get("limit") or research_service.CASE_TEXT_PAGE_CHARS)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "offset and limit must be integers"}, status=400)
+    page = research_service.case_full_text(doc_id, offset=offset, limit=limit)
+    if page is None:
+        return JsonResponse({"error": "Case text not found"}, status=404)
+    return JsonResponse(page)
+
+
 @login_required
 @require_GET
 def similar_cases(request, doc_id):
@@ -94,6 +133,33 @@ def immcite_status(request, doc_id):
     return JsonResponse(status)
 
 
+@login_required
+@require_POST
+def immcite_status_batch(request):
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+    raw_ids = data.get("document_ids") or []
+    if not isinstance(raw_ids, list):
+        return JsonResponse({"error": "document_ids must be a list of integers"}, status=400)
+    try:
+        doc_ids = [int(doc_id) for doc_id in raw_ids]
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "document_ids must be a list of integers"}, status=400)
+    if not doc_ids:
+        return JsonResponse({"error": "document_ids is required"}, status=400)
+    if len(doc_ids) > research_service.IMMCITE_BATCH_LIMIT:
+        return JsonResponse(
+            {"error": f"At most {research_service.IMMCITE_BATCH_LIMIT} document_ids are allowed per request"},
+            status=400,
+        )
+    statuses = research_service.immcite_statuses(doc_ids)
+    return JsonResponse({"results": list(statuses.values())})
+
+
 @login_required
 @require_POST
 def ask_question(request):
@@ -102,9 +168,22 @@ def ask_question(request):
         question = (data.get("question") or "").strip()
         if not question:
             return JsonResponse({"error": "question is required"}, status=400)
-        result = research_service.ask_question(question)
+        result = research_service.ask_question(question, refresh=bool(data.get("refresh")))
         return JsonResponse(result)
     except ValueError as e:
         return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@login_required
+@require_GET
+def query_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff access required"}, status=403)
+    return JsonResponse(
+        {
+            "queries": research_service.biaedge_query_stats(),
+            "embedding_cache": embedding_cache_stats(),
+        }
+    )
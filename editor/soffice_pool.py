@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import uno
+except Exception:  # pragma: no cover - only present alongside a LibreOffice install
+    uno = None
+
+logger = logging.getLogger(__name__)
+
+SOFFICE_POOL_SIZE = max(1, int(os.environ.get("SOFFICE_POOL_SIZE", "2")))
+# Long-lived LibreOffice processes slowly leak memory, so each one is restarted
+# after this many conversions.
+SOFFICE_POOL_MAX_JOBS = max(1, int(os.environ.get("SOFFICE_POOL_MAX_JOBS", "50")))
+SOFFICE_RENDER_TIMEOUT_SECONDS = float(os.environ.get("SOFFICE_RENDER_TIMEOUT_SECONDS", "60"))
+SOFFICE_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.environ.get("SOFFICE_POOL_ACQUIRE_TIMEOUT_SECONDS", "30"))
+SOFFICE_START_TIMEOUT_SECONDS = 30.0
+
+_POOLS: dict[str, "SofficeRenderPool"] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class SofficeRenderError(Exception):
+    pass
+
+
+class SofficeWorker:
+    """One LibreOffice profile slot.
+
+    With the UNO bridge available the slot keeps a headless soffice listening on a
+    private pipe and converts documents through it. Without it, each conversion is
+    still a one-shot ``soffice --convert-to`` call, but it reuses the slot's warm
+    profile instead of creating a new one under /tmp.
+    """
+
+    def __init__(self, binary: str, slot: int) -> None:
+        self.binary = binary
+        self.slot = slot
+        self.pipe_name = f"chlf_soffice_{os.getpid()}_{slot}"
+        self.profile_dir = Path(tempfile.gettempdir()) / "chlf_soffice_pool" / f"{os.getpid()}-{slot}"
+        self.jobs = 0
+        self.process = None
+        self.desktop = None
+
+    @property
+    def uses_uno(self) -> bool:
+        return uno_available()
+
+    def healthy(self) -> bool:
+        if not self.uses_uno or self.process is None:
+            return True
+        if self.process.poll() is not None:
+            return False
+        try:
+            self.desktop.getComponents()
+        except Exception:
+            return False
+        return True
+
+    def convert(self, input_path: Path, output_path: Path, *, timeout: float) -> None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.jobs += 1
+        if self.uses_uno:
+            self._convert_over_uno(input_path, output_path, timeout=timeout)
+        else:
+            self._convert_with_profile(input_path, output_path, timeout=timeout)
+
+    def stop(self) -> None:
+        self.desktop = None
+        process, self.process = self.process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait(timeout=5)
+
+    def discard(self) -> None:
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def _profile_url(self) -> str:
+        return self.profile_dir.resolve().as_uri()
+
+    def _convert_with_profile(self, input_path: Path, output_path: Path, *, timeout: float) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        command = [
+            self.binary,
+            f"-env:UserInstallation={self._profile_url()}",
+            "--headless",
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            str(output_path.parent),
+            str(input_path),
+        ]
+        try:
+            result = subprocess.run(
+                command,
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired as exc:
+            raise SofficeRenderError("LibreOffice rendering timed out.") from exc
+        expected_path = output_path.parent / f"{input_path.stem}.pdf"
+        if result.returncode != 0 or not expected_path.exists():
+            raise SofficeRenderError(
+                (result.stderr or result.stdout or "LibreOffice failed to render the DOCX.").strip()
+            )
+        if expected_path != output_path:
+            shutil.move(str(expected_path), str(output_path))
+
+    def _convert_over_uno(self, input_path: Path, output_path: Path, *, timeout: float) -> None:
+        if self.process is None:
+            self._start()
+        # UNO calls block without a deadline; killing the process makes them raise.
+        watchdog = threading.Timer(timeout, self._kill)
+        watchdog.daemon = True
+        watchdog.start()
+        component = None
+        try:
+            component = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(input_path.resolve())),
+                "_blank",
+                0,
+                (_property("Hidden", True),),
+            )
+            if component is None:
+                raise SofficeRenderError("LibreOffice could not open the DOCX.")
+            component.storeToURL(
+                uno.systemPathToFileUrl(str(output_path.resolve())),
+                (_property("FilterName", "writer_pdf_Export"),),
+            )
+        except SofficeRenderError:
+            raise
+        except Exception as exc:
+            if not watchdog.is_alive():
+                raise SofficeRenderError("LibreOffice rendering timed out.") from exc
+            raise SofficeRenderError(f"LibreOffice failed to render the DOCX: {exc}") from exc
+        finally:
+            watchdog.cancel()
+            if component is not None:
+                try:
+                    component.close(True)
+                except Exception:
+                    pass
+        if not output_path.exists():
+            raise SofficeRenderError("LibreOffice failed to render the DOCX.")
+
+    def _start(self) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.process = subprocess.Popen(
+            [
+                self.binary,
+                f"-env:UserInstallation={self._profile_url()}",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver",
+            local_context,
+        )
+        deadline = time.monotonic() + SOFFICE_START_TIMEOUT_SECONDS
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except Exception as exc:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise SofficeRenderError("LibreOffice did not start in time.") from exc
+                time.sleep(0.25)
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def _kill(self) -> None:
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+
+class SofficeRenderPool:
+    """Bounded set of warm LibreOffice workers shared by every render in the process."""
+
+    def __init__(self, binary: str, *, size: int = SOFFICE_POOL_SIZE, max_jobs: int = SOFFICE_POOL_MAX_JOBS) -> None:
+        self.binary = binary
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = [SofficeWorker(binary, slot) for slot in range(self.size)]
+
+    def render(self, input_path: Path, output_path: Path, *, timeout: float = SOFFICE_RENDER_TIMEOUT_SECONDS) -> None:
+        if not self._slots.acquire(timeout=SOFFICE_POOL_ACQUIRE_TIMEOUT_SECONDS):
+            raise SofficeRenderError("All LibreOffice render workers are busy.")
+        worker = self._checkout()
+        try:
+            if not worker.healthy():
+                logger.warning("Restarting unhealthy LibreOffice worker", extra={"slot": worker.slot})
+                worker = self._replace(worker)
+            try:
+                worker.convert(Path(input_path), Path(output_path), timeout=timeout)
+            except SofficeRenderError:
+                worker = self._replace(worker)
+                raise
+            if worker.jobs >= self.max_jobs:
+                worker = self._replace(worker)
+        finally:
+            self._checkin(worker)
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._idle:
+                worker.discard()
+
+    def _checkout(self) -> SofficeWorker:
+        with self._lock:
+            return self._idle.pop()
+
+    def _checkin(self, worker: SofficeWorker) -> None:
+        with self._lock:
+            self._idle.append(worker)
+
+    def _replace(self, worker: SofficeWorker) -> SofficeWorker:
+        worker.stop()
+        return SofficeWorker(self.binary, worker.slot)
+
+
+def uno_available() -> bool:
+    return uno is not None
+
+
+def get_soffice_pool(binary: str) -> SofficeRenderPool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(binary)
+        if pool is None:
+            pool = SofficeRenderPool(binary)
+            _POOLS[binary] = pool
+        return pool
+
+
+def shutdown_soffice_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _property(name: str, value):
+    prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+atexit.register(shutdown_soffice_pools)
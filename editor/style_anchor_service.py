@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+import copy
+from dataclasses import dataclass, field
+import os
 from pathlib import Path
 import re
+import threading
 
 from django.conf import settings
 
@@ -12,6 +16,10 @@ DEFAULT_COVER_LETTER_STYLE_FILENAME = "Cadeau I-612 Cover Letter.docx"
 DATE_PATTERN = re.compile(
     r"^\s*(\[[Dd]ate\]|[A-Z][a-z]+ \d{1,2}, \d{4}|\d{1,2}/\d{1,2}/\d{2,4})"
 )
+STYLE_ANCHOR_CACHE_SIZE = max(0, int(os.environ.get("STYLE_ANCHOR_CACHE_SIZE", "16")))
+
+_PARSED_ANCHOR_CACHE = OrderedDict()
+_PARSED_ANCHOR_LOCK = threading.Lock()
 
 
 @dataclass
@@ -22,6 +30,85 @@ class ResolvedStyleAnchor:
     style_family: str
     metadata: dict
     exemplar_id: int | None = None
+    version: str = ""
+
+
+@dataclass
+class ParsedStyleAnchor:
+    """A style-anchor DOCX parsed once per process.
+
+    ``sample_doc`` is the untouched anchor and must be treated as read-only;
+    ``new_document`` hands out a private copy of the anchor with its body
+    cleared, ready to be filled in.
+    """
+
+    sample_doc: object
+    template_doc: object
+    structure: dict
+    _derived: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def new_document(self):
+        with self._lock:
+            return copy.deepcopy(self.template_doc)
+
+    def memoize(self, key, factory):
+        """Cache a value derived from ``sample_doc`` for as long as this anchor is cached."""
+        with self._lock:
+            if key in self._derived:
+                return self._derived[key]
+        value = factory()
+        with self._lock:
+            return self._derived.setdefault(key, value)
+
+
+def load_parsed_style_anchor(file_path: str, *, version: str = "") -> ParsedStyleAnchor:
+    """Parsed anchor for ``file_path``, reused until the file or its exemplar changes.
+
+    ``version`` is the owning exemplar's ``updated_at`` so a re-uploaded anchor
+    that lands on the same path with the same mtime is still picked up.
+    """
+    resolved = os.path.realpath(file_path)
+    stat = os.stat(resolved)
+    key = (resolved, stat.st_mtime_ns, stat.st_size, version or "")
+    with _PARSED_ANCHOR_LOCK:
+        parsed = _PARSED_ANCHOR_CACHE.get(key)
+        if parsed is not None:
+            _PARSED_ANCHOR_CACHE.move_to_end(key)
+            return parsed
+
+    parsed = _parse_style_anchor(resolved)
+    if not STYLE_ANCHOR_CACHE_SIZE:
+        return parsed
+    with _PARSED_ANCHOR_LOCK:
+        for stale_key in [item for item in _PARSED_ANCHOR_CACHE if item[0] == resolved and item != key]:
+            del _PARSED_ANCHOR_CACHE[stale_key]
+        parsed = _PARSED_ANCHOR_CACHE.setdefault(key, parsed)
+        _PARSED_ANCHOR_CACHE.move_to_end(key)
+        while len(_PARSED_ANCHOR_CACHE) > STYLE_ANCHOR_CACHE_SIZE:
+            _PARSED_ANCHOR_CACHE.popitem(last=False)
+    return parsed
+
+
+def clear_style_anchor_cache() -> None:
+    with _PARSED_ANCHOR_LOCK:
+        _PARSED_ANCHOR_CACHE.clear()
+
+
+def _parse_style_anchor(file_path: str) -> ParsedStyleAnchor:
+    from docx.oxml.ns import qn
+
+    sample_doc = _load_docx_document(file_path)
+    template_doc = copy.deepcopy(sample_doc)
+    body = template_doc._element.body
+    for child in list(body):
+        if child.tag != qn("w:sectPr"):
+            body.remove(child)
+    return ParsedStyleAnchor(
+        sample_doc=sample_doc,
+        template_doc=template_doc,
+        structure=_style_anchor_structure(sample_doc),
+    )
 
 
 def _load_docx_document(file_path: str):
@@ -89,7 +176,10 @@ def _first_paragraph_with_indent(items):
 
 
 def extract_style_anchor_structure(file_path: str) -> dict:
-    doc = _load_docx_document(file_path)
+    return copy.deepcopy(load_parsed_style_anchor(file_path).structure)
+
+
+def _style_anchor_structure(doc) -> dict:
     items = _non_empty_paragraphs(doc)
     if not items:
         return {}
@@ -185,11 +275,7 @@ def _default_cover_letter_anchor_path() -> Path | None:
     return None
 
 
-def resolve_style_anchor_for_document(*, user, document, export_format: str) -> ResolvedStyleAnchor | None:
-    style_family = infer_style_family(export_format=export_format, document_type=document.document_type)
-    if not style_family:
-        return None
-
+def _select_style_anchor_exemplar(*, user, document, style_family: str):
     from .models import Exemplar
 
     document_metadata = getattr(document, "metadata", {}) or {}
@@ -205,21 +291,7 @@ def resolve_style_anchor_for_document(*, user, document, export_format: str) ->
             .first()
         )
         if explicit and explicit.original_file and explicit.original_file.name.lower().endswith(".docx"):
-            metadata = dict(explicit.metadata or {})
-            structure = metadata.get("style_anchor_structure")
-            if not structure:
-                structure = extract_style_anchor_structure(explicit.original_file.path)
-                metadata["style_anchor_structure"] = structure
-                explicit.metadata = metadata
-                explicit.save(update_fields=["metadata", "updated_at"])
-            return ResolvedStyleAnchor(
-                path=explicit.original_file.path,
-                source="document_override",
-                exemplar_id=explicit.id,
-                title=explicit.title,
-                style_family=explicit.style_family or style_family,
-                metadata=metadata,
-            )
+            return explicit, "document_override"
 
     exemplar = (
         Exemplar.objects.filter(
@@ -232,6 +304,44 @@ def resolve_style_anchor_for_document(*, user, document, export_format: str) ->
         .first()
     )
     if exemplar and exemplar.original_file:
+        return exemplar, "database"
+    return None, ""
+
+
+def style_anchor_identity(*, user, document, export_format: str) -> dict | None:
+    """Which anchor ``resolve_style_anchor_for_document`` would pick, without parsing any DOCX."""
+    style_family = infer_style_family(export_format=export_format, document_type=document.document_type)
+    if not style_family:
+        return None
+
+    exemplar, source = _select_style_anchor_exemplar(user=user, document=document, style_family=style_family)
+    if exemplar is not None:
+        return {
+            "source": source,
+            "exemplar_id": exemplar.id,
+            "updated_at": exemplar.updated_at.isoformat(),
+            "file": exemplar.original_file.name,
+        }
+
+    fallback_path = _default_cover_letter_anchor_path()
+    if not fallback_path:
+        return None
+    stat = fallback_path.stat()
+    return {
+        "source": "filesystem",
+        "file": str(fallback_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+
+
+def resolve_style_anchor_for_document(*, user, document, export_format: str) -> ResolvedStyleAnchor | None:
+    style_family = infer_style_family(export_format=export_format, document_type=document.document_type)
+    if not style_family:
+        return None
+
+    exemplar, source = _select_style_anchor_exemplar(user=user, document=document, style_family=style_family)
+    if exemplar is not None:
         metadata = dict(exemplar.metadata or {})
         structure = metadata.get("style_anchor_structure")
         if not structure and exemplar.original_file.name.lower().endswith(".docx"):
@@ -241,11 +351,12 @@ def resolve_style_anchor_for_document(*, user, document, export_format: str) ->
             exemplar.save(update_fields=["metadata", "updated_at"])
         return ResolvedStyleAnchor(
             path=exemplar.original_file.path,
-            source="database",
+            source=source,
             exemplar_id=exemplar.id,
             title=exemplar.title,
-            style_family=style_family,
+            style_family=(exemplar.style_family or style_family) if source == "document_override" else style_family,
             metadata=metadata,
+            version=exemplar.updated_at.isoformat(),
         )
 
     fallback_path = _default_cover_letter_anchor_path()
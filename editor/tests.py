@@ -1,19 +1,31 @@
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from datetime import timedelta
 from io import BytesIO
 from pathlib import Path
 from types import SimpleNamespace
+import copy
+import hashlib
+import os
 import shutil
 import tempfile
+import threading
+import time
+import zipfile
 
 from django.contrib.auth.models import User
 from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from docx import Document as DocxDocument
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Inches
 
+from .agent_executor import advance_active_runs, claim_active_runs, has_pending_runs
 from .agent_service import (
     AGENT_FINALIZATION_MAX_OUTPUT_TOKENS,
     AGENT_FINALIZATION_REASONING_EFFORT,
@@ -30,24 +42,65 @@ from .agent_service import (
     _request_requirements_block,
     _requested_full_text_sources,
 )
-from .export import tiptap_to_docx, tiptap_to_html
-from .import_service import import_docx_package, import_docx_to_tiptap
+from .document_schema import normalize_document_content, replace_top_level_block_text
+from .docx_stream import tiptap_to_docx_streamed
+from .embedding_service import clear_embedding_cache, embedding_cache_stats
+from .exemplar_service import (
+    generate_document_embedding,
+    generate_embedding,
+    get_exemplar_index,
+    search_exemplars,
+)
+from .ingestion_service import claim_ingestion_jobs, process_ingestion_job
+from .export import clear_pdf_export_cache, tiptap_to_docx, tiptap_to_html, tiptap_to_pdf
+from .import_service import import_docx_package, import_docx_package_cached, import_docx_to_tiptap
 from .models import (
     Document,
     DocumentClientFile,
     DocumentResearchMessage,
     DocumentResearchRun,
+    DocumentResearchRunEvent,
     DocumentResearchSession,
     DocumentVersion,
     DocumentType,
+    DocxImport,
+    EmbeddingCacheEntry,
     Exemplar,
+    IngestionJob,
     WritingWorkspace,
     WorkspaceResearchMessage,
     WorkspaceResearchRun,
     WorkspaceResearchSession,
 )
 from .openai_file_service import analyze_client_file_with_input_file, sync_client_file_openai_index
-from .proof_service import ProofRenderError, SofficeRenderBackend, render_document_proof
+from .proof_service import (
+    ProofRenderError,
+    SofficeRenderBackend,
+    build_document_docx_artifact,
+    ensure_proof_page_image,
+    evict_proof_cache,
+    render_document_proof,
+    render_exemplar_preview,
+)
+from .render_pool import RenderPool, RenderPoolBusyError, RenderPoolError
+from .research_service import (
+    _biaedge_cursor,
+    _extract_query_features,
+    ask_question,
+    case_detail,
+    generate_query_embedding,
+    invalidate_answer_cache,
+    invalidate_case_detail_cache,
+    invalidate_category_cache,
+    invalidate_immcite_cache,
+    invalidate_similar_cases_cache,
+    reset_biaedge_query_stats,
+    similar_cases,
+    suggest_case_law,
+)
+from .soffice_pool import SofficeRenderPool
+from .style_anchor_service import _load_docx_document, clear_style_anchor_cache
+from .version_store import create_version, delete_versions, invalidate_version_cache, version_content
 
 
 def _sample_tiptap(text):
@@ -280,7 +333,7 @@ class AgentResearchViewsTests(TestCase):
             "OPENAI_API_KEY is not configured.",
         )
 
-    @patch("editor.agent_views.DocumentResearchAgent")
+    @patch("editor.agent_executor.DocumentResearchAgent")
     def test_agent_run_status_persists_completed_chat_message(self, agent_cls):
         agent = agent_cls.return_value
         session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
@@ -295,6 +348,7 @@ class AgentResearchViewsTests(TestCase):
             mode="chat",
             status="in_progress",
             stage="waiting_openai",
+            response_id="resp_chat_pending",
             user_message=user_message,
         )
 
@@ -315,6 +369,7 @@ class AgentResearchViewsTests(TestCase):
 
         agent.advance_run.side_effect = fake_advance_run
 
+        self.assertEqual(advance_active_runs(worker_id="test-executor"), 1)
         response = self.client.get(
             reverse("research_agent_run", kwargs={"run_id": run.public_id})
         )
@@ -417,7 +472,7 @@ class AgentResearchViewsTests(TestCase):
         self.assertEqual(payload["run"]["status"], "in_progress")
         self.assertEqual(payload["run"]["response_id"], "resp_suggest_1")
 
-    @patch("editor.agent_views.DocumentResearchAgent")
+    @patch("editor.agent_executor.DocumentResearchAgent")
     def test_agent_run_status_returns_completed_suggest_payload(self, agent_cls):
         agent = agent_cls.return_value
         session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
@@ -426,6 +481,7 @@ class AgentResearchViewsTests(TestCase):
             mode="suggest",
             status="in_progress",
             stage="waiting_openai",
+            response_id="resp_suggest_pending",
         )
 
         def fake_advance_run(*, run):
@@ -460,6 +516,7 @@ class AgentResearchViewsTests(TestCase):
 
         agent.advance_run.side_effect = fake_advance_run
 
+        self.assertEqual(advance_active_runs(worker_id="test-executor"), 1)
         response = self.client.get(
             reverse("research_agent_run", kwargs={"run_id": run.public_id})
         )
@@ -500,7 +557,7 @@ class AgentResearchViewsTests(TestCase):
         self.assertEqual(payload["run"]["status"], "in_progress")
         self.assertEqual(payload["run"]["response_id"], "resp_edit_1")
 
-    @patch("editor.agent_views.DocumentResearchAgent")
+    @patch("editor.agent_executor.DocumentResearchAgent")
     def test_agent_run_status_returns_completed_edit_payload(self, agent_cls):
         agent = agent_cls.return_value
         session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
@@ -509,6 +566,7 @@ class AgentResearchViewsTests(TestCase):
             mode="edit",
             status="in_progress",
             stage="waiting_openai",
+            response_id="resp_edit_pending",
         )
 
         def fake_advance_run(*, run):
@@ -535,6 +593,7 @@ class AgentResearchViewsTests(TestCase):
 
         agent.advance_run.side_effect = fake_advance_run
 
+        self.assertEqual(advance_active_runs(worker_id="test-executor"), 1)
         response = self.client.get(
             reverse("research_agent_run", kwargs={"run_id": run.public_id})
         )
@@ -545,6 +604,129 @@ class AgentResearchViewsTests(TestCase):
         self.assertEqual(payload["edit_result"]["operation"], "replace_selection")
         self.assertIn("legal standard first", payload["edit_result"]["rationale"])
 
+    @patch("editor.agent_views.DocumentResearchAgent")
+    def test_agent_run_status_reads_active_run_without_advancing(self, agent_cls):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        run = DocumentResearchRun.objects.create(
+            session=session,
+            mode="suggest",
+            status="in_progress",
+            stage="waiting_openai",
+            response_id="resp_suggest_pending",
+        )
+
+        response = self.client.get(
+            reverse("research_agent_run", kwargs={"run_id": run.public_id})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["run"]["status"], "in_progress")
+        agent_cls.assert_not_called()
+
+    def test_claim_active_runs_skips_leased_and_unstarted_runs(self):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        DocumentResearchRun.objects.create(session=session, mode="suggest", status="queued", stage="queued")
+        claimable = DocumentResearchRun.objects.create(
+            session=session,
+            mode="suggest",
+            status="in_progress",
+            stage="waiting_openai",
+            response_id="resp_claimable",
+        )
+        DocumentResearchRun.objects.create(
+            session=session,
+            mode="edit",
+            status="in_progress",
+            stage="waiting_openai",
+            response_id="resp_leased",
+            lease_owner="other-worker",
+            lease_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        claimed = claim_active_runs(worker_id="worker-a", limit=5)
+
+        self.assertEqual([run.id for run in claimed], [claimable.id])
+        claimable.refresh_from_db()
+        self.assertEqual(claimable.lease_owner, "worker-a")
+        self.assertEqual(claim_active_runs(worker_id="worker-b", limit=5), [])
+
+    def test_unstarted_runs_past_the_start_timeout_are_failed_and_stop_counting_as_pending(self):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        orphaned = DocumentResearchRun.objects.create(session=session, mode="suggest", status="queued", stage="queued")
+        DocumentResearchRun.objects.filter(id=orphaned.id).update(created_at=timezone.now() - timedelta(hours=1))
+
+        self.assertFalse(has_pending_runs())
+        self.assertEqual(advance_active_runs(worker_id="test-executor"), 0)
+
+        orphaned.refresh_from_db()
+        self.assertEqual(orphaned.status, "failed")
+        self.assertIn("interrupted", orphaned.error_message)
+
+        DocumentResearchRun.objects.create(session=session, mode="suggest", status="queued", stage="queued")
+        self.assertTrue(has_pending_runs())
+
+    def test_agent_run_stream_replays_events_after_last_event_id_and_finishes(self):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        run = DocumentResearchRun.objects.create(
+            session=session,
+            mode="suggest",
+            status="completed",
+            stage="completed",
+            response_id="resp_suggest_done",
+            result_payload={"selection_summary": "Nexus support."},
+        )
+        first = DocumentResearchRunEvent.objects.create(run=run, kind="phase", payload={"phase": "researching"})
+        DocumentResearchRunEvent.objects.create(run=run, kind="tool_call", payload={"name": "search_cases"})
+        DocumentResearchRunEvent.objects.create(run=run, kind="result", payload={"status": "completed"})
+
+        response = self.client.get(
+            reverse("research_agent_run_stream", kwargs={"run_id": run.public_id}),
+            HTTP_LAST_EVENT_ID=str(first.id),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join(response.streaming_content).decode()
+        self.assertNotIn('"researching"', body)
+        self.assertIn("event: tool_call", body)
+        self.assertLess(body.index("event: result"), body.index("event: done"))
+        self.assertIn('"selection_summary": "Nexus support."', body)
+
+    @patch("editor.agent_views.wait_for_run_events")
+    @patch("editor.agent_views.AGENT_STREAM_MAX_SECONDS", 0)
+    def test_agent_run_stream_closes_after_its_window_so_the_client_reconnects(self, _wait_for_run_events):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        run = DocumentResearchRun.objects.create(
+            session=session,
+            mode="suggest",
+            status="in_progress",
+            stage="waiting_openai",
+            response_id="resp_suggest_running",
+        )
+
+        response = self.client.get(reverse("research_agent_run_stream", kwargs={"run_id": run.public_id}))
+
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("event: snapshot", body)
+        self.assertNotIn("event: done", body)
+        self.assertNotIn("event: timeout", body)
+
+    @patch("editor.agent_service._new_openai_client")
+    def test_agent_records_phase_tool_call_and_result_events(self, new_client):
+        session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
+        run = DocumentResearchRun.objects.create(session=session, mode="suggest", status="in_progress", stage="queued")
+        agent = DocumentResearchAgent(document=self.document, user=self.user)
+
+        agent._set_run_phase(run=run, phase="researching", stage="waiting_openai")
+        agent._set_run_phase(run=run, phase="researching", stage="waiting_openai")
+        agent._merge_run_tool_calls(run, [{"source": "biaedge", "type": "mcp_call", "name": "search_cases"}])
+        agent._merge_run_tool_calls(run, [{"source": "biaedge", "type": "mcp_call", "name": "search_cases"}])
+        agent._mark_run_completed(run, result_payload={"selection_summary": "Done."}, response=SimpleNamespace(id="resp_1"))
+
+        kinds = list(run.events.values_list("kind", flat=True))
+        self.assertEqual(kinds, ["phase", "tool_call", "phase", "result"])
+        self.assertEqual(run.events.get(kind="result").payload["result"], {"selection_summary": "Done."})
+
     def test_agent_apply_edit_snapshots_current_content_and_saves_new_content(self):
         session = DocumentResearchSession.objects.create(document=self.document, user=self.user)
         run = DocumentResearchRun.objects.create(
@@ -588,15 +770,27 @@ class AgentResearchViewsTests(TestCase):
             content_type="text/plain",
         )
 
-        upload_response = self.client.post(
-            reverse("document_client_file_upload", kwargs={"doc_id": self.document.id}),
-            data={"file": upload, "title": "Police Report"},
-        )
+        with patch("editor.ingestion_service.INGESTION_EXECUTOR", "inline"):
+            with self.captureOnCommitCallbacks(execute=True):
+                upload_response = self.client.post(
+                    reverse("document_client_file_upload", kwargs={"doc_id": self.document.id}),
+                    data={"file": upload, "title": "Police Report"},
+                )
 
-        self.assertEqual(upload_response.status_code, 200)
+        self.assertEqual(upload_response.status_code, 202)
         payload = upload_response.json()["client_file"]
         self.assertEqual(payload["title"], "Police Report")
-        self.assertIn("reported the threats", payload["extracted_text"])
+        self.assertEqual(payload["ingestion"]["status"], "queued")
+
+        detail_response = self.client.get(
+            reverse(
+                "document_client_file_detail",
+                kwargs={"doc_id": self.document.id, "file_id": payload["id"]},
+            )
+        )
+        detail = detail_response.json()
+        self.assertEqual(detail["ingestion"]["status"], "ready")
+        self.assertIn("reported the threats", detail["extracted_text"])
 
         list_response = self.client.get(
             reverse("document_client_file_list", kwargs={"doc_id": self.document.id}),
@@ -608,8 +802,9 @@ class AgentResearchViewsTests(TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]["title"], "Police Report")
 
-    @patch("editor.document_file_views.sync_client_file_openai_index")
-    @patch("editor.document_file_views.extract_text_from_file")
+    @patch("editor.ingestion_service.INGESTION_EXECUTOR", "inline")
+    @patch("editor.ingestion_service.sync_client_file_openai_index")
+    @patch("editor.ingestion_service.extract_text_from_file")
     def test_client_document_upload_marks_scanned_pdf_as_openai_analysis_ready(self, extract_text, sync_index):
         extract_text.return_value = ""
 
@@ -632,13 +827,21 @@ class AgentResearchViewsTests(TestCase):
             content_type="application/pdf",
         )
 
-        response = self.client.post(
-            reverse("document_client_file_upload", kwargs={"doc_id": self.document.id}),
-            data={"file": upload, "title": "CBP Scan"},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("document_client_file_upload", kwargs={"doc_id": self.document.id}),
+                data={"file": upload, "title": "CBP Scan"},
+            )
 
-        self.assertEqual(response.status_code, 200)
-        payload = response.json()["client_file"]
+        self.assertEqual(response.status_code, 202)
+        client_file = DocumentClientFile.objects.get(id=response.json()["client_file"]["id"])
+        payload = self.client.get(
+            reverse(
+                "document_client_file_detail",
+                kwargs={"doc_id": self.document.id, "file_id": client_file.id},
+            )
+        ).json()
+        self.assertEqual(payload["metadata"]["ingestion_status"], "ready")
         self.assertEqual(payload["metadata"]["openai_index_status"], "completed")
         self.assertTrue(payload["metadata"]["scan_candidate"])
         self.assertIn("OpenAI document analysis", payload["metadata"]["warning"])
@@ -672,6 +875,204 @@ class EditorViewTests(TestCase):
         self.assertContains(response, '@tiptap/extension-text-align', html=False)
         self.assertContains(response, 'Cmd/Ctrl+K link', html=False)
 
+    def test_save_patch_applies_block_ops_against_current_revision(self):
+        self.document.content = normalize_document_content(
+            {
+                "type": "doc",
+                "content": [
+                    {"type": "paragraph", "content": [{"type": "text", "text": text}]}
+                    for text in ["Alpha.", "Beta.", "Gamma."]
+                ],
+            }
+        )
+        self.document.save(update_fields=["content", "updated_at"])
+        alpha, beta, gamma = [node["attrs"]["block_id"] for node in self.document.content["content"]]
+        revision = self.document.revision
+
+        response = self.client.post(
+            reverse("api_save_patch", kwargs={"doc_id": self.document.id}),
+            data={
+                "base_revision": revision,
+                "ops": [
+                    {"op": "delete", "block_id": beta},
+                    {"op": "move", "block_id": gamma, "after": None},
+                    {
+                        "op": "insert",
+                        "block": {"type": "heading", "attrs": {"block_id": "new-heading", "level": 2}},
+                        "after": gamma,
+                    },
+                    {
+                        "op": "update",
+                        "block": {"type": "paragraph", "attrs": {"block_id": alpha}, "content": [{"type": "text", "text": "Alpha revised."}]},
+                    },
+                ],
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.document.refresh_from_db()
+        self.assertEqual(response.json()["revision"], revision + 1)
+        self.assertEqual(
+            [node["attrs"]["block_id"] for node in self.document.content["content"]],
+            [gamma, "new-heading", alpha],
+        )
+        self.assertEqual(self.document.content["content"][1]["attrs"]["paragraph_metrics"], {})
+        self.assertEqual(self.document.content["content"][2]["content"][0]["text"], "Alpha revised.")
+
+    def test_save_patch_rejects_stale_revisions_and_unknown_blocks(self):
+        url = reverse("api_save_patch", kwargs={"doc_id": self.document.id})
+
+        stale = self.client.post(
+            url,
+            data={"base_revision": self.document.revision + 5, "ops": []},
+            content_type="application/json",
+        )
+        unknown = self.client.post(
+            url,
+            data={"base_revision": self.document.revision, "ops": [{"op": "delete", "block_id": "missing"}]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["revision"], self.document.revision)
+        self.assertEqual(unknown.status_code, 400)
+
+    def test_full_save_rejects_a_stale_base_revision_instead_of_overwriting(self):
+        url = reverse("api_save", kwargs={"doc_id": self.document.id})
+        stale_content = _sample_tiptap("Stale tab text.")
+
+        stale = self.client.post(
+            url,
+            data={"content": stale_content, "base_revision": self.document.revision - 1},
+            content_type="application/json",
+        )
+        current = self.client.post(
+            url,
+            data={"content": stale_content, "base_revision": self.document.revision},
+            content_type="application/json",
+        )
+
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["status"], "conflict")
+        self.assertEqual(current.status_code, 200)
+        self.document.refresh_from_db()
+        self.assertEqual(current.json()["revision"], self.document.revision)
+        self.assertEqual(self.document.content["content"][0]["content"][0]["text"], "Stale tab text.")
+
+
+class DocumentVersionStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="version-user", password="secret")
+        self.client.force_login(self.user)
+        self.document_type = DocumentType.objects.create(
+            name="Versioned Brief",
+            slug="versioned-brief",
+            category="brief",
+            template_content=_sample_tiptap("Template"),
+        )
+        self.content = normalize_document_content(
+            {
+                "type": "doc",
+                "content": [
+                    {"type": "paragraph", "content": [{"type": "text", "text": f"Paragraph {index} of the brief."}]}
+                    for index in range(12)
+                ],
+            }
+        )
+        self.document = Document.objects.create(
+            title="Versioned Brief",
+            document_type=self.document_type,
+            content=self.content,
+            created_by=self.user,
+        )
+
+    def _edited(self, content, index, text):
+        return replace_top_level_block_text(content, content["content"][index]["attrs"]["block_id"], text)
+
+    def test_versions_store_block_deltas_and_reconstruct_through_views(self):
+        first = create_version(self.document, self.content, label="First")
+        edited = self._edited(self.content, 3, "Paragraph three now cites Matter of C-T-L-.")
+        edited["content"].insert(0, edited["content"].pop(7))
+        second = create_version(self.document, edited, label="Second")
+        invalidate_version_cache()
+
+        self.assertEqual(first.storage, "keyframe")
+        self.assertEqual(second.storage, "delta")
+        self.assertEqual(second.base_version_id, first.id)
+        self.assertEqual(second.content, {})
+        self.assertEqual(sum(1 for item in second.delta["order"] if isinstance(item, dict)), 1)
+
+        detail = self.client.get(
+            reverse("api_version_detail", kwargs={"doc_id": self.document.id, "version_id": second.id})
+        )
+        self.assertEqual(detail.json()["content"], edited)
+
+        restored = self.client.post(
+            reverse("api_restore_version", kwargs={"doc_id": self.document.id, "version_id": second.id})
+        )
+        self.assertEqual(restored.json()["content"], edited)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.content, edited)
+
+    @patch("editor.version_store.VERSION_KEYFRAME_INTERVAL", 3)
+    def test_keyframe_interval_and_deleting_a_base_promotes_its_dependent(self):
+        contents = [self._edited(self.content, index, f"Revision {index}.") for index in range(5)]
+        versions = [create_version(self.document, content) for content in contents]
+
+        self.assertEqual([version.storage for version in versions], ["keyframe", "delta", "delta", "keyframe", "delta"])
+
+        delete_versions(DocumentVersion.objects.filter(id=versions[0].id))
+        invalidate_version_cache()
+
+        promoted = DocumentVersion.objects.get(id=versions[1].id)
+        self.assertEqual(promoted.storage, "keyframe")
+        self.assertEqual(DocumentVersion.objects.get(id=versions[2].id).chain_depth, 1)
+        for version, content in zip(versions[1:], contents[1:]):
+            self.assertEqual(version_content(DocumentVersion.objects.get(id=version.id)), content)
+
+        delete_versions(DocumentVersion.objects.filter(id__in=[versions[1].id, versions[2].id, versions[3].id]))
+        invalidate_version_cache()
+        self.assertEqual(version_content(DocumentVersion.objects.get(id=versions[4].id)), contents[4])
+
+        self.document.delete()
+        self.assertFalse(DocumentVersion.objects.exists())
+
+    def test_versions_list_serves_stored_stats_with_cursor_pagination(self):
+        versions = [
+            create_version(self.document, self._edited(self.content, 0, f"Draft {index} opening."), label=f"Draft {index}")
+            for index in range(3)
+        ]
+        DocumentVersion.objects.filter(id=versions[0].id).update(content={}, delta={})
+        url = reverse("api_versions", kwargs={"doc_id": self.document.id})
+
+        first_page = self.client.get(url, {"limit": 2}).json()
+        second_page = self.client.get(url, {"limit": 2, "cursor": first_page["next_cursor"]}).json()
+
+        self.assertEqual([item["label"] for item in first_page["versions"]], ["Draft 2", "Draft 1"])
+        self.assertEqual([item["label"] for item in second_page["versions"]], ["Draft 0"])
+        self.assertIsNone(second_page["next_cursor"])
+        self.assertTrue(second_page["versions"][0]["preview"].startswith("Draft 0 opening."))
+        self.assertEqual(second_page["versions"][0]["word_count"], versions[0].word_count)
+        self.assertGreater(versions[0].word_count, 30)
+
+    @patch("editor.views.AUTO_SNAPSHOT_MINUTES", 0)
+    def test_autosave_snapshots_compare_content_digests(self):
+        save_url = reverse("api_save", kwargs={"doc_id": self.document.id})
+
+        self.client.post(save_url, data={"content": self.content}, content_type="application/json")
+        self.client.post(save_url, data={"content": self.content}, content_type="application/json")
+
+        self.document.refresh_from_db()
+        version = self.document.versions.get()
+        self.assertEqual(len(self.document.content_digest), 64)
+        self.assertEqual(version.content_digest, self.document.content_digest)
+        self.assertEqual(version.content_size, self.document.content_size)
+
+        edited = self._edited(self.document.content, 0, "A new opening.")
+        self.client.post(save_url, data={"content": edited}, content_type="application/json")
+        self.assertEqual(self.document.versions.count(), 2)
+
 
 class WordAddinViewsTests(TestCase):
     def setUp(self):
@@ -1007,6 +1408,83 @@ class ExportFormattingTests(TestCase):
         html = tiptap_to_html(content, title="Aligned Heading", export_format="court_brief")
         self.assertIn('<h2 style="text-align:center;">Centered Heading</h2>', html)
 
+    def test_pdf_export_reuses_layout_for_unchanged_content(self):
+        clear_pdf_export_cache()
+        self.addCleanup(clear_pdf_export_cache)
+        render_pool = MagicMock()
+        render_pool.run.return_value = b"%PDF-1.7 brief"
+        content = _sample_tiptap("Cached body.")
+
+        with patch("editor.export.get_render_pool", return_value=render_pool):
+            first = tiptap_to_pdf(content, title="Brief", export_format="court_brief")
+            second = tiptap_to_pdf(copy.deepcopy(content), title="Brief", export_format="court_brief")
+            tiptap_to_pdf(content, title="Brief", export_format="declaration")
+
+        self.assertEqual(first.getvalue(), b"%PDF-1.7 brief")
+        self.assertEqual(second.getvalue(), b"%PDF-1.7 brief")
+        self.assertEqual(render_pool.run.call_count, 2)
+
+    def test_streamed_docx_export_matches_python_docx_parts(self):
+        content = {
+            "type": "doc",
+            "content": [
+                {"type": "heading", "attrs": {"level": 1}, "content": [{"type": "text", "text": "Argument"}]},
+                {
+                    "type": "paragraph",
+                    "attrs": {"textAlign": "justify"},
+                    "content": [
+                        {"type": "text", "text": "The Board erred", "marks": [{"type": "bold"}]},
+                        {"type": "text", "text": " in\tdenying relief."},
+                        {"type": "footnoteReference", "attrs": {"number": 1, "text": "See the record."}},
+                    ],
+                },
+                {
+                    "type": "orderedList",
+                    "content": [
+                        {"type": "listItem", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "First"}]}]},
+                    ],
+                },
+                {
+                    "type": "table",
+                    "content": [
+                        {
+                            "type": "tableRow",
+                            "content": [
+                                {"type": "tableCell", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Cell"}]}]},
+                            ],
+                        }
+                    ],
+                },
+            ],
+        }
+
+        def parts(buffer):
+            with zipfile.ZipFile(BytesIO(buffer.getvalue())) as archive:
+                return {name: archive.read(name) for name in archive.namelist()}
+
+        expected = parts(tiptap_to_docx(content, export_format="court_brief"))
+        streamed = parts(tiptap_to_docx_streamed(content, export_format="court_brief"))
+
+        self.assertEqual(streamed, expected)
+
+    def test_export_docx_streams_generated_documents(self):
+        user = User.objects.create_user(username="stream_exporter", password="secret")
+        self.client.force_login(user)
+        document_type = DocumentType.objects.create(name="Streamed Brief", slug="streamed-brief")
+        document = Document.objects.create(
+            title="Streamed Brief",
+            document_type=document_type,
+            content={"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Body"}]}]},
+            created_by=user,
+        )
+
+        response = self.client.get(reverse("export_docx", kwargs={"doc_id": document.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        exported = DocxDocument(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(exported.paragraphs[0].text, "Body")
+
 
 class AgentServiceTests(TestCase):
     def setUp(self):
@@ -2230,6 +2708,73 @@ class DocumentImportTests(TestCase):
         self.assertEqual(document.metadata["fidelity_mode"], "proof")
         self.assertEqual(document.metadata["source_docx_info"]["filename"], "existing-brief.docx")
 
+    def test_reimporting_the_same_docx_reuses_the_parsed_package_and_stored_file(self):
+        docx_bytes = _build_docx_bytes()
+        colleague = User.objects.create_user(username="colleague-user", password="secret")
+
+        def upload(user, title, filename):
+            self.client.force_login(user)
+            return self.client.post(
+                reverse("import_document"),
+                {
+                    "title": title,
+                    "document_type": self.document_type.slug,
+                    "file": SimpleUploadedFile(
+                        filename,
+                        docx_bytes,
+                        content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    ),
+                },
+            )
+
+        with patch("editor.import_service.import_docx_package", wraps=import_docx_package) as parse:
+            upload(self.user, "First Import", "Garcia client brief.docx")
+            upload(colleague, "Second Import", "firm-template.docx")
+
+        first = Document.objects.get(title="First Import")
+        second = Document.objects.get(title="Second Import")
+        self.client.get(reverse("editor", kwargs={"doc_id": second.id}))
+        second.refresh_from_db()
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(DocxImport.objects.count(), 1)
+        self.assertEqual(first.source_docx.name, second.source_docx.name)
+        self.assertEqual(
+            second.source_docx.name, f"document_imports/{DocxImport.objects.get().sha256}.docx"
+        )
+        self.assertEqual(first.metadata["source_docx_info"]["filename"], "Garcia client brief.docx")
+        self.assertEqual(second.metadata["source_docx_info"]["filename"], "firm-template.docx")
+        self.assertEqual(build_document_docx_artifact(second, user=colleague).source_label, "firm-template.docx")
+        with second.source_docx.open("rb") as handle:
+            self.assertEqual(handle.read(), docx_bytes)
+        self.assertEqual(
+            [node["type"] for node in first.content["content"]],
+            [node["type"] for node in second.content["content"]],
+        )
+        self.assertNotEqual(
+            first.content["content"][0]["attrs"]["block_id"],
+            second.content["content"][0]["attrs"]["block_id"],
+        )
+
+    def test_concurrent_first_imports_keep_one_stored_copy(self):
+        docx_bytes = _build_docx_bytes()
+        real_exists = default_storage.exists
+        checks = []
+
+        def exists(name):
+            # The other import's file lands right after this one checked for it.
+            checks.append(name)
+            return False if len(checks) == 1 else real_exists(name)
+
+        with tempfile.TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            canonical = f"document_imports/{hashlib.sha256(docx_bytes).hexdigest()}.docx"
+            default_storage.save(canonical, ContentFile(docx_bytes))
+            with patch.object(default_storage, "exists", side_effect=exists):
+                _package, entry = import_docx_package_cached(BytesIO(docx_bytes))
+            stored = sorted(path.name for path in (Path(tmpdir) / "document_imports").iterdir())
+
+        self.assertEqual(entry.source_docx.name, canonical)
+        self.assertEqual(stored, [Path(canonical).name])
+
     def test_docx_export_uses_source_docx_template_when_present(self):
         upload = SimpleUploadedFile(
             "existing-brief.docx",
@@ -2260,6 +2805,8 @@ class DocumentImportTests(TestCase):
 
 class CoverLetterExportTests(TestCase):
     def setUp(self):
+        clear_style_anchor_cache()
+        self.addCleanup(clear_style_anchor_cache)
         self.user = User.objects.create_user(username="exporter", password="secret")
         self.client.force_login(self.user)
         self.document_type = DocumentType.objects.create(
@@ -2293,6 +2840,20 @@ class CoverLetterExportTests(TestCase):
         self.assertEqual(exported.tables[0].cell(0, 0).text.strip(), "EXHIBIT 1")
         self.assertEqual(exported.tables[0].cell(1, 0).text.strip(), "EXHIBIT 2")
 
+    def test_repeat_exports_reuse_the_parsed_style_anchor(self):
+        with patch(
+            "editor.style_anchor_service._load_docx_document",
+            wraps=_load_docx_document,
+        ) as load_docx:
+            first = self.client.get(reverse("export_docx", kwargs={"doc_id": self.document.id}))
+            second = self.client.get(reverse("export_docx", kwargs={"doc_id": self.document.id}))
+
+        self.assertEqual(load_docx.call_count, 1)
+        first_text = [p.text for p in DocxDocument(BytesIO(first.content)).paragraphs]
+        second_text = [p.text for p in DocxDocument(BytesIO(second.content)).paragraphs]
+        self.assertEqual(first_text, second_text)
+        self.assertIn("Respectfully submitted,", second_text)
+
 
 class ProofPreviewViewTests(TestCase):
     def setUp(self):
@@ -2396,7 +2957,37 @@ class ProofRenderBackendTests(TestCase):
         self.assertEqual(backend.binary, str(binary_path))
         self.assertTrue(backend.is_available())
 
-    @patch("editor.proof_service._build_pdf_preview_assets", return_value=(1, []))
+    @patch("editor.soffice_pool.uno", None)
+    def test_soffice_pool_reuses_slot_profile_and_recycles_after_max_jobs(self):
+        commands = []
+
+        def fake_run(command, **kwargs):
+            commands.append(command)
+            outdir = Path(command[command.index("--outdir") + 1])
+            (outdir / f"{Path(command[-1]).stem}.pdf").write_bytes(b"%PDF-1.4")
+            return SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        pool = SofficeRenderPool("/usr/bin/soffice", size=1, max_jobs=2)
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, patch("editor.soffice_pool.subprocess.run", side_effect=fake_run):
+                first_worker = pool._idle[0]
+                for index in range(3):
+                    source = Path(tmpdir) / f"draft-{index}.docx"
+                    source.write_bytes(b"docx")
+                    output = Path(tmpdir) / "out" / f"proof-{index}.pdf"
+                    pool.render(source, output)
+                    self.assertTrue(output.exists())
+                recycled_worker = pool._idle[0]
+        finally:
+            pool.shutdown()
+
+        profiles = {command[1] for command in commands}
+        self.assertEqual(len(commands), 3)
+        self.assertEqual(len(profiles), 1)
+        self.assertIsNot(first_worker, recycled_worker)
+        self.assertEqual(recycled_worker.jobs, 1)
+
+    @patch("editor.proof_service._build_pdf_preview_assets", return_value=(1, 0))
     @patch("editor.proof_service.tiptap_to_pdf")
     @patch("editor.proof_service.WordRenderService.render_docx_to_pdf")
     def test_render_document_proof_falls_back_to_internal_pdf_when_word_rendering_is_unavailable(
@@ -2431,6 +3022,206 @@ class ProofRenderBackendTests(TestCase):
         self.assertIn("internal PDF export", manifest["notice"])
         self.assertEqual(manifest["page_count"], 1)
 
+    @patch("editor.proof_service._build_pdf_preview_assets", return_value=(1, 0))
+    @patch("editor.proof_service.WordRenderService.render_docx_to_pdf", return_value="soffice")
+    def test_render_document_proof_serves_cached_manifest_without_building_docx(
+        self,
+        _render_docx_to_pdf,
+        _build_pdf_preview_assets,
+    ):
+        user = User.objects.create_user(username="proof-cache-user", password="secret")
+        document = Document.objects.create(
+            title="Cached Draft",
+            content=_sample_tiptap("Cached proof content."),
+            created_by=user,
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(MEDIA_ROOT=tmpdir):
+                first = render_document_proof(document, user=user)
+                with patch("editor.proof_service.build_document_docx_artifact") as build_artifact:
+                    second = render_document_proof(document, user=user)
+                    build_artifact.assert_not_called()
+
+                document.content = _sample_tiptap("Edited proof content.")
+                document.save()
+                third = render_document_proof(document, user=user)
+
+        self.assertEqual(first["hash"], second["hash"])
+        self.assertNotEqual(first["hash"], third["hash"])
+
+    @patch("editor.proof_service._pdf_page_count", return_value=3)
+    @patch("editor.proof_service.WordRenderService.render_docx_to_pdf", return_value="soffice")
+    def test_proof_manifest_returns_first_page_and_fills_in_thumbnails_progressively(
+        self,
+        _render_docx_to_pdf,
+        _pdf_page_count,
+    ):
+        rendered = []
+        queued = []
+
+        def render_page(pdf_path, page, output_path, dpi):
+            rendered.append(page)
+            Path(output_path).write_bytes(b"\x89PNG page")
+            return output_path
+
+        render_pool = SimpleNamespace(
+            run=lambda func, *args, timeout, wait=0: render_page(*args),
+            submit=lambda func, *args: queued.append(args[1]) or True,
+        )
+        user = User.objects.create_user(username="proof-thumbnail-user", password="secret")
+        self.client.force_login(user)
+        document = Document.objects.create(
+            title="Long Draft",
+            content=_sample_tiptap("Long proof content."),
+            created_by=user,
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(MEDIA_ROOT=tmpdir), patch(
+                "editor.proof_service.get_render_pool", return_value=render_pool
+            ):
+                manifest = render_document_proof(document, user=user)
+                self.assertEqual([page["ready"] for page in manifest["pages"]], [True, False, False])
+                self.assertTrue(manifest["thumbnails_pending"])
+                self.assertEqual(queued, [2, 3])
+
+                response = self.client.get(reverse("proof_page", kwargs={"doc_id": document.id, "page": 3}))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b"".join(response.streaming_content), b"\x89PNG page")
+                response.close()
+                missing = self.client.get(reverse("proof_page", kwargs={"doc_id": document.id, "page": 4}))
+                ensure_proof_page_image(manifest, 2)
+
+                refreshed = self.client.get(reverse("proof_manifest", kwargs={"doc_id": document.id})).json()
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(rendered, [1, 3, 2])
+        self.assertEqual([page["ready"] for page in refreshed["pages"]], [True, True, True])
+        self.assertFalse(refreshed["thumbnails_pending"])
+
+    @patch("editor.proof_service._pdf_page_count", return_value=3)
+    @patch("editor.proof_service.WordRenderService.render_docx_to_pdf", return_value="soffice")
+    def test_exemplar_preview_renders_every_page_and_lists_none_when_the_first_fails(
+        self,
+        _render_docx_to_pdf,
+        _pdf_page_count,
+    ):
+        queued = []
+        failing = []
+
+        def run(func, *args, timeout, wait=0):
+            if failing:
+                raise RenderPoolError("pdftoppm failed")
+            Path(args[2]).write_bytes(b"\x89PNG page")
+            return args[2]
+
+        render_pool = SimpleNamespace(run=run, submit=lambda func, *args: queued.append(args[1]) or True)
+        user = User.objects.create_user(username="exemplar-preview-user", password="secret")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(MEDIA_ROOT=tmpdir), patch(
+                "editor.proof_service.get_render_pool", return_value=render_pool
+            ):
+                exemplar = Exemplar.objects.create(
+                    title="Three Page Exemplar",
+                    kind="style_anchor",
+                    original_file=SimpleUploadedFile("three-page.docx", _build_docx_bytes()),
+                    created_by=user,
+                )
+                manifest = render_exemplar_preview(exemplar)
+                failing.append(True)
+                failed = render_exemplar_preview(exemplar, force=True)
+
+        self.assertEqual(queued, [])
+        self.assertEqual([page["ready"] for page in manifest["pages"]], [True, True, True])
+        self.assertFalse(manifest["thumbnails_pending"])
+        self.assertEqual(failed["page_count"], 3)
+        self.assertEqual(failed["pages"], [])
+
+    def test_render_pool_refuses_jobs_beyond_its_queue(self):
+        pool = RenderPool(size=0, queue_limit=0, background_threads=1, background_queue_limit=0)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        with self.assertRaises(RenderPoolBusyError):
+            pool.run(lambda: pool.run(len, "nested", timeout=1), timeout=1)
+        self.assertTrue(pool.submit(release.wait, 5))
+        self.assertFalse(pool.submit(len, "queued"))
+        self.assertEqual(pool.run(len, "free", timeout=1), 4)
+
+    @patch("editor.proof_service._pdf_page_count", return_value=12)
+    @patch("editor.proof_service.WordRenderService.render_docx_to_pdf", return_value="soffice")
+    def test_proof_pages_beyond_the_render_slots_wait_instead_of_failing(self, _render_docx_to_pdf, _pdf_page_count):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def render_page(pdf_path, page, output_path, dpi):
+            if page != 1 and not release.is_set() and threading.current_thread().name.startswith("render-background"):
+                release.wait(5)
+            Path(output_path).write_bytes(b"\x89PNG page")
+            return output_path
+
+        # One export slot and three background slots for a twelve page proof.
+        render_pool = RenderPool(size=0, queue_limit=0, background_threads=1, background_queue_limit=2)
+        self.addCleanup(render_pool.shutdown)
+        user = User.objects.create_user(username="proof-slots-user", password="secret")
+        self.client.force_login(user)
+        document = Document.objects.create(
+            title="Twelve Page Draft",
+            content=_sample_tiptap("Long proof content."),
+            created_by=user,
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(MEDIA_ROOT=tmpdir), patch(
+                "editor.proof_service.get_render_pool", return_value=render_pool
+            ), patch("editor.proof_service.render_pdf_page", side_effect=render_page):
+                manifest = render_document_proof(document, user=user)
+                self.assertFalse(render_pool.submit(len, "full"))
+
+                # Another request is holding the only slot for a moment.
+                holding = threading.Event()
+                holder = threading.Thread(
+                    target=render_pool.run,
+                    args=(lambda: holding.set() or time.sleep(0.3),),
+                    kwargs={"timeout": 5},
+                )
+                holder.start()
+                holding.wait(5)
+                statuses = []
+                for page in (5, 12):
+                    response = self.client.get(reverse("proof_page", kwargs={"doc_id": document.id, "page": page}))
+                    statuses.append(response.status_code)
+                    response.close()
+                holder.join()
+                exported = render_pool.run(len, "export", timeout=1)
+                release.set()
+                render_pool.shutdown(wait=True)
+
+        self.assertEqual(manifest["page_count"], 12)
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(exported, 6)
+
+    def test_evict_proof_cache_drops_expired_then_least_recently_served_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir) / "proof_previews" / "documents" / "doc"
+            now = time.time()
+            for name, age_days in (("stale", 40), ("old", 3), ("recent", 1)):
+                entry = root / name
+                entry.mkdir(parents=True)
+                (entry / "proof.pdf").write_bytes(b"x" * 100)
+                manifest = entry / "manifest.json"
+                manifest.write_text("{}")
+                os.utime(manifest, (now - age_days * 86400, now - age_days * 86400))
+
+            with override_settings(MEDIA_ROOT=tmpdir):
+                removed = evict_proof_cache(max_bytes=150, max_age_days=30)
+
+            self.assertEqual(removed, 2)
+            self.assertEqual(sorted(path.name for path in root.iterdir()), ["recent"])
+
 
 class ExemplarWorkflowTests(TestCase):
     @classmethod
@@ -2504,6 +3295,521 @@ class ExemplarWorkflowTests(TestCase):
         self.assertIn("open_as_draft_url", payload)
 
 
+class ExemplarIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="index-user", password="secret")
+        self.client.force_login(self.user)
+
+    def _exemplar(self, title, embedding, **extra):
+        return Exemplar.objects.create(
+            title=title,
+            original_file=f"exemplars/{title.lower().replace(' ', '-')}.txt",
+            extracted_text=extra.pop("extracted_text", f"{title} body"),
+            embedding=embedding,
+            created_by=self.user,
+            **extra,
+        )
+
+    @patch("editor.exemplar_service.generate_embedding", return_value=[1.0, 0.0, 0.0])
+    def test_search_exemplars_ranks_by_cosine_similarity(self, _embed):
+        near = self._exemplar("Near Match", [2.0, 0.1, 0.0])
+        far = self._exemplar("Far Match", [1.0, 0.0, 1.0])
+        self._exemplar("No Embedding", [])
+
+        ranked = search_exemplars(self.user, "persecution", limit=2)
+
+        self.assertEqual([exemplar_id for exemplar_id, _ in ranked], [near.id, far.id])
+        self.assertAlmostEqual(ranked[0][1], 0.99875, places=4)
+        self.assertAlmostEqual(ranked[1][1], 0.70711, places=4)
+
+    @patch("editor.exemplar_service.generate_embedding", return_value=[])
+    def test_search_exemplars_applies_keyword_bonus_and_candidate_filter(self, _embed):
+        asylum = self._exemplar("Asylum Brief", [], extracted_text="Nexus to a protected ground.")
+        bond = self._exemplar("Bond Brief", [], extracted_text="Asylum claim pending.", kind="style_anchor")
+
+        ranked = search_exemplars(self.user, "asylum")
+        self.assertEqual(ranked, [(asylum.id, 0.25), (bond.id, 0.15)])
+
+        filtered = search_exemplars(
+            self.user,
+            "asylum",
+            queryset=Exemplar.objects.filter(created_by=self.user, kind="style_anchor"),
+        )
+        self.assertEqual([exemplar_id for exemplar_id, _ in filtered], [bond.id])
+
+    def test_exemplar_index_is_rebuilt_after_save_and_delete(self):
+        first = self._exemplar("First", [1.0, 0.0])
+        index = get_exemplar_index(self.user)
+        self.assertIs(get_exemplar_index(self.user), index)
+
+        second = self._exemplar("Second", [0.0, 1.0])
+        rebuilt = get_exemplar_index(self.user)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt), 2)
+        self.assertEqual(rebuilt.matrix.dtype.name, "float32")
+
+        second.delete()
+        self.assertEqual(list(get_exemplar_index(self.user).ids), [first.id])
+
+    @patch("editor.exemplar_service.generate_embedding", return_value=[0.0, 1.0])
+    def test_exemplar_search_endpoint_returns_ranked_serialized_results(self, _embed):
+        self._exemplar("Older", [1.0, 0.0])
+        best = self._exemplar("Best", [0.0, 1.0])
+
+        response = self.client.get(reverse("exemplar_search"), data={"q": "hardship"})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["id"], best.id)
+        self.assertAlmostEqual(results[0]["score"], 1.0, places=4)
+        self.assertEqual(len(results), 2)
+
+
+class EmbeddingCacheTests(TestCase):
+    def setUp(self):
+        clear_embedding_cache()
+        self.addCleanup(clear_embedding_cache)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+    @patch("editor.embedding_service._embedding_client")
+    def test_embed_text_serves_repeats_from_memory_then_database(self, embedding_client):
+        embedding_client.return_value.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2, 0.3])]
+        )
+
+        first = generate_query_embedding("Particular social group  nexus")
+        second = generate_query_embedding("  Particular social group\nnexus ")
+        clear_embedding_cache()
+        third = generate_embedding("Particular social group nexus")
+
+        self.assertEqual(first, [0.1, 0.2, 0.3])
+        self.assertEqual(second, first)
+        self.assertEqual(third, first)
+        embedding_client.return_value.embeddings.create.assert_called_once()
+        self.assertEqual(EmbeddingCacheEntry.objects.count(), 1)
+        stats = embedding_cache_stats()
+        self.assertEqual(stats["database_hits"], 1)
+        self.assertEqual(stats.get("misses", 0), 0)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+    @patch("editor.embedding_service._embedding_client")
+    def test_document_embeddings_skip_the_cache_and_stats_are_reported_to_staff(self, embedding_client):
+        embedding_client.return_value.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.4, 0.5])]
+        )
+
+        generate_document_embedding("Full text of an uploaded exemplar brief.")
+        generate_document_embedding("Full text of an uploaded exemplar brief.")
+        generate_query_embedding("hardship waiver")
+        generate_query_embedding("hardship waiver")
+
+        self.assertEqual(embedding_client.return_value.embeddings.create.call_count, 3)
+        self.assertEqual(EmbeddingCacheEntry.objects.count(), 1)
+        staff = User.objects.create_user(username="embedding-staff", password="secret", is_staff=True)
+        self.client.force_login(staff)
+        stats = self.client.get(reverse("research_query_stats")).json()["embedding_cache"]
+        self.assertEqual(stats["uncached"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": ""})
+    def test_embed_text_without_api_key_is_empty_or_raises_when_required(self):
+        self.assertEqual(generate_embedding("asylum nexus"), [])
+        with self.assertRaises(ValueError):
+            generate_query_embedding("asylum nexus")
+
+
+class SuggestCaseLawRetrievalTests(TestCase):
+    @staticmethod
+    def _keyword_row(doc_id, case_name, court):
+        return (doc_id, case_name, f"{doc_id} I&N Dec. 1", None, court, "precedential", 3, "good_law", 0.4, 0.5, 0.2)
+
+    @patch("editor.research_service.generate_query_embedding", side_effect=ValueError("no key"))
+    @patch("editor.research_service._with_biaedge_cursor", side_effect=lambda query, *args: query(None, *args))
+    def test_suggest_case_law_falls_back_to_speculative_unfiltered_retrieval(self, _cursor, _embedding):
+        keyword_calls = []
+
+        def keyword_candidates(_cursor, keyword_query, phrase_query, filter_sql, filter_params):
+            keyword_calls.append(filter_sql)
+            if filter_sql:
+                return []
+            return [self._keyword_row(11, "Matter of A-B-", "Attorney General")]
+
+        with patch("editor.research_service._keyword_candidates", side_effect=keyword_candidates), patch(
+            "editor.research_service._infer_category_ids",
+            return_value=[4],
+        ), patch(
+            "editor.research_service._fetch_category_matched_docs",
+            return_value={11},
+        ) as fetch_category_docs:
+            results = suggest_case_law("Ninth Circuit particular social group nexus analysis")
+
+        self.assertEqual(len(keyword_calls), 2)
+        self.assertEqual([item["document_id"] for item in results], [11])
+        self.assertFalse(results[0]["circuit_filtered"])
+        self.assertTrue(results[0]["category_match"])
+        fetch_category_docs.assert_called_once_with(None, [11], [4])
+
+    def test_extract_query_features_collects_phrases_statutes_and_circuit_in_one_scan(self):
+        features = _extract_query_features(
+            'The Ninth Circuit applies "totality of the circumstances" to credibility. '
+            "Under INA § 208(b)(1) and 8 C.F.R. § 1208.13(b) a well-founded fear of persecution "
+            "requires nexus to a particular social group."
+        )
+
+        self.assertEqual(
+            features["phrases"],
+            [
+                "totality of the circumstances",
+                "ina § 208(b)(1",
+                "8 c.f.r. § 1208.13",
+                "particular social group",
+                "well-founded fear",
+            ],
+        )
+        self.assertEqual(features["circuit_hint"], "9th")
+        self.assertIn("credibility", features["keyword_terms"])
+        self.assertEqual(features["tokens"][:2], ["the", "ninth"])
+
+
+class DocumentSuggestTests(TestCase):
+    @staticmethod
+    def _suggestion(doc_id, score):
+        return {"document_id": doc_id, "case_name": f"Matter of {doc_id}", "combined_score": score, "cited_by_count": 0}
+
+    def test_document_suggest_retrieves_per_heading_section_and_merges_attribution(self):
+        user = User.objects.create_user(username="suggest-doc-user", password="secret")
+        self.client.force_login(user)
+        content = {
+            "type": "doc",
+            "content": [
+                {"type": "heading", "attrs": {"level": 2, "block_id": "nexus-h"}, "content": [{"type": "text", "text": "Nexus"}]},
+                {"type": "paragraph", "attrs": {"block_id": "nexus-p"}, "content": [{"type": "text", "text": "nexus argument " * 30}]},
+                {"type": "heading", "attrs": {"level": 2, "block_id": "psg-h"}, "content": [{"type": "text", "text": "Particular Social Group"}]},
+                {"type": "paragraph", "attrs": {"block_id": "psg-p"}, "content": [{"type": "text", "text": "psg argument " * 30}]},
+            ],
+        }
+        document = Document.objects.create(title="Brief", content=content, created_by=user)
+        section_texts = []
+
+        def fake_suggest(text):
+            section_texts.append(text)
+            if text.startswith("Nexus"):
+                return [self._suggestion(1, 0.9), self._suggestion(2, 0.5)]
+            return [self._suggestion(2, 0.8), self._suggestion(3, 0.4)]
+
+        with patch("editor.research_service.suggest_case_law", side_effect=fake_suggest):
+            response = self.client.post(reverse("research_suggest_document", kwargs={"doc_id": document.id}))
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(len(section_texts), 2)
+        self.assertEqual([section["block_id"] for section in payload["sections"]], ["nexus-h", "psg-h"])
+        self.assertEqual(payload["sections"][1]["block_ids"], ["psg-h", "psg-p"])
+        self.assertEqual([item["document_id"] for item in payload["results"]], [1, 2, 3])
+        shared = payload["results"][1]
+        self.assertEqual(shared["combined_score"], 0.8)
+        self.assertEqual([item["heading"] for item in shared["sections"]], ["Nexus", "Particular Social Group"])
+
+
+class SimilarCasesTests(TestCase):
+    def setUp(self):
+        invalidate_similar_cases_cache()
+        self.addCleanup(invalidate_similar_cases_cache)
+
+    @patch("editor.research_service.connections")
+    def test_similar_cases_dedupes_documents_by_best_similarity_and_caches(self, connections_mock):
+        cursor = connections_mock["biaedge"].cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [
+            (30, "Matter of C-", "3 I&N Dec. 1", None, "Nexus", "Rule C", 0.91),
+            (12, "Matter of L-", "1 I&N Dec. 1", None, "PSG", "Rule L", 0.88),
+            (30, "Matter of C-", "3 I&N Dec. 1", None, "Other", "Rule C2", 0.75),
+        ]
+
+        first = similar_cases(7)
+        second = similar_cases(7)
+
+        self.assertEqual([item["document_id"] for item in first], [30, 12])
+        self.assertEqual(first[0]["holding"], "Rule C")
+        self.assertEqual(second, first)
+        cursor.execute.assert_called_once()
+        self.assertIn("ORDER BY he2.embedding <=> he1.embedding", cursor.execute.call_args.args[0])
+
+
+class CaseDetailTests(TestCase):
+    def setUp(self):
+        invalidate_case_detail_cache()
+        invalidate_immcite_cache()
+        self.addCleanup(invalidate_case_detail_cache)
+        self.addCleanup(invalidate_immcite_cache)
+
+    @patch("editor.research_service.connections")
+    def test_case_detail_reads_case_in_one_query_and_rereads_only_validity_when_cached(self, connections_mock):
+        cursor = connections_mock["biaedge"].cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [
+            (
+                5, "Matter of M-E-V-G-", "26 I&N Dec. 227", None, "BIA", "precedential", "Summary", 40,
+                "good_law", 12, 0, 0, "",
+                [{"legal_issue": "PSG", "rule": "Particularity and social distinction", "is_primary": True}],
+                '[{"title": "Social distinction", "text": "Headnote", "topic_code": "PSG", "is_primary": true}]',
+                180000,
+            ),
+        ]
+        cursor.fetchall.return_value = [(5, "questioned", 12, 3, 0, "Later criticism")]
+
+        first = case_detail(5)
+        invalidate_immcite_cache([5])
+        second = case_detail(5)
+
+        self.assertEqual(first["holdings"][0]["rule"], "Particularity and social distinction")
+        self.assertEqual(first["headnotes"][0]["topic_code"], "PSG")
+        self.assertEqual(first["full_text_chars"], 180000)
+        self.assertNotIn("full_text", first)
+        self.assertEqual(second["validity"]["status"], "questioned")
+        self.assertEqual(second["holdings"], first["holdings"])
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.assertIn("FROM citation_validity", cursor.execute.call_args.args[0])
+
+    @patch("editor.research_views.research_service.case_full_text")
+    def test_case_full_text_endpoint_pages_and_gzips_text(self, case_full_text_mock):
+        user = User.objects.create_user(username="case-text-user", password="secret")
+        self.client.force_login(user)
+        case_full_text_mock.return_value = {
+            "document_id": 5,
+            "offset": 100,
+            "limit": 5000,
+            "total_chars": 9000,
+            "text": "The respondent " * 300,
+            "next_offset": 5100,
+        }
+
+        response = self.client.get(
+            reverse("research_case_text", kwargs={"doc_id": 5}),
+            {"offset": "100", "limit": "5000"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        case_full_text_mock.assert_called_once_with(5, offset=100, limit=5000)
+
+
+class ImmCiteBatchTests(TestCase):
+    def setUp(self):
+        invalidate_immcite_cache()
+        self.addCleanup(invalidate_immcite_cache)
+        self.user = User.objects.create_user(username="immcite-user", password="secret")
+        self.client.force_login(self.user)
+
+    @patch("editor.research_service.connections")
+    def test_batch_endpoint_fetches_uncached_statuses_in_one_query(self, connections_mock):
+        cursor = connections_mock["biaedge"].cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [(3, "good_law", 8, 0, 0, ""), (9, "overruled", 1, 2, 1, "Overruled")]
+        url = reverse("research_immcite_batch")
+
+        response = self.client.post(url, data={"document_ids": [9, 3, 4, 9]}, content_type="application/json")
+        cached = self.client.post(url, data={"document_ids": [3, 4]}, content_type="application/json")
+        invalidate_immcite_cache([3])
+        self.client.post(url, data={"document_ids": [3, 4]}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([item["document_id"] for item in results], [9, 3, 4])
+        self.assertEqual(results[0]["status"], "overruled")
+        self.assertIsNone(results[2]["status"])
+        self.assertEqual([item["status"] for item in cached.json()["results"]], ["good_law", None])
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.assertIn("ANY(%s)", cursor.execute.call_args_list[0].args[0])
+        self.assertEqual(cursor.execute.call_args_list[0].args[1], [[9, 3, 4]])
+        self.assertEqual(cursor.execute.call_args_list[1].args[1], [[3]])
+
+    def test_batch_endpoint_rejects_invalid_ids(self):
+        statuses = [
+            self.client.post(reverse("research_immcite_batch"), data=payload, content_type="application/json").status_code
+            for payload in ({"document_ids": ["abc"]}, {"document_ids": "12"}, [1, 2], '"x"')
+        ]
+
+        self.assertEqual(statuses, [400, 400, 400, 400])
+
+
+class AskQuestionCacheTests(TestCase):
+    def setUp(self):
+        invalidate_answer_cache()
+        self.addCleanup(invalidate_answer_cache)
+
+    @patch("editor.research_service._openai_client")
+    @patch("editor.research_service.suggest_case_law")
+    def test_repeat_question_reuses_answer_until_the_authorities_change(self, suggest, client_factory):
+        def authority(status):
+            return {
+                "document_id": 7,
+                "case_name": "Matter of A-B-",
+                "citation": "27 I&N Dec. 316",
+                "court": "Attorney General",
+                "decision_date": "2018-06-11",
+                "validity_status": status,
+                "holding": "",
+                "legal_issue": "",
+            }
+
+        suggest.side_effect = [[authority("good_law")], [authority("good_law")], [authority("overruled")]]
+        client = client_factory.return_value
+        client.responses.create.return_value = SimpleNamespace(output_text="Short answer [1].")
+
+        first = ask_question("What is the nexus standard?")
+        repeat = ask_question("  what is the NEXUS standard ")
+        changed = ask_question("What is the nexus standard?")
+
+        self.assertEqual(first["answer"], "Short answer [1].")
+        self.assertNotIn("cached", first)
+        self.assertTrue(repeat["cached"])
+        self.assertEqual(repeat["answer"], first["answer"])
+        self.assertNotIn("cached", changed)
+        self.assertEqual(changed["citations"][0]["validity_status"], "overruled")
+        self.assertEqual(suggest.call_count, 3)
+        self.assertEqual(client.responses.create.call_count, 2)
+
+
+class BiaEdgeQueryStatsTests(TestCase):
+    databases = {"default", "biaedge"}
+
+    def setUp(self):
+        reset_biaedge_query_stats()
+        self.addCleanup(reset_biaedge_query_stats)
+
+    def test_biaedge_queries_are_timed_per_label_and_reported_to_staff(self):
+        with _biaedge_cursor("probe") as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            with self.assertRaises(DatabaseError):
+                cursor.execute("SELECT missing_column FROM missing_table")
+
+        member = User.objects.create_user(username="stats-member", password="secret")
+        self.client.force_login(member)
+        self.assertEqual(self.client.get(reverse("research_query_stats")).status_code, 403)
+
+        staff = User.objects.create_user(username="stats-staff", password="secret", is_staff=True)
+        self.client.force_login(staff)
+        probe = self.client.get(reverse("research_query_stats")).json()["queries"]["probe"]
+        self.assertEqual(probe["calls"], 2)
+        self.assertEqual(probe["errors"], 1)
+        self.assertGreaterEqual(probe["max_ms"], probe["avg_ms"])
+
+
+class CategoryBrowsingTests(TestCase):
+    def setUp(self):
+        invalidate_category_cache()
+        self.addCleanup(invalidate_category_cache)
+        self.user = User.objects.create_user(username="category-user", password="secret")
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def _case_row(doc_id, cited_by_count):
+        return (doc_id, f"Matter of {doc_id}", "", None, "BIA", "precedential", cited_by_count, "", None)
+
+    @patch("editor.research_service.connections")
+    def test_category_pages_use_cached_categories_and_keyset_cursor(self, connections_mock):
+        cursor = connections_mock["biaedge"].cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [(4, "Asylum", "asylum", "Asylum cases", 45)],
+            [self._case_row(index, 100 - index) for index in range(1, 22)],
+            [self._case_row(21, 79)],
+        ]
+
+        categories = self.client.get(reverse("research_categories")).json()["categories"]
+        first = self.client.get(reverse("research_category_slug", kwargs={"slug": "asylum"})).json()
+        second = self.client.get(
+            reverse("research_category_slug", kwargs={"slug": "asylum"}),
+            {"cursor": first["next_cursor"]},
+        ).json()
+
+        self.assertEqual(categories[0]["case_count"], 45)
+        self.assertEqual(len(first["results"]), 20)
+        self.assertEqual(first["next_cursor"], "80:20")
+        self.assertEqual(first["page_count"], 3)
+        self.assertEqual([item["document_id"] for item in second["results"]], [21])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(cursor.execute.call_count, 3)
+        keyset_sql, keyset_params = cursor.execute.call_args.args
+        self.assertIn("(COALESCE(d.cited_by_count, 0), d.id) < (%s, %s)", keyset_sql)
+        self.assertEqual(keyset_params, [4, 80, 20, 21, 0])
+
+    @patch("editor.research_service.connections")
+    def test_category_page_rejects_malformed_cursor(self, connections_mock):
+        cursor = connections_mock["biaedge"].cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [(4, "Asylum", "asylum", "", 45)]
+
+        response = self.client.get(
+            reverse("research_category_slug", kwargs={"slug": "asylum"}),
+            {"cursor": "not-a-cursor"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class IngestionJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media_root = tempfile.mkdtemp(prefix="editor-ingestion-tests-")
+        cls._override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ingest-user", password="secret")
+        self.client.force_login(self.user)
+
+    @patch("editor.ingestion_service.INGESTION_EXECUTOR", "worker")
+    def test_exemplar_upload_returns_immediately_with_queued_job(self):
+        upload = SimpleUploadedFile("asylum-brief.txt", b"Persecution on account of a protected ground.")
+
+        response = self.client.post(reverse("exemplar_upload"), data={"file": upload, "title": "Asylum Brief"})
+
+        self.assertEqual(response.status_code, 202)
+        payload = response.json()["exemplar"]
+        self.assertEqual(payload["ingestion"]["status"], "queued")
+        exemplar = Exemplar.objects.get(id=payload["id"])
+        self.assertEqual(exemplar.extracted_text, "")
+        job = IngestionJob.objects.get(exemplar=exemplar)
+        self.assertEqual(payload["ingestion"]["job_id"], job.id)
+
+        claimed = claim_ingestion_jobs(worker_id="test-worker", limit=5)
+        self.assertEqual([item.id for item in claimed], [job.id])
+        self.assertEqual(claim_ingestion_jobs(worker_id="other-worker", limit=5), [])
+
+        process_ingestion_job(claimed[0])
+
+        job.refresh_from_db()
+        exemplar.refresh_from_db()
+        self.assertEqual((job.status, job.stage), ("completed", "ready"))
+        self.assertIn("Persecution", exemplar.extracted_text)
+        self.assertEqual(exemplar.metadata["ingestion_status"], "ready")
+
+    @patch("editor.ingestion_service.INGESTION_MAX_ATTEMPTS", 2)
+    @patch("editor.ingestion_service.extract_text_from_file", side_effect=RuntimeError("pdf boom"))
+    @patch("editor.ingestion_service.INGESTION_EXECUTOR", "worker")
+    def test_failed_job_is_requeued_until_attempts_are_exhausted(self, _extract):
+        upload = SimpleUploadedFile("scan.pdf", b"%PDF-1.4 fake")
+        response = self.client.post(reverse("exemplar_upload"), data={"file": upload})
+        job = IngestionJob.objects.get(exemplar_id=response.json()["exemplar"]["id"])
+
+        process_ingestion_job(claim_ingestion_jobs(worker_id="test-worker")[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("queued", 1))
+
+        process_ingestion_job(claim_ingestion_jobs(worker_id="test-worker")[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.stage), ("failed", "failed"))
+        self.assertEqual(job.exemplar.metadata["ingestion_error"], "pdf boom")
+
+
 class SeedTemplatesTests(TestCase):
     def test_i751_templates_seed_as_three_distinct_cover_letters(self):
         call_command("seed_templates")
@@ -19,9 +19,11 @@ urlpatterns = [
     path("delete/<uuid:doc_id>/", views.delete_document, name="delete_document"),
     # API
     path("api/save/<uuid:doc_id>/", views.api_save, name="api_save"),
+    path("api/save/<uuid:doc_id>/patch/", views.api_save_patch, name="api_save_patch"),
     path("api/title/<uuid:doc_id>/", views.api_update_title, name="api_update_title"),
     path("api/documents/<uuid:doc_id>/proof-refresh/", views.proof_refresh, name="proof_refresh"),
     path("api/documents/<uuid:doc_id>/proof-manifest/", views.proof_manifest, name="proof_manifest"),
+    path("api/documents/<uuid:doc_id>/proof-pages/<int:page>/", views.proof_page, name="proof_page"),
     path(
         "api/documents/<uuid:doc_id>/style-source/<int:exemplar_id>/",
         views.set_document_style_source,
@@ -51,6 +53,11 @@ urlpatterns = [
     ),
     # Research API
     path("api/research/suggest/", research_views.suggest_case_law, name="research_suggest"),
+    path(
+        "api/research/suggest/document/<uuid:doc_id>/",
+        research_views.suggest_case_law_for_document,
+        name="research_suggest_document",
+    ),
     path("api/research/ask/", research_views.ask_question, name="research_ask"),
     path("api/research/agent/session/<uuid:doc_id>/", agent_views.agent_session, name="research_agent_session"),
     path("api/research/agent/chat/<uuid:doc_id>/", agent_views.agent_chat, name="research_agent_chat"),
@@ -59,12 +66,16 @@ urlpatterns = [
     path("api/research/agent/reset/<uuid:doc_id>/", agent_views.agent_reset, name="research_agent_reset"),
     path("api/research/agent/suggest/<uuid:doc_id>/", agent_views.agent_suggest, name="research_agent_suggest"),
     path("api/research/agent/run/<uuid:run_id>/", agent_views.agent_run_status, name="research_agent_run"),
+    path("api/research/agent/run/<uuid:run_id>/stream/", agent_views.agent_run_stream, name="research_agent_run_stream"),
     path("api/research/categories/", research_views.list_categories, name="research_categories"),
     path("api/research/category/<slug:slug>/", research_views.category_cases_by_slug, name="research_category_slug"),
     path("api/research/category/<int:category_id>/", research_views.category_cases, name="research_category"),
     path("api/research/case/<int:doc_id>/", research_views.case_detail, name="research_case"),
+    path("api/research/case/<int:doc_id>/text/", research_views.case_full_text, name="research_case_text"),
     path("api/research/similar/<int:doc_id>/", research_views.similar_cases, name="research_similar"),
+    path("api/research/immcite/batch/", research_views.immcite_status_batch, name="research_immcite_batch"),
     path("api/research/immcite/<int:doc_id>/", research_views.immcite_status, name="research_immcite"),
+    path("api/research/stats/", research_views.query_stats, name="research_query_stats"),
     path("api/document-files/<uuid:doc_id>/", document_file_views.client_file_list, name="document_client_file_list"),
     path("api/document-files/<uuid:doc_id>/upload/", document_file_views.client_file_upload, name="document_client_file_upload"),
     path(
@@ -0,0 +1,244 @@
+import copy
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from django.db import transaction
+
+from .document_schema import content_fingerprint
+from .document_text import extract_plain_text
+from .models import DocumentVersion
+
+# Every Nth snapshot of a document is stored in full; the ones in between only
+# record which blocks changed relative to the previous snapshot.
+VERSION_KEYFRAME_INTERVAL = max(1, int(os.environ.get("VERSION_KEYFRAME_INTERVAL", "10")))
+VERSION_CACHE_SIZE = max(1, int(os.environ.get("VERSION_CACHE_SIZE", "64")))
+
+# A delta larger than this share of the full JSON is not worth the reconstruction cost.
+_MAX_DELTA_RATIO = 0.5
+
+_VERSION_CACHE = OrderedDict()
+_VERSION_CACHE_LOCK = threading.Lock()
+
+
+def create_version(document, content, *, label="", fingerprint=None):
+    content = content if isinstance(content, dict) else {}
+    with transaction.atomic():
+        previous = (
+            DocumentVersion.objects.select_for_update()
+            .filter(document=document)
+            .order_by("-id")
+            .only("id", "created_at", "storage", "content", "delta", "base_version_id", "chain_depth")
+            .first()
+        )
+        fields = _storage_fields(previous, content)
+        digest, size = fingerprint or content_fingerprint(content)
+        version = DocumentVersion.objects.create(
+            document=document,
+            label=label,
+            content_digest=digest,
+            content_size=size,
+            **version_text_stats(content),
+            **fields,
+        )
+    _cache_put(version, content)
+    return version
+
+
+def version_text_stats(content):
+    """Word count, character count and preview shown in the version history list."""
+    text = extract_plain_text(content, max_chars=20000)
+    return {
+        "word_count": len([word for word in text.split() if word.strip()]),
+        "char_count": len(text),
+        "preview": text[:400],
+    }
+
+
+def version_content(version):
+    """Materialized Tiptap JSON for a version. Treat the result as read-only."""
+    cached = _cache_get(version)
+    if cached is not None:
+        return cached
+    if version.storage != "delta":
+        _cache_put(version, version.content)
+        return version.content
+
+    chain = _load_chain(version)
+    content = None
+    for link in reversed(chain):
+        cached = _cache_get(link)
+        if cached is not None:
+            content = cached
+            continue
+        if link.storage == "delta":
+            content = apply_block_delta(content, link.delta)
+        else:
+            content = link.content
+        _cache_put(link, content)
+    return content
+
+
+def delete_versions(queryset):
+    """Delete versions after promoting any surviving dependents to keyframes."""
+    with transaction.atomic():
+        doomed_ids = set(queryset.values_list("id", flat=True))
+        if not doomed_ids:
+            return 0
+        dependents = (
+            DocumentVersion.objects.select_for_update()
+            .filter(base_version_id__in=doomed_ids)
+            .exclude(id__in=doomed_ids)
+        )
+        for dependent in dependents:
+            _promote_to_keyframe(dependent)
+        deleted, _ = DocumentVersion.objects.filter(id__in=doomed_ids).delete()
+    invalidate_version_cache(doomed_ids)
+    return deleted
+
+
+def invalidate_version_cache(version_ids=None):
+    with _VERSION_CACHE_LOCK:
+        if version_ids is None:
+            _VERSION_CACHE.clear()
+            return
+        version_ids = set(version_ids)
+        for key in [key for key in _VERSION_CACHE if key[0] in version_ids]:
+            del _VERSION_CACHE[key]
+
+
+def encode_block_delta(base_content, content):
+    """Describe ``content`` as references to unchanged ``base_content`` blocks plus literal nodes."""
+    base_blocks = _unique_blocks(base_content)
+    nodes = content.get("content") if isinstance(content.get("content"), list) else []
+    target_counts = Counter(_block_id(node) for node in nodes)
+    order = []
+    for node in nodes:
+        block_id = _block_id(node)
+        if block_id and target_counts[block_id] == 1 and base_blocks.get(block_id) == node:
+            order.append(block_id)
+        else:
+            order.append(node)
+    return {
+        "doc": {key: value for key, value in content.items() if key != "content"},
+        "order": order,
+    }
+
+
+def apply_block_delta(base_content, delta):
+    base_blocks = _unique_blocks(base_content or {})
+    nodes = []
+    for item in delta.get("order") or []:
+        if isinstance(item, str):
+            nodes.append(base_blocks[item])
+        else:
+            nodes.append(item)
+    return {**(delta.get("doc") or {}), "content": nodes}
+
+
+def _storage_fields(previous, content):
+    keyframe = {"storage": "keyframe", "content": content, "delta": {}, "base_version": None, "chain_depth": 0}
+    if previous is None or previous.chain_depth + 1 >= VERSION_KEYFRAME_INTERVAL:
+        return keyframe
+
+    delta = encode_block_delta(version_content(previous), content)
+    if _json_size(delta) > _MAX_DELTA_RATIO * _json_size(content):
+        return keyframe
+    return {
+        "storage": "delta",
+        "content": {},
+        "delta": delta,
+        "base_version": previous,
+        "chain_depth": previous.chain_depth + 1,
+    }
+
+
+def _load_chain(version):
+    # Deltas always point at the document's previous snapshot, so the whole chain is
+    # normally within the last ``chain_depth`` rows and can be read in one query.
+    candidates = {
+        item.id: item
+        for item in DocumentVersion.objects.filter(document_id=version.document_id, id__lt=version.id)
+        .order_by("-id")
+        .only("id", "created_at", "storage", "content", "delta", "base_version_id", "chain_depth")[: version.chain_depth + 1]
+    }
+    chain = [version]
+    current = version
+    while current.storage == "delta" and _cache_get(current) is None:
+        base = candidates.get(current.base_version_id)
+        if base is None:
+            base = DocumentVersion.objects.get(id=current.base_version_id)
+        chain.append(base)
+        current = base
+    return chain
+
+
+def _promote_to_keyframe(version):
+    if version.storage != "delta":
+        return
+    content = version_content(version)
+    version.storage = "keyframe"
+    version.content = content
+    version.delta = {}
+    version.base_version = None
+    version.chain_depth = 0
+    version.save(update_fields=["storage", "content", "delta", "base_version", "chain_depth"])
+    _reset_chain_depths(version)
+
+
+def _reset_chain_depths(keyframe):
+    depth = 0
+    current = keyframe
+    while True:
+        dependent = current.dependent_versions.only("id", "chain_depth").first()
+        if dependent is None:
+            return
+        depth += 1
+        if dependent.chain_depth != depth:
+            DocumentVersion.objects.filter(id=dependent.id).update(chain_depth=depth)
+        current = dependent
+
+
+def _unique_blocks(content):
+    nodes = content.get("content") if isinstance(content, dict) and isinstance(content.get("content"), list) else []
+    counts = Counter(_block_id(node) for node in nodes)
+    return {
+        _block_id(node): node
+        for node in nodes
+        if _block_id(node) and counts[_block_id(node)] == 1
+    }
+
+
+def _block_id(node):
+    if not isinstance(node, dict):
+        return ""
+    attrs = node.get("attrs")
+    return str(attrs.get("block_id") or "") if isinstance(attrs, dict) else ""
+
+
+def _json_size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def _cache_key(version):
+    # Versions are immutable once written; created_at guards against reused primary keys.
+    return (version.id, version.created_at)
+
+
+def _cache_get(version):
+    key = _cache_key(version)
+    with _VERSION_CACHE_LOCK:
+        content = _VERSION_CACHE.get(key)
+        if content is not None:
+            _VERSION_CACHE.move_to_end(key)
+        return content
+
+
+def _cache_put(version, content):
+    key = _cache_key(version)
+    with _VERSION_CACHE_LOCK:
+        _VERSION_CACHE[key] = copy.deepcopy(content)
+        _VERSION_CACHE.move_to_end(key)
+        while len(_VERSION_CACHE) > VERSION_CACHE_SIZE:
+            _VERSION_CACHE.popitem(last=False)
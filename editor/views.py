@@ -1,30 +1,45 @@
 import json
 import os
-from datetime import timedelta
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 
-from .document_schema import normalize_document_content, normalize_document_metadata
+from .agent_views import AGENT_RUN_STREAMING
+from .document_schema import (
+    DocumentPatchError,
+    apply_block_patch,
+    content_fingerprint,
+    normalize_document_content,
+    normalize_document_metadata,
+)
 from .models import Document, DocumentType, DocumentVersion
 from .document_text import extract_plain_text
 from .export import tiptap_to_pdf
-from .import_service import import_docx_package
+from .import_service import import_docx_package_cached
+from .render_pool import RenderPoolError
 from .proof_service import (
     ProofRenderError,
     WordRenderService,
     build_document_docx_artifact,
+    ensure_proof_page_image,
     render_document_proof,
+    stream_document_docx,
 )
+from .version_store import create_version, delete_versions, version_content
 
 
 AUTO_SNAPSHOT_MINUTES = int(os.environ.get("AUTO_SNAPSHOT_MINUTES", "10"))
 MAX_SNAPSHOTS_PER_DOC = int(os.environ.get("MAX_SNAPSHOTS_PER_DOC", "100"))
+VERSION_PAGE_SIZE = 100
+_VERSION_LIST_FIELDS = ("id", "label", "created_at", "word_count", "char_count", "preview")
 
 
 @login_required
@@ -92,8 +107,7 @@ def import_document(request):
         title = os.path.splitext(os.path.basename(filename))[0][:500] or f"Imported {doc_type.name}"
 
     try:
-        package = import_docx_package(uploaded)
-        uploaded.seek(0)
+        package, docx_import = import_docx_package_cached(uploaded)
     except Exception as exc:
         messages.error(request, f"Unable to import that Word file: {exc}")
         return redirect("new_document")
@@ -113,14 +127,10 @@ def import_document(request):
         document_type=doc_type,
         content=package["content"],
         metadata=metadata,
-        source_docx=uploaded,
+        source_docx=docx_import.source_docx.name,
         created_by=request.user,
     )
-    DocumentVersion.objects.create(
-        document=doc,
-        content=doc.content,
-        label="Imported from Word",
-    )
+    create_version(doc, doc.content, label="Imported from Word")
     return redirect("editor", doc_id=doc.id)
 
 
@@ -147,6 +157,7 @@ def editor(request, doc_id):
             "document": doc,
             "versions": versions,
             "document_types": document_types,
+            "agent_run_streaming": AGENT_RUN_STREAMING,
         },
     )
 
@@ -174,21 +185,79 @@ def api_save(request, doc_id):
         force_snapshot = bool(data.get("force_snapshot", False))
         snapshot_label = (data.get("snapshot_label") or "").strip()[:100]
 
-        doc.content = new_content
-        doc.metadata = new_metadata
-        doc.save(update_fields=["content", "metadata", "updated_at"])
-        _maybe_create_snapshot(doc, new_content, force=force_snapshot, label=snapshot_label)
+        with transaction.atomic():
+            doc = Document.objects.select_for_update().get(id=doc.id)
+            # Clients that know the revision they edited must not overwrite a newer save.
+            if data.get("base_revision") is not None and data.get("base_revision") != doc.revision:
+                return _save_conflict_response(doc)
+            doc.content = new_content
+            doc.metadata = new_metadata
+            doc.save(update_fields=["content", "metadata", "updated_at"])
+        _maybe_create_snapshot(
+            doc,
+            new_content,
+            fingerprint=(doc.content_digest, doc.content_size),
+            force=force_snapshot,
+            label=snapshot_label,
+        )
         return JsonResponse(
             {
                 "status": "ok",
                 "updated_at": doc.updated_at.isoformat(),
                 "metadata": doc.metadata,
+                "revision": doc.revision,
             }
         )
     except (json.JSONDecodeError, Exception) as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
 
+@login_required
+@require_POST
+def api_save_patch(request, doc_id):
+    doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    force_snapshot = bool(data.get("force_snapshot", False))
+    snapshot_label = (data.get("snapshot_label") or "").strip()[:100]
+    with transaction.atomic():
+        doc = Document.objects.select_for_update().get(id=doc.id)
+        if data.get("base_revision") != doc.revision:
+            return _save_conflict_response(doc)
+        try:
+            doc.content = apply_block_patch(doc.content, data.get("ops") or [])
+        except DocumentPatchError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+        update_fields = ["content", "updated_at"]
+        if "metadata" in data:
+            doc.metadata = normalize_document_metadata(
+                data.get("metadata"),
+                default_fidelity_mode=("proof" if doc.source_docx else "draft"),
+                source_docx_info=_document_source_docx_info(doc),
+            )
+            update_fields.append("metadata")
+        doc.save(update_fields=update_fields)
+
+    _maybe_create_snapshot(
+        doc,
+        doc.content,
+        fingerprint=(doc.content_digest, doc.content_size),
+        force=force_snapshot,
+        label=snapshot_label,
+    )
+    return JsonResponse(
+        {
+            "status": "ok",
+            "updated_at": doc.updated_at.isoformat(),
+            "metadata": doc.metadata,
+            "revision": doc.revision,
+        }
+    )
+
+
 @login_required
 @require_POST
 def api_update_title(request, doc_id):
@@ -196,7 +265,7 @@ def api_update_title(request, doc_id):
     try:
         data = json.loads(request.body)
         doc.title = data.get("title", doc.title)[:500]
-        doc.save()
+        doc.save(update_fields=["title", "updated_at"])
         return JsonResponse({"status": "ok"})
     except (json.JSONDecodeError, Exception) as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
@@ -205,12 +274,16 @@ def api_update_title(request, doc_id):
 @login_required
 def export_docx(request, doc_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
-    artifact = build_document_docx_artifact(doc, user=request.user)
-    response = HttpResponse(
-        artifact.docx_bytes,
-        content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{artifact.filename}"'
+    content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    streamed = stream_document_docx(doc, user=request.user)
+    if streamed is not None:
+        filename, chunks = streamed
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+    else:
+        artifact = build_document_docx_artifact(doc, user=request.user)
+        filename = artifact.filename
+        response = HttpResponse(artifact.docx_bytes, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
 
@@ -221,7 +294,10 @@ def export_pdf(request, doc_id):
     if doc.document_type:
         export_format = doc.document_type.export_format
 
-    pdf_buffer = tiptap_to_pdf(doc.content, doc.title, export_format)
+    try:
+        pdf_buffer = tiptap_to_pdf(doc.content, doc.title, export_format, content_digest=doc.content_digest)
+    except RenderPoolError as exc:
+        return JsonResponse({"error": str(exc)}, status=503)
 
     filename = doc.title.replace(" ", "_")[:50] + ".pdf"
     response = HttpResponse(pdf_buffer.getvalue(), content_type="application/pdf")
@@ -277,6 +353,20 @@ def proof_manifest(request, doc_id):
     return JsonResponse(manifest)
 
 
+@login_required
+@require_GET
+def proof_page(request, doc_id, page):
+    doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
+    try:
+        manifest = render_document_proof(doc, user=request.user)
+        if not 1 <= page <= int(manifest.get("page_count") or 0):
+            raise Http404("No such proof page.")
+        image_path = ensure_proof_page_image(manifest, page)
+    except ProofRenderError as exc:
+        return JsonResponse({"error": str(exc)}, status=503)
+    return FileResponse(image_path.open("rb"), content_type="image/png")
+
+
 @login_required
 @require_POST
 def set_document_style_source(request, doc_id, exemplar_id):
@@ -313,10 +403,26 @@ def set_document_style_source(request, doc_id, exemplar_id):
 @require_GET
 def api_versions(request, doc_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
-    versions = doc.versions.order_by("-created_at")[:100]
+    try:
+        limit = min(max(int(request.GET.get("limit", VERSION_PAGE_SIZE)), 1), VERSION_PAGE_SIZE)
+    except ValueError:
+        limit = VERSION_PAGE_SIZE
+
+    versions = doc.versions.order_by("-created_at", "-id").only(*_VERSION_LIST_FIELDS)
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            created_at, version_id = _parse_version_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"status": "error", "message": "Invalid cursor"}, status=400)
+        versions = versions.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=version_id))
+
+    page = list(versions[: limit + 1])
+    next_cursor = _version_cursor(page[limit - 1]) if len(page) > limit else None
     return JsonResponse(
         {
-            "versions": [_version_payload(v, include_preview=True) for v in versions]
+            "versions": [_version_payload(v, include_preview=True) for v in page[:limit]],
+            "next_cursor": next_cursor,
         }
     )
 
@@ -327,8 +433,9 @@ def api_version_detail(request, doc_id, version_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
     version = get_object_or_404(DocumentVersion, id=version_id, document=doc)
     payload = _version_payload(version, include_preview=True)
-    payload["content"] = version.content
-    payload["full_text"] = _extract_plain_text(version.content, max_chars=50000)
+    content = version_content(version)
+    payload["content"] = content
+    payload["full_text"] = _extract_plain_text(content, max_chars=50000)
     payload["current_text"] = _extract_plain_text(doc.content, max_chars=50000)
     return JsonResponse(payload)
 
@@ -354,7 +461,7 @@ def api_update_version_label(request, doc_id, version_id):
 def api_delete_version(request, doc_id, version_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
     version = get_object_or_404(DocumentVersion, id=version_id, document=doc)
-    version.delete()
+    delete_versions(DocumentVersion.objects.filter(id=version.id))
     return JsonResponse({"status": "ok"})
 
 
@@ -368,7 +475,7 @@ def api_create_snapshot(request, doc_id):
     except json.JSONDecodeError:
         label = "Manual snapshot"
 
-    version = DocumentVersion.objects.create(document=doc, content=doc.content, label=label)
+    version = create_version(doc, doc.content, label=label)
     _prune_snapshots(doc)
     return JsonResponse(
         {
@@ -388,73 +495,94 @@ def api_restore_version(request, doc_id, version_id):
     doc = get_object_or_404(Document, id=doc_id, created_by=request.user)
     version = get_object_or_404(DocumentVersion, id=version_id, document=doc)
 
-    DocumentVersion.objects.create(
-        document=doc,
-        content=doc.content,
+    restored_content = version_content(version)
+    create_version(
+        doc,
+        doc.content,
         label=f"Before restore {timezone.now().strftime('%Y-%m-%d %H:%M')}",
     )
-    doc.content = version.content
+    doc.content = restored_content
     doc.save(update_fields=["content", "updated_at"])
     _prune_snapshots(doc)
 
     return JsonResponse(
         {
             "status": "ok",
-            "content": version.content,
+            "content": restored_content,
             "restored_version_id": version.id,
             "updated_at": doc.updated_at.isoformat(),
+            "revision": doc.revision,
         }
     )
 
 
-def _maybe_create_snapshot(doc, content, force=False, label=""):
-    last = doc.versions.order_by("-created_at").first()
-    if last and last.content == content and not force:
+def _save_conflict_response(doc):
+    return JsonResponse(
+        {"status": "conflict", "message": "The document changed since your last save.", "revision": doc.revision},
+        status=409,
+    )
+
+
+def _maybe_create_snapshot(doc, content, *, fingerprint=None, force=False, label=""):
+    # Only the latest snapshot's digest and timestamp are read; its JSON stays in the database.
+    # Callers that just saved ``content`` pass the digest Document.save() computed for it.
+    last = doc.versions.order_by("-created_at").values("content_digest", "created_at").first()
+    fingerprint = fingerprint or content_fingerprint(content)
+    if last and last["content_digest"] == fingerprint[0] and not force:
         return None
 
     snapshot_due = False
     if force or not last:
         snapshot_due = True
-    elif timezone.now() - last.created_at >= timedelta(minutes=AUTO_SNAPSHOT_MINUTES):
+    elif timezone.now() - last["created_at"] >= timedelta(minutes=AUTO_SNAPSHOT_MINUTES):
         snapshot_due = True
 
     if not snapshot_due:
         return None
 
-    version = DocumentVersion.objects.create(
-        document=doc,
-        content=content,
+    version = create_version(
+        doc,
+        content,
         label=label or f"Autosave {timezone.now().strftime('%Y-%m-%d %H:%M')}",
+        fingerprint=fingerprint,
     )
     _prune_snapshots(doc)
     return version
 
 
 def _prune_snapshots(doc):
-    ids_to_keep = list(
-        doc.versions.order_by("-created_at").values_list("id", flat=True)[:MAX_SNAPSHOTS_PER_DOC]
+    excess_ids = list(
+        doc.versions.order_by("-created_at").values_list("id", flat=True)[MAX_SNAPSHOTS_PER_DOC:]
     )
-    if ids_to_keep:
-        doc.versions.exclude(id__in=ids_to_keep).delete()
+    if excess_ids:
+        delete_versions(doc.versions.filter(id__in=excess_ids))
 
 
 def _version_payload(version, include_preview=False):
     label = (version.label or "").strip()
-    text = extract_plain_text(version.content, max_chars=20000)
     payload = {
         "id": version.id,
         "label": label or "Snapshot",
         "created_at": version.created_at.isoformat(),
         "is_auto": label.lower().startswith("autosave"),
         "is_restore_point": label.lower().startswith("before restore"),
-        "word_count": len([w for w in text.split() if w.strip()]),
-        "char_count": len(text),
+        "word_count": version.word_count,
+        "char_count": version.char_count,
     }
     if include_preview:
-        payload["preview"] = text[:400]
+        payload["preview"] = version.preview
     return payload
 
 
+def _version_cursor(version):
+    return f"{version.created_at.isoformat()}|{version.id}"
+
+
+def _parse_version_cursor(cursor):
+    created_at, _, version_id = cursor.rpartition("|")
+    return datetime.fromisoformat(created_at), int(version_id)
+
+
 def _extract_plain_text(content, max_chars=None):
     return extract_plain_text(content, max_chars=max_chars)
 
@@ -462,8 +590,10 @@ def _extract_plain_text(content, max_chars=None):
 def _document_source_docx_info(doc):
     if not doc.source_docx:
         return {}
+    # Imported files are stored under their content hash; the name shown is the importer's own.
+    filename = ((doc.metadata or {}).get("source_docx_info") or {}).get("filename")
     return {
-        "filename": Path(doc.source_docx.name).name if "/" in doc.source_docx.name else doc.source_docx.name,
+        "filename": filename or Path(doc.source_docx.name).name,
         "url": doc.source_docx.url if hasattr(doc.source_docx, "url") else "",
         "source": "document_source_docx",
     }
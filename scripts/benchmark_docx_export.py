@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark generated DOCX export: python-docx object model vs. streamed WordprocessingML.
+
+Builds a synthetic record of proceedings, checks that both engines produce the
+same package parts, then reports wall time for each. The python-docx engine holds
+the whole tree and package in memory; the streamed engine's largest held chunk is
+reported alongside.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import django
+except ModuleNotFoundError as exc:
+    venv_python = PROJECT_ROOT / ".venv" / "bin" / "python"
+    if exc.name == "django" and venv_python.exists() and Path(sys.executable) != venv_python:
+        os.execv(str(venv_python), [str(venv_python), __file__, *sys.argv[1:]])
+    raise
+
+
+PARAGRAPH_TEXT = (
+    "Q. And when you returned to your home town, what happened? A. The men who had threatened "
+    "my family came to the house again and told my mother that they were looking for me. "
+)
+
+
+def _text(text, *marks):
+    node = {"type": "text", "text": text}
+    if marks:
+        node["marks"] = [{"type": mark} for mark in marks]
+    return node
+
+
+def _build_record(pages):
+    content = []
+    footnote = 0
+    for page in range(pages):
+        content.append({"type": "heading", "attrs": {"level": 2}, "content": [_text(f"Transcript page {page + 1}")]})
+        for index in range(8):
+            parts = [_text(PARAGRAPH_TEXT * 2), _text("Emphasis.", "italic")]
+            if index == 3:
+                footnote += 1
+                parts.append(
+                    {"type": "footnoteReference", "attrs": {"number": footnote, "text": f"Exhibit {footnote}."}}
+                )
+            content.append({"type": "paragraph", "content": parts})
+        content.append(
+            {
+                "type": "bulletList",
+                "content": [
+                    {"type": "listItem", "content": [{"type": "paragraph", "content": [_text(f"Point {item}", "bold")]}]}
+                    for item in range(3)
+                ],
+            }
+        )
+    return {"type": "doc", "content": content}
+
+
+def _measure(func):
+    started = time.perf_counter()
+    buffer = func()
+    return buffer, time.perf_counter() - started
+
+
+def _collect_stream(chunks):
+    buffer = io.BytesIO()
+    largest = 0
+    for chunk in chunks:
+        largest = max(largest, len(chunk))
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer, largest
+
+
+def _parts(buffer):
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=150, help="Synthetic transcript pages (default 150).")
+    parser.add_argument(
+        "--format",
+        default="court_brief",
+        help="FORMAT_PRESETS key to export with (default court_brief).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the best run is reported.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    from editor.docx_stream import stream_tiptap_docx, tiptap_to_docx_streamed
+    from editor.export import tiptap_to_docx
+
+    record = _build_record(args.pages)
+    engines = (
+        ("python_docx", lambda: tiptap_to_docx(record, export_format=args.format)),
+        ("streamed", lambda: tiptap_to_docx_streamed(record, export_format=args.format)),
+    )
+
+    results = {}
+    for name, func in engines:
+        runs = [_measure(func) for _ in range(args.repeat)]
+        buffer = runs[-1][0]
+        results[name] = {
+            "parts": _parts(buffer),
+            "size": len(buffer.getvalue()),
+            "seconds": min(run[1] for run in runs),
+        }
+    _, largest_chunk = _collect_stream(stream_tiptap_docx(record, export_format=args.format))
+
+    if results["python_docx"]["parts"] != results["streamed"]["parts"]:
+        raise SystemExit("Streamed export differs from the python-docx export.")
+
+    print(f"record: {args.pages} pages, {len(record['content'])} top-level blocks, format {args.format}")
+    for name, result in results.items():
+        print(f"{name:>12}: {result['seconds'] * 1000:9.1f} ms  docx {result['size'] / 1024:7.1f} KiB")
+    baseline, streamed = results["python_docx"], results["streamed"]
+    print(f"{'speedup':>12}: {baseline['seconds'] / streamed['seconds']:9.2f}x")
+    print(f"{'chunk':>12}: {largest_chunk / 1024:9.1f} KiB largest streamed chunk")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for research query feature extraction on brief-sized text.
+
+Compares the single-pass matcher in editor.research_service with the previous
+approach (three statute regexes, a substring check per legal phrase, one
+re.search per circuit pattern and a separate tokenizer pass).
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import django
+except ModuleNotFoundError as exc:
+    venv_python = PROJECT_ROOT / ".venv" / "bin" / "python"
+    if exc.name == "django" and venv_python.exists() and Path(sys.executable) != venv_python:
+        os.execv(str(venv_python), [str(venv_python), __file__, *sys.argv[1:]])
+    raise
+
+
+BRIEF_PARAGRAPHS = (
+    "The respondent fears future persecution on account of her membership in a particular social group "
+    "and her political opinion. She testified credibly that the government is unable or unwilling to "
+    "protect her, and her membership was at least one central reason for the harm. ",
+    "Under INA § 208(b)(1)(B)(i) and 8 U.S.C. § 1158, an applicant must show a well-founded fear. "
+    "The regulations at 8 C.F.R. § 1208.13(b)(1) create a presumption after past persecution. ",
+    "The Ninth Circuit has held that the Board must consider corroboration before an adverse credibility "
+    "finding, see \"totality of the circumstances\", and that withholding requires a clear probability. ",
+    "For CAT protection the applicant must show it is more likely than not she would face torture "
+    "with government acquiescence; changed circumstances and firm resettlement do not apply. ",
+)
+
+
+def _build_brief(target_chars):
+    parts = []
+    size = 0
+    index = 0
+    while size < target_chars:
+        paragraph = BRIEF_PARAGRAPHS[index % len(BRIEF_PARAGRAPHS)]
+        parts.append(paragraph)
+        size += len(paragraph)
+        index += 1
+    return "\n".join(parts)[:target_chars]
+
+
+def _legacy_features(research_service, text):
+    lowered = (text or "").lower()
+    phrases = []
+    seen = set()
+    for match in re.finditer(r'"([^"]{4,120})"', text or ""):
+        phrase = research_service._normalize_ws(match.group(1)).lower()
+        if len(phrase.split()) >= 2 and phrase not in seen:
+            seen.add(phrase)
+            phrases.append(phrase)
+    for regex in research_service._STATUTE_PATTERNS:
+        for match in re.finditer(regex, lowered):
+            phrase = research_service._normalize_ws(match.group(0))
+            if phrase not in seen:
+                seen.add(phrase)
+                phrases.append(phrase)
+    for phrase in research_service._LEGAL_PHRASES:
+        if phrase in lowered and phrase not in seen:
+            seen.add(phrase)
+            phrases.append(phrase)
+
+    tokens = re.findall(r"[a-z0-9][a-z0-9_-]*", lowered)
+    Counter(tokens)
+    circuit_hint = None
+    for label, patterns in research_service._CIRCUIT_HINT_PATTERNS.items():
+        if any(re.search(pattern, lowered) for pattern in patterns):
+            circuit_hint = label
+            break
+    return phrases[:6], circuit_hint
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=40000, help="Size of the synthetic brief (default 40000).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions; the best run is reported.")
+    parser.add_argument("--number", type=int, default=20, help="Extractions per repetition.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    from editor import research_service
+
+    text = _build_brief(args.chars)
+    features = research_service._extract_query_features(text)
+    legacy_phrases, legacy_circuit = _legacy_features(research_service, text)
+    if (features["phrases"], features["circuit_hint"]) != (legacy_phrases, legacy_circuit):
+        raise SystemExit("Single-pass and legacy extraction disagree on this input.")
+
+    timings = {}
+    for name, func in (
+        ("legacy", lambda: _legacy_features(research_service, text)),
+        ("single_pass", lambda: research_service._extract_query_features(text)),
+    ):
+        best = min(timeit.repeat(func, repeat=args.repeat, number=args.number))
+        timings[name] = best / args.number * 1000
+
+    print(f"brief: {len(text)} chars")
+    for name, millis in timings.items():
+        print(f"{name:>12}: {millis:8.2f} ms per extraction")
+    print(f"{'speedup':>12}: {timings['legacy'] / timings['single_pass']:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())